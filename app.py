@@ -1,26 +1,19 @@
 import os
-import docker
+import argparse
 
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import ToolNode, create_react_agent
-from langchain_core.runnables import RunnableConfig
+from dotenv import load_dotenv
 
-from utils.run_agent import run_agent_openai
-
-from tools.web_search import GoogleSearchTool, WebSearchTool
-from tools.web_scraper import WebScraperTool
-
-from tools.cmd_runner import pentest_api_tool as cmd_runner
-
-from tools.report_generator import report_generator_tool
+load_dotenv()
 
-from tools.exploit_db_search import exploitdb_search_tool
-
-from tools.retrieve_file import download_file_tool
-
-from tools.file_reader import read_pdf, read_txt
+from utils.run_agent import run_agent_openai
+from utils.tracing import RunTracer, summarize
+from utils.campaign import Campaign, LLMBudget, read_targets, DEFAULT_PROMPT_TEMPLATE
+from utils.context import ContextCompactor, recall_output
+from utils.tool_cache import ToolCallCache, memoize_tools
+from utils.replay import Replay, MODES as REPLAY_MODES, DEFAULT_CASSETTE
+from utils.collected_index import CollectingCallback, collect_outputs, search_collected
 
-from tools.zip_process import zip_processor_tool
+from tools.registry import load_tools
 
 import time
 
@@ -29,30 +22,27 @@ attempts = 0
 
 #### INIT TOOLS ####
 
-search_tool_instance = WebSearchTool()
-google_tool = GoogleSearchTool(search_tool_instance)
+# Tools are bound from the registry manifest; each implementation module is imported on its first call
+base_tools = load_tools() + [recall_output, search_collected]
 
-web_scraper_tool = WebScraperTool()
-
-tools = [
-    google_tool,
-    web_scraper_tool,
-    cmd_runner,
-    report_generator_tool,
-    exploitdb_search_tool,
-    download_file_tool,
-    read_pdf,
-    read_txt,
-    zip_processor_tool
-]
+# Identical tool calls within a run are answered from memory (see DEFAULT_POLICIES for what is cacheable)
+tool_cache = ToolCallCache()
+tools = memoize_tools(base_tools, tool_cache)
 
 ####################
 
 #### INIT AGENT ####
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0, api_key=os.getenv("LLM_API_KEY")) # TODO change model as you wish
+# Keeps recent turns intact and swaps older bulky tool outputs for recallable excerpts
+compactor = ContextCompactor()
+
+def build_graph(agent_tools=None, agent_compactor=None):
+    # langchain_openai and langgraph dominate startup time: only import them when an agent actually runs
+    from langchain_openai import ChatOpenAI
+    from langgraph.prebuilt import create_react_agent
 
-graph = create_react_agent(llm, tools)
+    llm = ChatOpenAI(model="gpt-4.1", temperature=0, api_key=os.getenv("LLM_API_KEY")) # TODO change model as you wish
+    return create_react_agent(llm, agent_tools or tools, pre_model_hook=agent_compactor or compactor)
 
 system_message = (
     "system", """You are a pentester AI agent designed to help a cybersecurity expert find vulnerabilities 
@@ -78,18 +68,81 @@ system_message = (
 
 # Run
 
+def run_campaign(args, replay, collector):
+    targets = read_targets(args.campaign)
+    prompt_template = DEFAULT_PROMPT_TEMPLATE
+    if args.prompt_template:
+        with open(args.prompt_template, encoding="utf-8") as f:
+            prompt_template = f.read()
+    budget = LLMBudget(calls_per_minute=args.llm_rpm, max_tokens=args.token_budget)
+    runs = {}
+
+    def target_graph(target):
+        # Concurrent targets must not answer each other's tool calls nor mix their compaction stats
+        run_cache, run_compactor = ToolCallCache(), ContextCompactor()
+        runs[target] = (run_cache, run_compactor)
+        run_tools = collect_outputs(replay.wrap_tools(memoize_tools(base_tools, run_cache), scope=target), collector)
+        return build_graph(run_tools, run_compactor)
+
+    campaign = Campaign(args.name, target_graph, system_message, targets, concurrency=args.concurrency,
+                        prompt_template=prompt_template, budget=budget)
+    campaign.run()
+    for target, (run_cache, run_compactor) in runs.items():
+        print(f"\n[{target}]")
+        print(run_compactor.report())
+        print(run_cache.report())
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM pentest agent")
+    parser.add_argument("--campaign", help="Run a campaign over a target list (file, or '-' for stdin)")
+    parser.add_argument("--name", default="campaign", help="Campaign name; rerunning the same name resumes it")
+    parser.add_argument("--concurrency", type=int, default=4, help="Agent graphs running at the same time")
+    parser.add_argument("--llm-rpm", type=int, default=None, help="Global cap on LLM calls per minute")
+    parser.add_argument("--token-budget", type=int, default=None, help="Global cap on LLM tokens for the campaign")
+    parser.add_argument("--prompt-template", help="File with the user prompt, '{target}' is replaced by each target")
+    parser.add_argument("--replay", choices=REPLAY_MODES, default=os.getenv("LLM_CACHE_MODE", "passthrough"),
+                        help="record: reuse recorded LLM responses, run tools live and overwrite their recordings; "
+                             "replay: offline from the cassette only; "
+                             "passthrough: no recording (default)")
+    parser.add_argument("--cassette", default=os.getenv("LLM_CASSETTE", DEFAULT_CASSETTE),
+                        help="SQLite file holding recorded LLM responses and tool outputs")
+    args = parser.parse_args()
+
     start_time = time.time()
 
+    replay = Replay(args.replay, args.cassette)
+    # Scraped pages, command outputs and files read are indexed for search_collected
+    collector = CollectingCallback()
+    agent_tools = collect_outputs(replay.wrap_tools(tools), collector)
+    if args.replay == "replay":
+        # Offline replay never reaches the API, but ChatOpenAI refuses to start without a key
+        os.environ.setdefault("LLM_API_KEY", "offline-replay")
+
+    if args.campaign:
+        run_campaign(args, replay, collector)
+        print(f"\n⏱️   Total execution time: {time.time() - start_time:.2f} seconds")
+        print(replay.report())
+        print(collector.report())
+        raise SystemExit(0)
+
     prompt = "Connect with ssh as kali at 192.168.0.62 on port 22 password is kali. When you are connected, execute the python file ./test_ssh.py and follow the instructions given by the script. use the command ssh -p 22 kali@192.168.0.62"
 
     inputs = {"messages": [system_message, ("user", prompt)]}
     config = {"recursion_limit": 110}
+    tracer = RunTracer()
     
     try:
-        run_agent_openai(graph, inputs, config, max_retries=5)
+        run_agent_openai(build_graph(agent_tools), inputs, config, max_retries=5, tracer=tracer)
         
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
+
+    finally:
+        tracer.close()
         
-    print(f"\n⏱️   Total execution time: {time.time() - start_time:.2f} seconds")
\ No newline at end of file
+    print(f"\n⏱️   Total execution time: {time.time() - start_time:.2f} seconds")
+    summarize(tracer.path)
+    print(compactor.report())
+    print(tool_cache.report())
+    print(replay.report())
+    print(collector.report())
\ No newline at end of file
@@ -1,16 +1,126 @@
 #!/usr/bin/env python3
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from secure_command_executor import SecureCommandExecutor
+from metrics import registry, CONTENT_TYPE
+from sharded_jobs import ShardedJob, jobs
+import wordlists
+import scan_fanout
+import incremental
+import cracking
+import dns_resolver
+import http_probe
+from session_manager import SessionManager
+import transport
 import logging
+import os
+import re
+import signal
+import subprocess
 import threading
 import time
-import psutil
 
 ############### UTILS ###############
 
 processes={} # Dictionary to hold background processes info
 
+READER_THREAD_PREFIX = "bg-reader-"
+
+def _active_background_processes():
+    return sum(1 for info in list(processes.values()) if info["return_code"] is None)
+
+def _buffered_output_bytes():
+    return sum(info["stdout_bytes"] + info["stderr_bytes"] for info in list(processes.values()))
+
+def _reader_thread_count():
+    return sum(1 for t in threading.enumerate() if t.name.startswith(READER_THREAD_PREFIX))
+
+REQUEST_LATENCY = registry.histogram(
+    "api_request_duration_seconds",
+    "Request latency per route",
+    ("route", "method", "status"),
+)
+registry.gauge("api_background_processes_active", "Background processes still running",
+               callback=_active_background_processes)
+registry.gauge("api_background_processes_tracked", "Background processes kept in the output table",
+               callback=lambda: len(processes))
+registry.gauge("api_background_output_bytes", "Output bytes buffered for background processes",
+               callback=_buffered_output_bytes)
+registry.gauge("api_reader_threads", "Threads reading background process output",
+               callback=_reader_thread_count)
+RESPONSE_BYTES = registry.counter(
+    "api_response_bytes_total",
+    "Response body bytes before (raw) and after (wire) compression",
+    ("encoding", "kind"),
+)
+REAPED = registry.counter(
+    "api_background_reaped_total",
+    "Background processes reaped by outcome",
+    ("reason",),
+)
+
+############### REAPER ###############
+
+REAPER_INTERVAL = float(os.getenv("BACKGROUND_REAPER_INTERVAL", "2"))
+WAIT_MAX_TIMEOUT = float(os.getenv("BACKGROUND_WAIT_MAX_TIMEOUT", "300"))  # Durée max d'un long-poll /wait
+IDLE_TTL = float(os.getenv("BACKGROUND_IDLE_TTL", "1800"))          # Pas de nouvelle sortie depuis N secondes
+RETENTION = float(os.getenv("BACKGROUND_RETENTION", "3600"))        # Conservation des sorties après la fin
+
+_reaper_thread = None
+_reaper_lock = threading.Lock()
+
+def _last_activity(info):
+    last = info["started_at"]
+    for stream in ("stdout", "stderr"):
+        if info[stream]:
+            last = max(last, info[stream][-1]["timestamp"])
+    return last
+
+def _kill_process_group(info, reason):
+    process = info["process"]
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+    info["killed_reason"] = reason
+
+def reap_background_processes(now=None):
+    """Récupère le code retour des processus terminés et tue ceux qui dépassent leurs limites"""
+    now = now or time.time()
+    for pid, info in list(processes.items()):
+        process = info["process"]
+        if info.get("return_code") is None:
+            return_code = process.poll()  # poll() libère le zombie
+            if return_code is None:
+                if info["max_wall_time"] and now - info["started_at"] > info["max_wall_time"]:
+                    _kill_process_group(info, "max_wall_time")
+                elif IDLE_TTL and now - _last_activity(info) > IDLE_TTL:
+                    _kill_process_group(info, "idle_ttl")
+                else:
+                    continue
+                return_code = process.wait()
+            info["return_code"] = return_code
+            info["ended_at"] = now
+            REAPED.inc(reason=info.get("killed_reason") or "exited")
+        elif RETENTION and now - info["ended_at"] > RETENTION:
+            processes.pop(pid, None)
+
+def _reaper_loop():
+    while True:
+        try:
+            reap_background_processes()
+            sessions.reap_idle()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Reaper error: {e}")
+        time.sleep(REAPER_INTERVAL)
+
+def ensure_reaper():
+    global _reaper_thread
+    with _reaper_lock:
+        if _reaper_thread is None or not _reaper_thread.is_alive():
+            _reaper_thread = threading.Thread(target=_reaper_loop, name="bg-reaper", daemon=True)
+            _reaper_thread.start()
+
 def get_background_output(pid, stream_type='both', last_n_lines=None):
 
     result = {}
@@ -35,14 +145,16 @@ def start_output_monitoring(pid, process):
     # Thread pour stdout
     stdout_thread = threading.Thread(
         target=_read_stream,
-        args=(process.stdout, processes[pid]["stdout"], 'stdout'),
+        args=(process.stdout, processes[pid], 'stdout'),
+        name=f"{READER_THREAD_PREFIX}{pid}-stdout",
         daemon=True
     )
     
     # Thread pour stderr - FIXED: Added target= and args=
     stderr_thread = threading.Thread(
         target=_read_stream,
-        args=(process.stderr, processes[pid]["stderr"], 'stderr'),
+        args=(process.stderr, processes[pid], 'stderr'),
+        name=f"{READER_THREAD_PREFIX}{pid}-stderr",
         daemon=True
     )
     
@@ -51,8 +163,12 @@ def start_output_monitoring(pid, process):
     
     return True
 
-def _read_stream(stream, buffer, stream_name):
+def _read_stream(stream, info, stream_name):
     """Lit un stream et stocke les lignes dans le buffer"""
+    buffer = info[stream_name]
+    cond = info["cond"]
+    # Chaque thread ne met à jour que son propre compteur : pas besoin de verrou
+    bytes_key = f"{stream_name}_bytes"
     try:
         # IMPORTANT: Make sure the stream is in text mode for readline()
         for line in iter(stream.readline, ''):
@@ -63,6 +179,10 @@ def _read_stream(stream, buffer, stream_name):
                     'line': line.rstrip('\n'),
                     'stream': stream_name
                 })
+                info[bytes_key] += len(line)
+                # Réveille les requêtes /wait en attente sur ce processus
+                with cond:
+                    cond.notify_all()
             else:
                 break
     except Exception as e:
@@ -75,31 +195,127 @@ def _read_stream(stream, buffer, stream_name):
     finally:
         if hasattr(stream, 'close'):
             stream.close()
+        with cond:
+            info["open_streams"] -= 1
+            cond.notify_all()
 
-def _read_stream(stream, buffer,stream_name):
-    """Lit un stream et stocke les lignes dans le buffer"""
-    try:
-        for line in iter(stream.readline, ''):
-            if line:
-                timestamp = time.time()
-                buffer.append({
-                    'timestamp': timestamp,
-                    'line': line.rstrip('\n'),
-                    'stream': stream_name
-                })
-            else:
+def _parse_cursor(cursor):
+    """'<stdout>,<stderr>' -> (int, int) ; absent -> depuis le début"""
+    if not cursor:
+        return 0, 0
+    out_pos, err_pos = cursor.split(",", 1)
+    return max(0, int(out_pos)), max(0, int(err_pos))
+
+def wait_for_output(info, cursor=(0, 0), pattern=None, min_lines=None, timeout=30.0,
+                    stream_type='both', max_lines=200):
+    """
+    Attend côté serveur qu'une nouvelle ligne corresponde à `pattern`, que `min_lines`
+    nouvelles lignes arrivent, que le processus se termine ou que le timeout expire.
+    Ne renvoie que les lignes postérieures au curseur (jusqu'à la correspondance incluse).
+    """
+    streams = ['stdout', 'stderr'] if stream_type == 'both' else [stream_type]
+    positions = {'stdout': cursor[0], 'stderr': cursor[1]}
+    scanned = dict(positions)
+    deadline = time.time() + timeout
+    reason, match = "timeout", None
+    cond = info["cond"]
+
+    with cond:
+        while True:
+            # Recherche du motif dans les lignes pas encore examinées
+            if pattern is not None:
+                for name in streams:
+                    lines = info[name]
+                    for i in range(scanned[name], len(lines)):
+                        if pattern.search(lines[i]['line']):
+                            match = {'stream': name, 'index': i, 'line': lines[i]['line']}
+                            break
+                    scanned[name] = len(lines) if match is None else match['index'] + 1
+                    if match:
+                        break
+                if match:
+                    reason = "pattern"
+                    break
+            new_count = sum(len(info[name]) - positions[name] for name in streams)
+            if min_lines and new_count >= min_lines:
+                reason = "lines"
                 break
-    except Exception as e:
-        return f"⚠️ Error reading {stream_name} stream: {str(e)}"
-    finally:
-        stream.close()
+            remaining = deadline - time.time()
+            if info["open_streams"] == 0:
+                # Les deux streams sont fermés : le processus se termine
+                try:
+                    info["process"].wait(timeout=max(0.0, min(remaining, 1.0)))
+                    reason = "exited"
+                    break
+                except subprocess.TimeoutExpired:
+                    remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # Réveil périodique : la fin du processus n'est pas toujours notifiée
+            cond.wait(timeout=min(remaining, 1.0))
+
+    delta, truncated = {}, 0
+    new_positions = dict(positions)
+    for name in streams:
+        end = len(info[name])
+        if match is not None:
+            # Les lignes après la correspondance restent pour le prochain appel
+            end = match['index'] + 1 if name == match['stream'] else min(end, scanned[name])
+        lines = info[name][positions[name]:end]
+        if max_lines and len(lines) > max_lines:
+            truncated += len(lines) - max_lines
+            lines = lines[-max_lines:]
+        delta[name] = lines
+        new_positions[name] = end
+
+    return {
+        'reason': reason,
+        'match': match,
+        'status': 'running' if info["process"].poll() is None else 'exited',
+        'return_code': info["process"].poll(),
+        'killed_reason': info.get('killed_reason'),
+        'cursor': f"{new_positions['stdout']},{new_positions['stderr']}",
+        'truncated_lines': truncated,
+        **delta,
+    }
 
 ###################################################################
 
 app = Flask(__name__)
+app.json = transport.FastJSONProvider(app)
 executor = SecureCommandExecutor(timeout=120)
+sessions = SessionManager(executor)
 port = 7289 # TODO CONFIGURE PORT
 
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request_latency(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - start, route=route,
+                                method=request.method, status=response.status_code)
+    return response
+
+# Enregistré après la mesure de latence : Flask exécute les after_request en ordre inverse,
+# la compression est donc incluse dans la latence mesurée
+@app.after_request
+def _compress_response(response):
+    raw_size = response.calculate_content_length()
+    encoding = transport.compress_response(response)
+    if raw_size is not None:
+        encoding = encoding or "identity"
+        RESPONSE_BYTES.inc(raw_size, encoding=encoding, kind="raw")
+        RESPONSE_BYTES.inc(response.calculate_content_length() or 0, encoding=encoding, kind="wire")
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -117,26 +333,19 @@ def get_background_process(pid):
     """Récupère les informations d'un processus par son PID"""
     try:
         # Vérifier si le processus existe
-        if not psutil.pid_exists(pid):
+        info = processes.get(pid)
+        if info is None:
             return jsonify({
                 'error': 'Process not found',
                 'pid': pid
             }), 404
         
-        # Obtenir les informations du processus
-        process = psutil.Process(pid)
         output = get_background_output(pid, stream_type='both')
         
         process_info = {
-            # 'pid': pid,
-            # 'name': process.name(),
-            # 'status': process.status(),
-            # 'cpu_percent': process.cpu_percent(),
-            # 'memory_info': process.memory_info()._asdict(),
-            # 'create_time': process.create_time(),
-            # 'cmdline': process.cmdline(),
-            # 'cwd': process.cwd() if process.cwd() else None,
-            # 'children': [child.pid for child in process.children()],
+            'status': 'running' if info.get('return_code') is None else 'exited',
+            'return_code': info.get('return_code'),
+            'killed_reason': info.get('killed_reason'),
             'stdout': output.get('stdout', []),
             'stderr': output.get('stderr', [])
         }
@@ -146,16 +355,40 @@ def get_background_process(pid):
             'process': process_info
         }), 200
         
-    except psutil.NoSuchProcess:
-        return jsonify({
-            'error': 'Process no longer exists',
-            'pid': pid
-        }), 404
-    except psutil.AccessDenied:
+    except Exception as e:
         return jsonify({
-            'error': 'Access denied to process information',
+            'error': str(e),
             'pid': pid
-        }), 403
+        }), 500
+
+@app.route('/background/<int:pid>/wait', methods=['GET'])
+def wait_background_process(pid):
+    """Long-poll : bloque jusqu'au motif, à N nouvelles lignes, à la fin du processus ou au timeout"""
+    try:
+        info = processes.get(pid)
+        if info is None:
+            return jsonify({
+                'error': 'Process not found',
+                'pid': pid
+            }), 404
+
+        stream_type = request.args.get('stream', 'both')
+        if stream_type not in ('stdout', 'stderr', 'both'):
+            return jsonify({"error": "stream must be stdout, stderr or both"}), 400
+        try:
+            pattern = request.args.get('pattern')
+            pattern = re.compile(pattern) if pattern else None
+            cursor = _parse_cursor(request.args.get('cursor'))
+            min_lines = request.args.get('lines', type=int)
+            timeout = min(request.args.get('timeout', 30.0, type=float), WAIT_MAX_TIMEOUT)
+            max_lines = request.args.get('max_lines', 200, type=int)
+        except (re.error, ValueError) as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
+
+        result = wait_for_output(info, cursor=cursor, pattern=pattern, min_lines=min_lines,
+                                 timeout=max(0.0, timeout), stream_type=stream_type, max_lines=max_lines)
+        return jsonify({'success': True, 'pid': pid, **result}), 200
+
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -172,9 +405,24 @@ def execute_background_command():
         command = data['command']
         
         result,pid,process = executor.execute_background_command(command)
+        if process is None:
+            return jsonify({
+                "success": False,
+                "PID": pid,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "return_code": result.return_code
+            }), 400
 
-        processes[pid]={"stdout":[],"stderr":[]}
+        profile = executor.get_resource_profile(result.category)
+        processes[pid]={
+            "stdout":[],"stderr":[],"stdout_bytes":0,"stderr_bytes":0,"process":process,
+            "started_at":time.time(),"max_wall_time":profile.max_wall_time,
+            "return_code":None,"ended_at":None,"killed_reason":None,
+            "cond":threading.Condition(),"open_streams":2
+        }
         start_output_monitoring(pid,process)
+        ensure_reaper()
 
         return jsonify({
             "success": result.success,
@@ -209,7 +457,340 @@ def execute_command():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/jobs/bruteforce', methods=['POST'])
+def start_bruteforce_job():
+    """Découpe la wordlist en shards et lance un worker par shard"""
+    try:
+        data = request.get_json()
+        if not data or 'command' not in data or 'wordlist' not in data:
+            return jsonify({"error": "Missing command or wordlist"}), 400
+
+        command = data['command']
+        if '{wordlist}' not in command:
+            return jsonify({"error": "The command must contain a {wordlist} placeholder"}), 400
+        if not os.path.isfile(data['wordlist']):
+            return jsonify({"error": f"Wordlist not found: {data['wordlist']}"}), 404
+
+        # Validation avant le découpage : une commande refusée ne doit pas coûter l'écriture des shards
+        is_valid, reason, _ = executor.validate_or_reject(command.replace('{wordlist}', data['wordlist']))
+        if not is_valid:
+            return jsonify({"success": False, "error": f"Commande refusée: {reason}"}), 400
+
+        shard_count = int(data.get('shards', os.cpu_count() or 2))
+        shard_paths, meta = wordlists.make_shards(data['wordlist'], shard_count)
+        commands = [command.replace('{wordlist}', path) for path in shard_paths]
+
+        pattern = data.get('hit_pattern') or wordlists.default_hit_pattern(command)
+        job = ShardedJob(
+            'bruteforce', commands, wordlists.make_hit_merger(pattern),
+            shard_timeout=float(data.get('shard_timeout', 3600)),
+            max_parallel=int(data.get('max_parallel', len(commands)))
+        ).start(executor)
+
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "shards": len(commands),
+            "wordlist": {k: meta[k] for k in ('lines', 'unique', 'duplicates', 'length')}
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/scan', methods=['POST'])
+def start_scan_job():
+    """Découpe un scan nmap/masscan en sous-jobs (cibles x ports) exécutés en parallèle"""
+    try:
+        data = request.get_json()
+        if not data or 'targets' not in data:
+            return jsonify({"error": "Missing targets"}), 400
+
+        tool = data.get('tool', 'nmap')
+        targets = data['targets']
+        if isinstance(targets, str):
+            targets = targets.replace(',', ' ').split()
+        try:
+            commands = scan_fanout.build_commands(
+                tool, data.get('options', ''), targets, data.get('ports', '1-1000'),
+                hosts_per_shard=int(data.get('hosts_per_shard', 16)),
+                port_chunks=int(data.get('port_chunks', 4))
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        is_valid, reason, _ = executor.validate_or_reject(commands[0])
+        if not is_valid:
+            return jsonify({"success": False, "error": f"Commande refusée: {reason}"}), 400
+
+        job = ShardedJob(
+            'scan', commands, scan_fanout.make_scan_merger(tool),
+            shard_timeout=float(data.get('shard_timeout', 600)),
+            max_parallel=int(data.get('max_parallel', os.cpu_count() or 2))
+        ).start(executor)
+
+        return jsonify({"success": True, "job_id": job.id, "shards": len(commands)})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/rescan', methods=['POST'])
+def start_rescan_job():
+    """Retest incrémental : sonde rapide, scan complet des seuls hôtes changés ou nouveaux"""
+    try:
+        data = request.get_json()
+        if not data or 'engagement' not in data or 'targets' not in data:
+            return jsonify({"error": "Missing engagement or targets"}), 400
+
+        targets = data['targets']
+        if isinstance(targets, str):
+            targets = targets.replace(',', ' ').split()
+        try:
+            job = incremental.IncrementalScan(
+                data['engagement'], targets, ports=data.get('ports', '1-1000'), options=data.get('options', ''),
+                hosts_per_shard=int(data.get('hosts_per_shard', 16)),
+                port_chunks=int(data.get('port_chunks', 4)),
+                shard_timeout=float(data.get('shard_timeout', 600)),
+                max_parallel=int(data.get('max_parallel', os.cpu_count() or 2))
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        is_valid, reason, _ = executor.validate_or_reject(job.full_scan_commands(targets)[0])
+        if not is_valid:
+            return jsonify({"success": False, "error": f"Commande refusée: {reason}"}), 400
+
+        job.start(executor)
+        return jsonify({"success": True, "job_id": job.id, "engagement": job.engagement})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/rescan/web', methods=['POST'])
+def start_web_rescan_job():
+    """Retest incrémental d'un site : re-requête des chemins connus, bruteforce des répertoires changés"""
+    try:
+        data = request.get_json()
+        if not data or not all(k in data for k in ('engagement', 'url', 'command', 'wordlist')):
+            return jsonify({"error": "Missing engagement, url, command or wordlist"}), 400
+        if not os.path.isfile(data['wordlist']):
+            return jsonify({"error": f"Wordlist not found: {data['wordlist']}"}), 404
+
+        try:
+            job = incremental.IncrementalWebScan(
+                data['engagement'], data['url'], data['command'], data['wordlist'],
+                shards=int(data.get('shards', os.cpu_count() or 2)),
+                hit_pattern=data.get('hit_pattern'),
+                shard_timeout=float(data.get('shard_timeout', 3600)),
+                max_parallel=int(data.get('max_parallel', os.cpu_count() or 2))
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        command = data['command'].replace('{url}', job.url).replace('{wordlist}', data['wordlist'])
+        is_valid, reason, _ = executor.validate_or_reject(command)
+        if not is_valid:
+            return jsonify({"success": False, "error": f"Commande refusée: {reason}"}), 400
+
+        job.start(executor)
+        return jsonify({"success": True, "job_id": job.id, "engagement": job.engagement})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/crack', methods=['POST'])
+def start_crack_job():
+    """Job john/hashcat repris après redémarrage ; les hashes déjà dans le potfile partagé sont sautés"""
+    try:
+        data = request.get_json()
+        if not data or 'wordlist' not in data or not (data.get('hashes') or data.get('hash_file')):
+            return jsonify({"error": "Missing hashes (or hash_file) or wordlist"}), 400
+        if not os.path.isfile(data['wordlist']):
+            return jsonify({"error": f"Wordlist not found: {data['wordlist']}"}), 404
+
+        hashes = data.get('hashes') or []
+        if isinstance(hashes, str):
+            hashes = hashes.splitlines()
+        if data.get('hash_file'):
+            if not os.path.isfile(data['hash_file']):
+                return jsonify({"error": f"Hash file not found: {data['hash_file']}"}), 404
+            with open(data['hash_file'], errors='replace') as f:
+                hashes = hashes + f.read().splitlines()
+
+        try:
+            job = cracking.manager.create(data.get('tool', 'john'), hashes, data['wordlist'],
+                                          hash_format=data.get('format'), options=data.get('options', ''))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        is_valid, reason, _ = executor.validate_or_reject(job.build_command())
+        if not is_valid:
+            job.state.update(status="failed", error=f"Commande refusée: {reason}")
+            job.save()
+            return jsonify({"success": False, "error": f"Commande refusée: {reason}"}), 400
+
+        cracking.manager.start(job, executor)
+        return jsonify({"success": True, "job_id": job.id, "status": job.state["status"],
+                        "hashes": job.state["total"], "from_potfile": len(job.state["precracked"])})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/crack/<job_id>/stop', methods=['POST'])
+def stop_crack_job(job_id):
+    """Met le job en pause : l'outil écrit son point de reprise avant de quitter"""
+    job = jobs.get(job_id)
+    if not isinstance(job, cracking.CrackJob):
+        return jsonify({'error': 'Cracking job not found', 'job_id': job_id}), 404
+    try:
+        stopped = job.stop()
+        return jsonify({"success": stopped, "job_id": job_id, "status": job.state["status"]})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/crack/<job_id>/resume', methods=['POST'])
+def resume_crack_job(job_id):
+    """Relance un job en pause, interrompu ou échoué depuis son dernier point de reprise"""
+    job = jobs.get(job_id)
+    if not isinstance(job, cracking.CrackJob):
+        return jsonify({'error': 'Cracking job not found', 'job_id': job_id}), 404
+    try:
+        if job.state["status"] == "finished":
+            return jsonify({"success": False, "error": "Job already finished", "job_id": job_id}), 409
+        resumed = cracking.manager.resume(job, executor)
+        return jsonify({"success": resumed, "job_id": job_id, "status": job.state["status"],
+                        "restarts": job.state.get("restarts", 0), "error": job.state.get("error")})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/dns', methods=['POST'])
+def start_dns_job():
+    """Résolution DNS en masse (noms explicites ou <mot>.<domaine> d'une wordlist) avec détection des wildcards"""
+    try:
+        data = request.get_json()
+        if not data or not (data.get('names') or data.get('domain')):
+            return jsonify({"error": "Missing names or domain"}), 400
+        if data.get('wordlist') and not os.path.isfile(data['wordlist']):
+            return jsonify({"error": f"Wordlist not found: {data['wordlist']}"}), 404
+
+        try:
+            names = dns_resolver.load_names(data.get('names'), data.get('domain'), data.get('wordlist'))
+            job = dns_resolver.DnsJob(
+                names, record_type=data.get('record_type', 'A'), resolvers=data.get('resolvers'),
+                rate=float(data.get('rate', dns_resolver.DEFAULT_RATE)),
+                concurrency=int(data.get('concurrency', dns_resolver.DEFAULT_CONCURRENCY)),
+                timeout=float(data.get('timeout', dns_resolver.DEFAULT_TIMEOUT)),
+                retries=int(data.get('retries', dns_resolver.DEFAULT_RETRIES)),
+                detect_wildcards=bool(data.get('wildcard', True)),
+                include_wildcards=bool(data.get('include_wildcards', False))
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        # Quelques noms : réponse directe plutôt qu'un job à interroger
+        if data.get('wait'):
+            jobs[job.id] = job
+            return jsonify({"success": True, **job.run().status()})
+
+        job.start()
+        return jsonify({"success": True, "job_id": job.id, "names": len(names)})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/probe', methods=['POST'])
+def start_probe_job():
+    """Sondage HTTP en masse : statut, titre, en-têtes serveur, redirections, taille et hash du corps"""
+    try:
+        data = request.get_json()
+        if not data or not (data.get('urls') or data.get('url_file')):
+            return jsonify({"error": "Missing urls or url_file"}), 400
+        if data.get('url_file') and not os.path.isfile(data['url_file']):
+            return jsonify({"error": f"URL file not found: {data['url_file']}"}), 404
+
+        try:
+            targets = http_probe.load_targets(data.get('urls'), data.get('url_file'))
+            job = http_probe.ProbeJob(
+                targets, concurrency=int(data.get('concurrency', http_probe.DEFAULT_CONCURRENCY)),
+                per_host=int(data.get('per_host', http_probe.DEFAULT_PER_HOST)),
+                timeout=float(data.get('timeout', http_probe.DEFAULT_TIMEOUT)),
+                max_redirects=int(data.get('max_redirects', http_probe.MAX_REDIRECTS)),
+                method=data.get('method', 'GET'), headers=data.get('headers')
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        if data.get('wait') and len(targets) <= http_probe.WAIT_MAX_TARGETS:
+            jobs[job.id] = job
+            return jsonify({"success": True, **job.run().status()})
+
+        job.start()
+        response = {"success": True, "job_id": job.id, "urls": len(targets)}
+        if data.get('wait'):
+            response["note"] = (f"More than {http_probe.WAIT_MAX_TARGETS} URLs: started as a job, "
+                                "follow it with its job_id")
+        return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'job_id': job_id}), 404
+    return jsonify(job.status(include_output=request.args.get('details') == '1'))
+
+@app.route('/sessions', methods=['POST'])
+def open_session():
+    """Ouvre une session PTY persistante (ssh, nc, python3...)"""
+    try:
+        data = request.get_json()
+        if not data or 'command' not in data:
+            return jsonify({"error": "Missing command"}), 400
+        try:
+            result = sessions.open(data['command'], prompt=data.get('prompt'),
+                                   timeout=float(data.get('timeout', 30)))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({"success": False, "error": str(e)}), 429
+        ensure_reaper()
+        return jsonify({"success": True, **result})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    return jsonify(sessions.list())
+
+@app.route('/sessions/<session_id>/send', methods=['POST'])
+def send_to_session(session_id):
+    """Envoie une saisie et attend l'invite (ou le motif 'expect')"""
+    try:
+        data = request.get_json()
+        if not data or 'input' not in data:
+            return jsonify({"error": "Missing input"}), 400
+        result = sessions.send(session_id, data['input'], expect=data.get('expect'),
+                               timeout=float(data.get('timeout', 30)),
+                               newline=data.get('newline', True))
+        return jsonify({"success": True, **result})
+
+    except KeyError:
+        return jsonify({'error': 'Session not found', 'session_id': session_id}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    if not sessions.close(session_id):
+        return jsonify({'error': 'Session not found', 'session_id': session_id}), 404
+    return jsonify({"success": True, "session_id": session_id})
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     print(f"Starting LLM Pentest API on port {port}...")
+    resumed = cracking.manager.load_all(executor)
+    if resumed:
+        print(f"Reprise de {len(resumed)} job(s) de cracking : {', '.join(resumed)}")
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+Load-test and benchmark harness for the executor API.
+
+Starts api_server in-process on a local port with a restricted allowlist of
+cheap commands, drives it with concurrent clients and reports throughput,
+latency percentiles, output-buffer growth and thread counts.
+
+Examples:
+    python3 benchmark.py --clients 16 --requests 500
+    python3 benchmark.py --save-baseline bench_baseline.json
+    python3 benchmark.py --baseline bench_baseline.json --tolerance 0.25
+    python3 benchmark.py --transport --payload-mb 8
+    python3 benchmark.py --dns --dns-names 20000 --dns-delay-ms 20
+    python3 benchmark.py --probe --probe-urls 2000 --probe-hosts 8
+"""
+
+import argparse
+import asyncio
+import gzip
+import http.client
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+from aiohttp import web
+from werkzeug.serving import make_server
+
+import api_server
+import dns_resolver
+import http_probe
+import transport
+from secure_command_executor import CommandCategory
+
+TEST_ALLOWLIST = {
+    "echo": CommandCategory.BASIC,
+    "cat": CommandCategory.BASIC,
+    "python3": CommandCategory.BASIC,
+    "sleep": CommandCategory.BASIC,
+}
+
+############### SERVER ###############
+
+class LocalServer:
+    """Runs the Flask app on a werkzeug threaded server in a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.workspace = tempfile.mkdtemp(prefix="bench_ws_")
+        api_server.executor.allowed_commands = dict(TEST_ALLOWLIST)
+        api_server.executor.workspace = self.workspace
+        self.server = make_server(host, port, api_server.app, threaded=True)
+        self.host = host
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, name="bench-server", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        return False
+
+############### CLIENT ###############
+
+def _request(host, port, method, path, payload=None, extra_headers=None):
+    conn = http.client.HTTPConnection(host, port, timeout=300)
+    try:
+        body = json.dumps(payload) if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        headers.update(extra_headers or {})
+        start = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        return time.perf_counter() - start, response.status, data
+    finally:
+        conn.close()
+
+def _metric_value(host, port, name):
+    _, _, data = _request(host, port, "GET", "/metrics")
+    for line in data.decode().splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    return 0.0
+
+############### SCENARIOS ###############
+
+def _scenario_execute_echo(server, i):
+    return [("/execute", _request(server.host, server.port, "POST", "/execute",
+                                  {"command": f"echo bench-{i}"}))]
+
+def _scenario_execute_cat(server, i):
+    return [("/execute", _request(server.host, server.port, "POST", "/execute",
+                                  {"command": f"cat {server.cat_file}"}))]
+
+def _scenario_execute_python(server, i):
+    return [("/execute", _request(server.host, server.port, "POST", "/execute",
+                                  {"command": "python3 -c \"print('x' * 4096)\""}))]
+
+def _scenario_background(server, i):
+    samples = []
+    command = "python3 -c \"import time\nfor n in range(200): print('line', n, flush=True)\ntime.sleep(0.2)\""
+    latency, status, data = _request(server.host, server.port, "POST", "/execute/background",
+                                     {"command": command})
+    samples.append(("/execute/background", (latency, status, data)))
+    try:
+        pid = json.loads(data).get("PID")
+    except ValueError:
+        pid = None
+    if status == 200 and pid and pid > 0:
+        for _ in range(3):
+            samples.append(("/background/<pid>", _request(server.host, server.port, "GET", f"/background/{pid}")))
+    return samples
+
+SCENARIOS = {
+    "execute_echo": _scenario_execute_echo,
+    "execute_cat": _scenario_execute_cat,
+    "execute_python": _scenario_execute_python,
+    "background": _scenario_background,
+}
+
+############### TRANSPORT ###############
+
+def _synthetic_lines(size_bytes, seed=1337):
+    """Lignes façon gobuster/nikto/sqlmap : répétitives mais pas triviales à compresser"""
+    rng = random.Random(seed)
+    words = ["admin", "login", "api", "v1", "backup", "config", "uploads", "static", "images", "wp-content",
+             "phpmyadmin", "server-status", ".git", "old", "test", "dev", "includes", "cgi-bin"]
+    templates = [
+        "/{w}/{w2}{n} (Status: {code}) [Size: {size}]",
+        "+ /{w}/{w2}.php: Retrieved x-powered-by header: PHP/{major}.{minor}.{n}",
+        "[{h:02d}:{m:02d}:{s:02d}] [INFO] testing '{w} AND boolean-based blind - WHERE clause' on parameter '{w2}'",
+    ]
+    lines, total = [], 0
+    while total < size_bytes:
+        line = rng.choice(templates).format(
+            w=rng.choice(words), w2=rng.choice(words), n=rng.randint(0, 9999), code=rng.choice([200, 301, 403]),
+            size=rng.randint(0, 100000), major=rng.randint(5, 8), minor=rng.randint(0, 4),
+            h=rng.randint(0, 23), m=rng.randint(0, 59), s=rng.randint(0, 59))
+        lines.append(line)
+        total += len(line) + 1
+    return lines
+
+def transport_payloads(size_mb):
+    lines = _synthetic_lines(int(size_mb * 1024 * 1024))
+    now = time.time()
+    return {
+        "/execute": {"success": True, "stdout": "\n".join(lines), "stderr": "", "return_code": 0,
+                     "execution_time": 12.5, "command": "gobuster dir -u http://target -w big.txt"},
+        "/background/<pid>": {"success": True, "process": {
+            "status": "running", "return_code": None, "killed_reason": None,
+            "stdout": [{"timestamp": now + i * 0.01, "line": line, "stream": "stdout"} for i, line in enumerate(lines)],
+            "stderr": []}},
+    }
+
+def _transport_codecs():
+    serializers = {"json (stdlib)": (lambda o: json.dumps(o, separators=(",", ":")).encode(), json.loads)}
+    if transport.orjson is not None:
+        serializers["orjson"] = (transport.dumps_json, transport.orjson.loads)
+    if transport.msgpack is not None:
+        serializers["msgpack"] = (transport.dumps_msgpack, transport.msgpack.unpackb)
+    compressions = {"identity": lambda b: b, "gzip": gzip.decompress}
+    if transport.zstandard is not None:
+        compressions["zstd"] = lambda b: transport.zstandard.ZstdDecompressor().decompressobj().decompress(b)
+    return serializers, compressions
+
+def run_transport_benchmark(size_mb, repeat=3):
+    """Octets sur le fil et temps d'encodage/décodage par sérialisation x compression"""
+    serializers, compressions = _transport_codecs()
+    results = []
+    for route, payload in transport_payloads(size_mb).items():
+        for ser_name, (dumps, loads) in serializers.items():
+            for encoding, decompress in compressions.items():
+                encode_times, decode_times = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    body = transport.compress(dumps(payload), encoding)
+                    encode_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    loads(decompress(body))
+                    decode_times.append(time.perf_counter() - start)
+                results.append({
+                    "route": route, "serializer": ser_name, "encoding": encoding, "bytes": len(body),
+                    "encode_ms": statistics.median(encode_times) * 1000,
+                    "decode_ms": statistics.median(decode_times) * 1000,
+                })
+    return results
+
+def run_transport_live(server, size_mb):
+    """Bout en bout : /execute sur un fichier de `size_mb` Mo selon les en-têtes négociés"""
+    path = os.path.join(server.workspace, "transport_payload.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(_synthetic_lines(int(size_mb * 1024 * 1024))))
+    serializers, compressions = _transport_codecs()
+    formats = ["json", "msgpack"] if "msgpack" in serializers else ["json"]
+    variants = [(fmt, encoding) for fmt in formats for encoding in compressions]
+    results = []
+    for fmt, encoding in variants:
+        headers = {"Accept": transport.MSGPACK_MIMETYPE if fmt == "msgpack" else "application/json",
+                   "Accept-Encoding": encoding}
+        latency, status, body = _request(server.host, server.port, "POST", "/execute",
+                                         {"command": f"cat {path}"}, extra_headers=headers)
+        start = time.perf_counter()
+        data = compressions[encoding](body)
+        (serializers["msgpack"][1] if fmt == "msgpack" else json.loads)(data)
+        results.append({"format": fmt, "encoding": encoding, "status": status, "wire_bytes": len(body),
+                        "request_ms": latency * 1000, "client_decode_ms": (time.perf_counter() - start) * 1000})
+    return results
+
+def print_transport_report(results, live):
+    print(f"\n== Transport (encode = serialize + compress, decode = decompress + parse)")
+    for r in results:
+        print(f"   {r['route']:<18} {r['serializer']:<14} {r['encoding']:<9} {r['bytes'] / 1024:>10.0f} KiB"
+              f"   encode {r['encode_ms']:8.1f} ms   decode {r['decode_ms']:8.1f} ms")
+    print(f"\n== Transport end-to-end (/execute over HTTP)")
+    for r in live:
+        print(f"   {r['format']:<8} {r['encoding']:<9} {r['wire_bytes'] / 1024:>10.0f} KiB on wire"
+              f"   request {r['request_ms']:8.1f} ms   client decode {r['client_decode_ms']:6.1f} ms")
+
+############### DNS ###############
+
+class StubDnsServer:
+    """
+    Serveur DNS UDP local : A pour les noms de la zone, NXDOMAIN sinon, wildcard optionnel.
+    `delay` simule la latence d'un résolveur distant (les réponses sont différées, pas sérialisées).
+    """
+
+    def __init__(self, zone, wildcard=None, delay=0.0, host="127.0.0.1"):
+        self.zone = zone
+        self.wildcard = wildcard
+        self.delay = delay
+        self.host = host
+        self.queries = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="bench-dns", daemon=True)
+
+    def __enter__(self):
+        server = self
+
+        class Protocol(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                server.queries += 1
+                reply = server.answer(data)
+                if server.delay:
+                    server.loop.call_later(server.delay, self.transport.sendto, reply, addr)
+                else:
+                    self.transport.sendto(reply, addr)
+
+        self.thread.start()
+        future = asyncio.run_coroutine_threadsafe(
+            self.loop.create_datagram_endpoint(Protocol, local_addr=(self.host, 0)), self.loop)
+        self.transport, _ = future.result()
+        self.port = self.transport.get_extra_info("sockname")[1]
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self.transport.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        return False
+
+    def answer(self, query):
+        qid = struct.unpack("!H", query[:2])[0]
+        name, end = dns_resolver._read_name(query, 12)
+        question = query[12:end + 4]
+        address = self.zone.get(name.lower())
+        if address is None and self.wildcard and name.lower().endswith("." + self.wildcard):
+            address = "10.255.255.254"
+        if address is None:
+            return struct.pack("!HHHHHH", qid, 0x8183, 1, 0, 0, 0) + question
+        record = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 300, 4) + bytes(int(p) for p in address.split("."))
+        return struct.pack("!HHHHHH", qid, 0x8180, 1, 1, 0, 0) + question + record
+
+def dns_workload(count, hit_ratio=0.05, seed=1337):
+    """`count` noms sous bench.test dont ~hit_ratio existent, + une zone wildcard"""
+    rng = random.Random(seed)
+    names = [f"host{i}.bench.test" for i in range(count)]
+    zone = {name: f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            for i, name in enumerate(names) if rng.random() < hit_ratio}
+    names += [f"w{i}.wild.bench.test" for i in range(max(1, count // 100))]
+    return names, zone
+
+def _resolve_bulk(port, names, concurrency, rate=0):
+    results = []
+
+    async def _run():
+        async with dns_resolver.BulkResolver([f"127.0.0.1:{port}"], rate=rate, concurrency=concurrency,
+                                             timeout=2, retries=1) as resolver:
+            await resolver.resolve_many(names, on_result=results.append)
+
+    start = time.perf_counter()
+    asyncio.run(_run())
+    return time.perf_counter() - start, results
+
+def run_dns_benchmark(count, delay_ms, concurrency, subprocess_sample=100):
+    """Noms/s : un processus dig par nom (l'existant), résolution séquentielle, bulk, bulk depuis le cache"""
+    names, zone = dns_workload(count)
+    results = []
+    with StubDnsServer(zone, wildcard="wild.bench.test", delay=delay_ms / 1000) as stub:
+        dig = shutil.which("dig")
+        if dig:
+            sample = names[:subprocess_sample]
+            start = time.perf_counter()
+            for name in sample:
+                subprocess.run([dig, "@127.0.0.1", "-p", str(stub.port), "+short", "+tries=1", name],
+                               capture_output=True)
+            wall = time.perf_counter() - start
+            results.append({"mode": "dig per name", "names": len(sample), "wall_s": wall, "resolved": None})
+
+        sample = names[:subprocess_sample]
+        dns_resolver.cache.clear()
+        wall, _ = _resolve_bulk(stub.port, sample, concurrency=1)
+        results.append({"mode": "sequential", "names": len(sample), "wall_s": wall, "resolved": None})
+
+        dns_resolver.cache.clear()
+        wall, resolved = _resolve_bulk(stub.port, names, concurrency)
+        compact = dns_resolver.compact_results(resolved)
+        results.append({"mode": f"bulk x{concurrency}", "names": len(names), "wall_s": wall,
+                        "resolved": compact["counts"]["resolved"], "wildcard": compact["counts"]["wildcard"],
+                        "expected": len(zone)})
+
+        wall, _ = _resolve_bulk(stub.port, names, concurrency)
+        results.append({"mode": "bulk (cached)", "names": len(names), "wall_s": wall, "resolved": None})
+
+        dns_resolver.cache.clear()
+        with LocalServer() as server:
+            latency, status, body = _request(server.host, server.port, "POST", "/jobs/dns", {
+                "names": names, "resolvers": [f"127.0.0.1:{stub.port}"], "rate": 0,
+                "concurrency": concurrency, "wait": True})
+        counts = json.loads(body).get("result", {}).get("counts", {}) if status == 200 else {}
+        results.append({"mode": "POST /jobs/dns", "names": len(names), "wall_s": latency,
+                        "resolved": counts.get("resolved"), "status": status})
+    for r in results:
+        r["names_per_s"] = r["names"] / r["wall_s"] if r["wall_s"] else 0.0
+    return results
+
+def print_dns_report(results, delay_ms):
+    print(f"\n== DNS (stub resolver, {delay_ms:g} ms simulated latency)")
+    for r in results:
+        found = f"   resolved {r['resolved']}" if r.get("resolved") is not None else ""
+        if "expected" in r:
+            found += f"/{r['expected']} (+{r['wildcard']} wildcard filtered)"
+        print(f"   {r['mode']:<16} {r['names']:>7} names {r['wall_s']:8.2f} s {r['names_per_s']:>10.0f} names/s{found}")
+
+############### HTTP PROBE ###############
+
+class ProbeTestServer:
+    """
+    `hosts` serveurs aiohttp locaux (un port = un hôte) : pages HTML avec titre,
+    redirections /r/<n> -> /page/<n>, 404 ailleurs ; `delay` simule la latence du site.
+    """
+
+    def __init__(self, hosts=4, delay=0.0, host="127.0.0.1"):
+        self.hosts = hosts
+        self.delay = delay
+        self.host = host
+        self.requests = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="bench-http", daemon=True)
+
+    async def _page(self, request):
+        self.requests += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        n = request.match_info["n"]
+        body = f"<html><head><title>Page {n}</title></head><body>{'lorem ipsum ' * 200}</body></html>"
+        return web.Response(text=body, content_type="text/html", headers={"Server": "bench/1.0"})
+
+    async def _redirect(self, request):
+        self.requests += 1
+        raise web.HTTPFound(f"/page/{request.match_info['n']}")
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/page/{n}", self._page)
+        app.router.add_get("/r/{n}", self._redirect)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        ports = []
+        for _ in range(self.hosts):
+            site = web.TCPSite(self.runner, self.host, 0)
+            await site.start()
+            ports.append(site._server.sockets[0].getsockname()[1])
+        return ports
+
+    def __enter__(self):
+        self.thread.start()
+        self.ports = asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        return False
+
+    def urls(self, count):
+        """Pages, redirections et 404 répartis sur les hôtes"""
+        kinds = ["page", "page", "page", "r", "missing"]
+        return [f"http://{self.host}:{self.ports[i % len(self.ports)]}/{kinds[i % len(kinds)]}/{i}"
+                for i in range(count)]
+
+def _probe_bulk(urls, concurrency, per_host):
+    results = []
+
+    async def _run():
+        async with http_probe.HttpProber(concurrency=concurrency, per_host=per_host, timeout=10) as prober:
+            await prober.probe_many(urls, results.append)
+
+    start = time.perf_counter()
+    asyncio.run(_run())
+    return time.perf_counter() - start, results
+
+def run_probe_benchmark(count, hosts, delay_ms, concurrency, per_host, subprocess_sample=100):
+    """URLs/s : un curl par URL (l'existant), sondage séquentiel, sondage concurrent, via l'API"""
+    results = []
+    with ProbeTestServer(hosts=hosts, delay=delay_ms / 1000) as site:
+        urls = site.urls(count)
+        sample = urls[:subprocess_sample]
+        curl = shutil.which("curl")
+        if curl:
+            start = time.perf_counter()
+            for url in sample:
+                subprocess.run([curl, "-s", "-k", "-L", "-o", "/dev/null", "-w", "%{http_code}", url],
+                               capture_output=True)
+            results.append({"mode": "curl per URL", "urls": len(sample), "wall_s": time.perf_counter() - start})
+
+        wall, _ = _probe_bulk(sample, concurrency=1, per_host=1)
+        results.append({"mode": "sequential", "urls": len(sample), "wall_s": wall})
+
+        wall, probed = _probe_bulk(urls, concurrency, per_host)
+        summary = http_probe.summarize(probed)
+        results.append({"mode": f"bulk x{concurrency} ({per_host}/host)", "urls": len(urls), "wall_s": wall,
+                        "alive": summary["alive"], "errors": summary["errors"], "status": summary["status"]})
+
+        with LocalServer() as server:
+            latency, status, body = _request(server.host, server.port, "POST", "/jobs/probe", {
+                "urls": urls, "concurrency": concurrency, "per_host": per_host, "wait": True})
+        summary = json.loads(body).get("summary", {}) if status == 200 else {}
+        results.append({"mode": "POST /jobs/probe", "urls": len(urls), "wall_s": latency,
+                        "alive": summary.get("alive"), "errors": summary.get("errors"), "http_status": status})
+    for r in results:
+        r["urls_per_s"] = r["urls"] / r["wall_s"] if r["wall_s"] else 0.0
+    return results
+
+def print_probe_report(results, hosts, delay_ms):
+    print(f"\n== HTTP probe ({hosts} local hosts, {delay_ms:g} ms simulated latency)")
+    for r in results:
+        alive = f"   alive {r['alive']} errors {r['errors']}" if r.get("alive") is not None else ""
+        print(f"   {r['mode']:<24} {r['urls']:>6} URLs {r['wall_s']:8.2f} s {r['urls_per_s']:>9.0f} URLs/s{alive}")
+
+############### RUNNER ###############
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def run_scenario(server, name, clients, total_requests):
+    scenario = SCENARIOS[name]
+    proc = psutil.Process()
+    rss_before = proc.memory_info().rss
+    buffered_before = _metric_value(server.host, server.port, "api_background_output_bytes")
+    threads_before = threading.active_count()
+    peak_threads = [threads_before]
+    stop = threading.Event()
+
+    def _sample_threads():
+        while not stop.is_set():
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=_sample_threads, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(lambda i: scenario(server, i), range(total_requests)))
+    wall = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+
+    routes = {}
+    errors = 0
+    for samples in results:
+        for route, (latency, status, _) in samples:
+            routes.setdefault(route, []).append(latency)
+            if status >= 400:
+                errors += 1
+
+    all_latencies = [lat for values in routes.values() for lat in values]
+    return {
+        "scenario": name,
+        "clients": clients,
+        "requests": len(all_latencies),
+        "errors": errors,
+        "wall_time_s": wall,
+        "throughput_rps": len(all_latencies) / wall if wall else 0.0,
+        "latency_ms": {
+            "p50": _percentile(all_latencies, 50) * 1000,
+            "p95": _percentile(all_latencies, 95) * 1000,
+            "p99": _percentile(all_latencies, 99) * 1000,
+            "mean": statistics.fmean(all_latencies) * 1000 if all_latencies else 0.0,
+        },
+        "routes": {
+            route: {"count": len(values), "p50_ms": _percentile(values, 50) * 1000,
+                    "p95_ms": _percentile(values, 95) * 1000}
+            for route, values in routes.items()
+        },
+        "rss_growth_bytes": proc.memory_info().rss - rss_before,
+        "buffered_output_growth_bytes": _metric_value(server.host, server.port, "api_background_output_bytes") - buffered_before,
+        "threads_before": threads_before,
+        "threads_peak": peak_threads[0],
+        "threads_after": threading.active_count(),
+    }
+
+def print_report(report):
+    lat = report["latency_ms"]
+    print(f"\n== {report['scenario']} ({report['clients']} clients, {report['requests']} requests, {report['errors']} errors)")
+    print(f"   throughput : {report['throughput_rps']:.1f} req/s over {report['wall_time_s']:.2f}s")
+    print(f"   latency    : p50 {lat['p50']:.1f} ms | p95 {lat['p95']:.1f} ms | p99 {lat['p99']:.1f} ms")
+    for route, stats in report["routes"].items():
+        print(f"     {route:<22} n={stats['count']:<6} p50 {stats['p50_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms")
+    print(f"   memory     : RSS +{report['rss_growth_bytes'] / 1024:.0f} KiB | output buffers +{report['buffered_output_growth_bytes'] / 1024:.0f} KiB")
+    print(f"   threads    : {report['threads_before']} -> peak {report['threads_peak']} -> {report['threads_after']}")
+
+############### BASELINE ###############
+
+def compare_to_baseline(reports, baseline, tolerance):
+    """Returns the list of regressions compared to a stored baseline"""
+    regressions = []
+    for report in reports:
+        reference = baseline.get(report["scenario"])
+        if not reference:
+            continue
+        if report["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{report['scenario']}: throughput {report['throughput_rps']:.1f} req/s "
+                               f"< baseline {reference['throughput_rps']:.1f} req/s")
+        for pct in ("p95", "p99"):
+            current, previous = report["latency_ms"][pct], reference["latency_ms"][pct]
+            if current > previous * (1 + tolerance):
+                regressions.append(f"{report['scenario']}: {pct} {current:.1f} ms > baseline {previous:.1f} ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the executor API under concurrent load")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--json", help="Write the full report to this file")
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline")
+    parser.add_argument("--baseline", help="Compare the results against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--transport", action="store_true",
+                        help="Benchmark serialization/compression of large outputs instead of the load scenarios")
+    parser.add_argument("--payload-mb", type=float, default=4, help="Output size for --transport (default 4 MB)")
+    parser.add_argument("--dns", action="store_true",
+                        help="Benchmark bulk DNS resolution against a local stub server instead of the load scenarios")
+    parser.add_argument("--dns-names", type=int, default=10000, help="Names resolved by --dns (default 10000)")
+    parser.add_argument("--dns-delay-ms", type=float, default=20, help="Simulated resolver latency for --dns")
+    parser.add_argument("--dns-concurrency", type=int, default=dns_resolver.DEFAULT_CONCURRENCY,
+                        help="In-flight queries for --dns")
+    parser.add_argument("--probe", action="store_true",
+                        help="Benchmark bulk HTTP probing against local test servers instead of the load scenarios")
+    parser.add_argument("--probe-urls", type=int, default=2000, help="URLs probed by --probe (default 2000)")
+    parser.add_argument("--probe-hosts", type=int, default=8, help="Local test hosts for --probe (default 8)")
+    parser.add_argument("--probe-delay-ms", type=float, default=20, help="Simulated page latency for --probe")
+    parser.add_argument("--probe-concurrency", type=int, default=http_probe.DEFAULT_CONCURRENCY,
+                        help="In-flight requests for --probe")
+    parser.add_argument("--probe-per-host", type=int, default=http_probe.DEFAULT_PER_HOST,
+                        help="In-flight requests per host for --probe")
+    args = parser.parse_args(argv)
+
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    api_server.executor.logger.setLevel(logging_level)
+    logging.getLogger("werkzeug").setLevel(logging_level)
+
+    if args.transport:
+        results = run_transport_benchmark(args.payload_mb)
+        with LocalServer() as server:
+            live = run_transport_live(server, args.payload_mb)
+        print_transport_report(results, live)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"codecs": results, "end_to_end": live}, f, indent=2)
+        return 0
+
+    if args.dns:
+        results = run_dns_benchmark(args.dns_names, args.dns_delay_ms, args.dns_concurrency)
+        print_dns_report(results, args.dns_delay_ms)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    if args.probe:
+        results = run_probe_benchmark(args.probe_urls, args.probe_hosts, args.probe_delay_ms,
+                                      args.probe_concurrency, args.probe_per_host)
+        print_probe_report(results, args.probe_hosts, args.probe_delay_ms)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    reports = []
+    with LocalServer() as server:
+        server.cat_file = os.path.join(server.workspace, "payload.txt")
+        with open(server.cat_file, "w") as f:
+            f.write("benchmark payload line\n" * 2000)
+        for name in args.scenario or list(SCENARIOS):
+            report = run_scenario(server, name, args.clients, args.requests)
+            print_report(report)
+            reports.append(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({r["scenario"]: r for r in reports}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(reports, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Performance regressions:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"\n✅ No regression beyond {args.tolerance:.0%} of baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
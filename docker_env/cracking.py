@@ -0,0 +1,396 @@
+import collections
+import json
+import os
+import re
+import shlex
+import signal
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+from metrics import registry
+from sharded_jobs import jobs
+
+############### CRACKING JOBS ###############
+#
+# john / hashcat lancés en arrière-plan avec leurs sessions natives
+# (--session / --restore) : un job interrompu par un redémarrage du conteneur
+# reprend là où le dernier point de reprise l'a laissé. La sortie de statut
+# des outils est analysée (taux, ETA, mots de passe trouvés) et l'état de
+# chaque job est écrit dans CRACK_DIR/jobs/<nœud>/<id>/state.json.
+#
+# Un potfile partagé entre tous les jobs (et tous les engagements) évite de
+# relancer un outil sur des hashes déjà cassés. CRACK_DIR est un volume
+# monté sur tous les exécuteurs : le potfile y est commun, alors que chaque
+# nœud ne recharge et ne reprend que ses propres jobs.
+
+CRACK_DIR = os.getenv("CRACK_DIR", "/home/pentest/results/cracking")
+POTFILE = os.getenv("CRACK_POTFILE", os.path.join(CRACK_DIR, "shared.pot"))
+# Nom stable du nœud (hostname fixé dans docker-compose), pour survivre à la recréation du conteneur
+NODE_NAME = os.getenv("CRACK_NODE", socket.gethostname())
+JOBS_DIR = os.path.join(CRACK_DIR, "jobs", NODE_NAME)
+AUTO_RESUME = os.getenv("CRACK_AUTO_RESUME", "1") == "1"
+STATUS_INTERVAL = int(os.getenv("CRACK_STATUS_INTERVAL", "10"))
+SAVE_INTERVAL = 15.0   # Écriture de state.json au plus toutes les N secondes pendant l'exécution
+STOP_GRACE = 10.0      # Délai laissé à l'outil pour écrire son point de reprise après SIGINT
+
+SUPPORTED_TOOLS = ("john", "hashcat")
+# Options gérées par le job lui-même : interdites dans 'options'
+RESERVED_OPTIONS = re.compile(r"^(--session|--restore|--pot|--potfile|--wordlist|--status|--progress-every|--show)")
+
+registry.gauge("crack_jobs_running", "Cracking jobs currently running",
+               callback=lambda: sum(1 for j in list(jobs.values())
+                                    if isinstance(j, CrackJob) and j.state["status"] == "running"))
+CRACK_RESTORES = registry.counter("crack_jobs_restored_total", "Cracking jobs restarted from a checkpoint")
+
+############### POTFILE ###############
+
+JOHN_TAG = re.compile(r"^\$(?:dynamic_\d+|NT|LM)\$", re.IGNORECASE)
+HEX_PLAIN = re.compile(r"^\$HEX\[([0-9a-fA-F]*)\]$")
+
+def _decode_plain(plain):
+    match = HEX_PLAIN.match(plain)
+    return bytes.fromhex(match.group(1)).decode("utf-8", "replace") if match else plain
+
+class Potfile:
+    """
+    Lecture du potfile partagé (format john et hashcat : hash:clair). Le hash
+    pouvant contenir des ':' (sels), chaque préfixe de ligne est indexé.
+    """
+
+    def __init__(self, path=POTFILE):
+        self.path = path
+        self._index = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return {}
+        stamp = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                index = {}
+                with open(self.path, encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        line = line.rstrip("\n")
+                        for i, char in enumerate(line):
+                            if char == ":":
+                                key = JOHN_TAG.sub("", line[:i])
+                                index.setdefault(key.lower(), _decode_plain(line[i + 1:]))
+                self._index, self._stamp = index, stamp
+            return self._index
+
+    def lookup(self, hash_line):
+        """Clair d'un hash (ou d'une ligne user:hash:...) déjà cassé, sinon None"""
+        index = self._load()
+        hash_line = hash_line.strip()
+        candidates = [hash_line] + [field for field in hash_line.split(":") if len(field) >= 16]
+        for candidate in candidates:
+            plain = index.get(JOHN_TAG.sub("", candidate).lower())
+            if plain is not None:
+                return plain
+        return None
+
+potfile = Potfile()
+
+############### STATUS PARSING ###############
+
+# john : "0g 0:00:00:03 9.67% (ETA: 10:22:03) 0g/s 476813p/s 476813c/s 476813C/s 123456..tigger"
+JOHN_STATUS = re.compile(
+    r"^(?P<cracked>\d+)g (?P<elapsed>\d+:\d\d:\d\d:\d\d)"
+    r"(?: (?P<percent>[\d.]+)%(?: \((?:ETA: )?(?P<eta>[^)]*)\))?| (?P<done>DONE)(?: \([^)]*\))?)?"
+    r" [\d.]+g/s (?:[\d.]+[KMG]?p/s )?(?:[\d.]+[KMG]?c/s )?"
+    r"(?P<rate>[\d.]+[KMG]?)C/s"
+)
+# hashcat (sans --status-json) : "Speed.#1.........:  1234.5 kH/s", "Recovered........: 1/3 (33.33%) Digests"...
+HASHCAT_FIELDS = {
+    "speed": re.compile(r"^Speed\.#\*?\d*\.+:\s*(?P<value>[\d.]+)\s*(?P<unit>[kMGT]?)H/s"),
+    "recovered": re.compile(r"^Recovered\.+:\s*(?P<done>\d+)/(?P<total>\d+)"),
+    "progress": re.compile(r"^Progress\.+:\s*(?P<done>\d+)/(?P<total>\d+)\s*\((?P<percent>[\d.]+)%\)"),
+    "eta": re.compile(r"^Time\.Estimated\.+:\s*(?P<value>.+)$"),
+}
+UNITS = {"": 1, "K": 1e3, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12}
+
+def _rate(value):
+    unit = value[-1] if value[-1] in UNITS else ""
+    return float(value[:-1] if unit else value) * UNITS[unit]
+
+def _seconds(clock):
+    days, hours, minutes, seconds = (int(x) for x in clock.split(":"))
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+def parse_status_line(tool, line):
+    """Champs de progression extraits d'une ligne de sortie (dict vide si rien à prendre)"""
+    line = line.strip()
+    if tool == "john":
+        match = JOHN_STATUS.match(line)
+        if not match:
+            return {}
+        update = {"cracked": int(match["cracked"]), "elapsed": _seconds(match["elapsed"]),
+                  "rate": _rate(match["rate"])}
+        if match["percent"] or match["done"]:
+            update["percent"] = 100.0 if match["done"] else float(match["percent"])
+        if match["eta"]:
+            update["eta"] = match["eta"]
+        return update
+
+    if line.startswith("{"):
+        try:
+            status = json.loads(line)
+        except ValueError:
+            return {}
+        update = {}
+        done, total = (status.get("progress") or [0, 0])[:2]
+        if total:
+            update["percent"] = round(100.0 * done / total, 2)
+        if status.get("recovered_hashes"):
+            update["cracked"] = status["recovered_hashes"][0]
+        update["rate"] = float(sum(d.get("speed", 0) for d in status.get("devices", [])))
+        if status.get("time_start"):
+            update["elapsed"] = int(time.time() - status["time_start"])
+        if status.get("estimated_stop"):
+            update["eta"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(status["estimated_stop"]))
+        return update
+    for field, pattern in HASHCAT_FIELDS.items():
+        match = pattern.match(line)
+        if not match:
+            continue
+        if field == "speed":
+            return {"rate": float(match["value"]) * UNITS[match["unit"]]}
+        if field == "recovered":
+            return {"cracked": int(match["done"])}
+        if field == "progress":
+            return {"percent": float(match["percent"])}
+        return {"eta": match["value"].strip()}
+    return {}
+
+############### JOBS ###############
+
+class CrackJob:
+    def __init__(self, state, directory):
+        self.id = state["id"]
+        self.state = state
+        self.directory = directory
+        self.process = None
+        self.tail = collections.deque(maxlen=200)
+        self._stopping = False
+        self._saved = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def session_path(self):
+        return os.path.join(self.directory, "session")
+
+    @property
+    def hashes_path(self):
+        return os.path.join(self.directory, "hashes.txt")
+
+    def save(self, force=True):
+        now = time.time()
+        if not force and now - self._saved < SAVE_INTERVAL:
+            return
+        with self._lock:
+            tmp = os.path.join(self.directory, "state.json.tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(tmp, os.path.join(self.directory, "state.json"))
+            self._saved = now
+
+    def build_command(self):
+        state = self.state
+        options = shlex.split(state.get("options") or "")
+        if state["tool"] == "john":
+            args = ["john", f"--session={self.session_path}", f"--pot={POTFILE}",
+                    f"--wordlist={state['wordlist']}", f"--progress-every={STATUS_INTERVAL}"]
+            if state.get("format"):
+                args.append(f"--format={state['format']}")
+            args += options + [self.hashes_path]
+        else:
+            args = ["hashcat", "-a", "0", f"--session={self.id}", f"--restore-file-path={self.session_path}.restore",
+                    f"--potfile-path={POTFILE}", "--status", "--status-json", f"--status-timer={STATUS_INTERVAL}"]
+            if state.get("format"):
+                args += ["-m", str(state["format"])]
+            args += options + [self.hashes_path, state["wordlist"]]
+        return " ".join(shlex.quote(a) for a in args)
+
+    def restore_command(self):
+        """Commande de reprise si l'outil a déjà écrit un point de reprise, sinon None"""
+        if self.state["tool"] == "john" and os.path.exists(self.session_path + ".rec"):
+            return f"john --restore={shlex.quote(self.session_path)}"
+        if self.state["tool"] == "hashcat" and os.path.exists(self.session_path + ".restore"):
+            return (f"hashcat --session={self.id} --restore-file-path={shlex.quote(self.session_path)}.restore "
+                    "--restore")
+        return None
+
+    def launch(self, executor, restore=False):
+        command = self.restore_command() if restore else None
+        if command:
+            self.state["restarts"] = self.state.get("restarts", 0) + 1
+            CRACK_RESTORES.inc()
+        command = command or self.build_command()
+        result, pid, process = executor.execute_background_command(command)
+        if process is None:
+            self.state.update(status="failed", error=(result.stderr or result.stdout or "").strip()[-2000:],
+                              return_code=result.return_code, ended=time.time())
+            self.save()
+            return False
+        self.process = process
+        self._stopping = False
+        self.state.update(status="running", command=command, started=time.time(), ended=None, error=None)
+        self.save()
+        for stream in (process.stdout, process.stderr):
+            threading.Thread(target=self._read, args=(stream,), name=f"crack-{self.id}", daemon=True).start()
+        threading.Thread(target=self._watch, name=f"crack-{self.id}-watch", daemon=True).start()
+        return True
+
+    def _read(self, stream):
+        for line in iter(stream.readline, ""):
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            self.tail.append(line)
+            update = parse_status_line(self.state["tool"], line)
+            if update:
+                self.state["progress"].update(update, updated=time.time())
+                self.save(force=False)
+        stream.close()
+
+    def _watch(self):
+        return_code = self.process.wait()
+        # john : 0 ; hashcat : 0 (tout cassé), 1 (wordlist épuisée)
+        ok = return_code == 0 or (self.state["tool"] == "hashcat" and return_code == 1)
+        if self._stopping:
+            status = "paused"
+        else:
+            status = "finished" if ok else "failed"
+        self.state.update(status=status, return_code=return_code, ended=time.time())
+        if status == "failed":
+            self.state["error"] = "\n".join(list(self.tail)[-20:])
+        self.state["progress"]["cracked"] = len(self.cracked())
+        self.save()
+
+    def stop(self):
+        """SIGINT : l'outil écrit son point de reprise avant de quitter ; le job passe en 'paused'"""
+        process = self.process
+        if process is None or process.poll() is not None:
+            return False
+        self._stopping = True
+        try:
+            os.killpg(process.pid, signal.SIGINT)
+            process.wait(timeout=STOP_GRACE)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return True
+
+    def cracked(self):
+        found = []
+        if not os.path.exists(self.hashes_path):
+            return found
+        with open(self.hashes_path) as f:
+            for line in f:
+                plain = potfile.lookup(line)
+                if plain is not None:
+                    found.append({"hash": line.strip(), "plain": plain})
+        return found + self.state.get("precracked", [])
+
+    def status(self, include_output=False):
+        cracked = self.cracked()
+        progress = dict(self.state["progress"], cracked=len(cracked), total=self.state["total"])
+        if self.state["status"] == "running" and self.state.get("started"):
+            progress.setdefault("elapsed", int(time.time() - self.state["started"]))
+        info = {
+            "job_id": self.id,
+            "kind": "crack",
+            "tool": self.state["tool"],
+            "status": self.state["status"],
+            "progress": progress,
+            "cracked": cracked,
+            "from_potfile": len(self.state.get("precracked", [])),
+            "restarts": self.state.get("restarts", 0),
+            "resumable": self.restore_command() is not None,
+        }
+        if self.state.get("error"):
+            info["error"] = self.state["error"]
+        if include_output:
+            info["command"] = self.state.get("command")
+            info["output"] = list(self.tail)
+        return info
+
+class CrackManager:
+    def __init__(self, root=JOBS_DIR):
+        self.root = root
+
+    def create(self, tool, hashes, wordlist, hash_format=None, options=""):
+        if tool not in SUPPORTED_TOOLS:
+            raise ValueError(f"Unsupported tool: {tool}")
+        for arg in shlex.split(options or ""):
+            if RESERVED_OPTIONS.match(arg):
+                raise ValueError(f"Option {arg} is managed by the cracking job, remove it from 'options'")
+        hashes = [h.strip() for h in hashes if h.strip()]
+        if not hashes:
+            raise ValueError("No hashes to crack")
+
+        # Hashes déjà présents dans le potfile partagé : inutile de les confier à l'outil
+        precracked, remaining = [], []
+        for line in dict.fromkeys(hashes):
+            plain = potfile.lookup(line)
+            if plain is None:
+                remaining.append(line)
+            else:
+                precracked.append({"hash": line, "plain": plain})
+
+        job_id = uuid.uuid4().hex[:12]
+        directory = os.path.join(self.root, job_id)
+        os.makedirs(directory, exist_ok=True)
+        state = {
+            "id": job_id, "tool": tool, "wordlist": wordlist, "format": hash_format, "options": options or "",
+            "status": "pending", "created": time.time(), "total": len(precracked) + len(remaining),
+            "precracked": precracked, "progress": {}, "restarts": 0,
+        }
+        job = CrackJob(state, directory)
+        with open(job.hashes_path, "w") as f:
+            f.write("".join(line + "\n" for line in remaining))
+        if not remaining:
+            state.update(status="finished", ended=time.time())
+        job.save()
+        jobs[job_id] = job
+        return job
+
+    def start(self, job, executor):
+        if job.state["status"] == "pending":
+            job.launch(executor)
+        return job
+
+    def resume(self, job, executor):
+        if job.state["status"] == "running" and job.process is not None and job.process.poll() is None:
+            return False
+        return job.launch(executor, restore=True)
+
+    def load_all(self, executor=None):
+        """Recharge les jobs du disque ; ceux qui tournaient au moment de l'arrêt sont repris"""
+        if not os.path.isdir(self.root):
+            return []
+        resumed = []
+        for job_id in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, job_id, "state.json")
+            if job_id in jobs or not os.path.isfile(path):
+                continue
+            with open(path) as f:
+                state = json.load(f)
+            job = CrackJob(state, os.path.dirname(path))
+            jobs[job_id] = job
+            if state["status"] in ("running", "pending"):
+                state["status"] = "interrupted"
+                job.save()
+                if executor is not None and AUTO_RESUME and job.launch(executor, restore=True):
+                    resumed.append(job_id)
+        return resumed
+
+manager = CrackManager()
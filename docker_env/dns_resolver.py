@@ -0,0 +1,591 @@
+import asyncio
+import os
+import random
+import socket
+import string
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from metrics import registry
+from sharded_jobs import jobs
+
+############### BULK DNS ###############
+#
+# Résolution de milliers de noms sans un processus dig/host par requête :
+# requêtes UDP construites à la main, envoyées depuis une seule boucle asyncio
+# (une socket connectée par résolveur, identifiants de 16 bits par socket).
+#
+#  - liste de résolveurs configurable, répartition round-robin, nouvel essai
+#    sur le résolveur suivant en cas de timeout / SERVFAIL / REFUSED
+#  - débit global limité (requêtes/s) et nombre de requêtes en vol borné
+#  - cache partagé entre les jobs, respectant les TTL (NXDOMAIN compris) et
+#    cloisonné par jeu de résolveurs (DNS split-horizon : interne / public)
+#  - détection des zones wildcard : quelques labels aléatoires sont résolus
+#    sous chaque domaine parent, les réponses identiques sont écartées
+
+RESOLVERS = os.getenv("DNS_RESOLVERS", "")                  # "1.1.1.1,8.8.8.8:53" ; vide = /etc/resolv.conf
+DEFAULT_RATE = float(os.getenv("DNS_RATE", "1000"))         # Requêtes/s, tous résolveurs confondus (0 = illimité)
+DEFAULT_CONCURRENCY = int(os.getenv("DNS_CONCURRENCY", "500"))
+DEFAULT_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "2"))
+DEFAULT_RETRIES = int(os.getenv("DNS_RETRIES", "2"))
+CACHE_SIZE = int(os.getenv("DNS_CACHE_SIZE", "200000"))
+NEGATIVE_TTL = int(os.getenv("DNS_NEGATIVE_TTL", "300"))    # Si la réponse négative n'a pas de SOA
+MAX_TTL = 86400
+WILDCARD_PROBES = 3
+MAX_LISTED_FAILURES = 200
+FALLBACK_RESOLVERS = ("1.1.1.1", "8.8.8.8")
+
+QTYPES = {"A": 1, "NS": 2, "CNAME": 5, "SOA": 6, "PTR": 12, "MX": 15, "TXT": 16, "AAAA": 28, "SRV": 33}
+QTYPE_NAMES = {v: k for k, v in QTYPES.items()}
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+# Réponses qui ne disent rien du nom : on retente sur un autre résolveur
+RETRY_RCODES = ("SERVFAIL", "REFUSED", "NOTIMP", "FORMERR")
+
+DNS_QUERIES = registry.counter(
+    "dns_queries_total",
+    "DNS queries sent by the bulk resolver, by outcome",
+    ("outcome",),
+)
+DNS_CACHE = registry.counter(
+    "dns_cache_lookups_total",
+    "Bulk resolver cache lookups",
+    ("result",),
+)
+
+############### RESOLVERS ###############
+
+def system_resolvers(path="/etc/resolv.conf"):
+    servers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append(parts[1].split("%")[0])
+    except OSError:
+        pass
+    return servers
+
+def parse_resolver(spec):
+    """'1.1.1.1', '127.0.0.1:5353', '::1' ou '[::1]:5353' -> (hôte, port)"""
+    spec = spec.strip()
+    host, port = spec, 53
+    if spec.startswith("["):
+        host, _, rest = spec[1:].partition("]")
+        if rest.startswith(":"):
+            port = int(rest[1:])
+    elif spec.count(":") == 1:
+        host, port = spec.split(":")
+        port = int(port)
+    try:
+        socket.inet_pton(socket.AF_INET6 if ":" in host else socket.AF_INET, host)
+    except OSError:
+        raise ValueError(f"Résolveur invalide (adresse IP attendue) : {spec}")
+    if not 0 < port < 65536:
+        raise ValueError(f"Port de résolveur invalide : {spec}")
+    return host, port
+
+def resolver_list(specs=None):
+    if isinstance(specs, str):
+        specs = specs.replace(",", " ").split()
+    specs = specs or RESOLVERS.replace(",", " ").split() or system_resolvers() or list(FALLBACK_RESOLVERS)
+    return [parse_resolver(s) for s in specs]
+
+############### WIRE FORMAT ###############
+
+def normalize_name(name):
+    """Forme comparable aux questions renvoyées : minuscules, sans point final, IDN en punycode"""
+    name = name.strip().rstrip(".").lower()
+    if not name.isascii():
+        try:
+            name = name.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass
+    return name
+
+def encode_name(name):
+    name = normalize_name(name)
+    if not name or len(name) > 253 or not name.isascii():
+        raise ValueError(f"Nom invalide : {name!r}")
+    out = bytearray()
+    for label in name.split("."):
+        raw = label.encode()
+        if not 0 < len(raw) < 64:
+            raise ValueError(f"Nom invalide : {name!r}")
+        out.append(len(raw))
+        out += raw
+    return bytes(out) + b"\x00"
+
+def build_query(qid, name, qtype):
+    """En-tête (RD=1, une question) + question IN"""
+    return struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0) + encode_name(name) + struct.pack("!HH", qtype, 1)
+
+def _read_name(data, offset):
+    labels, jumped, end, hops = [], False, offset, 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if hops > 32:
+                raise ValueError("Boucle de compression")
+            pointer = ((length & 0x3F) << 8) | data[offset + 1]
+            if not jumped:
+                end = offset + 2
+            offset, jumped, hops = pointer, True, hops + 1
+        elif length == 0:
+            if not jumped:
+                end = offset + 1
+            return ".".join(labels), end
+        else:
+            labels.append(data[offset + 1:offset + 1 + length].decode("ascii", "replace"))
+            offset += 1 + length
+
+def _rdata(data, offset, rtype, rdlength):
+    rdata = data[offset:offset + rdlength]
+    if rtype == 1 and rdlength == 4:
+        return socket.inet_ntop(socket.AF_INET, rdata)
+    if rtype == 28 and rdlength == 16:
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if rtype in (2, 5, 12):
+        return _read_name(data, offset)[0].lower()
+    if rtype == 15:
+        return f"{struct.unpack('!H', rdata[:2])[0]} {_read_name(data, offset + 2)[0].lower()}"
+    if rtype == 33:
+        priority, weight, port = struct.unpack("!HHH", rdata[:6])
+        return f"{priority} {weight} {port} {_read_name(data, offset + 6)[0].lower()}"
+    if rtype == 16:
+        parts, i = [], 0
+        while i < len(rdata):
+            parts.append(rdata[i + 1:i + 1 + rdata[i]].decode("utf-8", "replace"))
+            i += 1 + rdata[i]
+        return "".join(parts)
+    return rdata.hex()
+
+def parse_response(data):
+    """Réponse brute -> id, rcode, question et enregistrements de la section answer"""
+    qid, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", data[:12])
+    offset, question = 12, None
+    for _ in range(qdcount):
+        qname, offset = _read_name(data, offset)
+        question = (qname.lower(), struct.unpack("!H", data[offset:offset + 2])[0])
+        offset += 4
+    answers, negative_ttl = [], None
+    truncated = bool(flags & 0x0200)
+    try:
+        for index in range(ancount + nscount):
+            rname, offset = _read_name(data, offset)
+            rtype, _, ttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+            offset += 10
+            if offset + rdlength > len(data):
+                raise ValueError("Enregistrement incomplet")
+            if index < ancount:
+                answers.append((rname.lower(), rtype, ttl, _rdata(data, offset, rtype, rdlength)))
+            elif rtype == 6:
+                # RFC 2308 : TTL négatif = min(TTL du SOA, champ minimum)
+                _, pos = _read_name(data, offset)
+                _, pos = _read_name(data, pos)
+                minimum = struct.unpack("!I", data[pos + 16:pos + 20])[0]
+                negative_ttl = min(ttl, minimum)
+            offset += rdlength
+    except (IndexError, ValueError, struct.error):
+        # Réponse tronquée (TC) : on garde les enregistrements complets, la requête repassera en TCP
+        if not truncated:
+            raise
+    return {
+        "id": qid,
+        "rcode": RCODES.get(flags & 0x000F, str(flags & 0x000F)),
+        "truncated": truncated,
+        "question": question,
+        "answers": answers,
+        "negative_ttl": negative_ttl,
+    }
+
+def final_values(name, answers, qtype):
+    """Valeurs du type demandé au bout de la chaîne de CNAME, et la chaîne elle-même"""
+    chain, current = [], normalize_name(name)
+    for _ in range(16):
+        target = next((v for n, t, _, v in answers if n == current and t == 5), None)
+        if target is None or qtype == 5:
+            break
+        chain.append(target)
+        current = target
+    values = [v for n, t, _, v in answers if t == qtype and (n == current or qtype == 5)]
+    if not values and chain:
+        # Certains résolveurs n'indiquent pas le nom de chaque maillon : on prend tout ce qui est du bon type
+        values = [v for _, t, _, v in answers if t == qtype]
+    return sorted(set(values)), chain
+
+############### CACHE ###############
+
+class ResponseCache:
+    """Cache LRU (nom, type) -> réponse, expirant au TTL ; partagé par les jobs de tous les threads"""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                DNS_CACHE.inc(result="miss")
+                return None
+            expires, record = entry
+            if expires < time.time():
+                del self._entries[key]
+                DNS_CACHE.inc(result="expired")
+                return None
+            self._entries.move_to_end(key)
+        DNS_CACHE.inc(result="hit")
+        return record
+
+    def put(self, key, record, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + min(ttl, MAX_TTL), record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+cache = ResponseCache()
+
+############### RESOLVER ###############
+
+class RateLimiter:
+    """Espace les envois de 1/rate seconde ; rate <= 0 désactive la limite"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class _ResolverProtocol(asyncio.DatagramProtocol):
+    def __init__(self, resolver, index):
+        self.resolver = resolver
+        self.index = index
+
+    def datagram_received(self, data, addr):
+        self.resolver._on_datagram(self.index, data)
+
+    def error_received(self, exc):
+        pass
+
+class BulkResolver:
+    """Résolveur asynchrone ; à utiliser dans `async with` depuis une boucle asyncio"""
+
+    def __init__(self, resolvers=None, rate=DEFAULT_RATE, concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, cache=cache):
+        self.resolvers = resolver_list(resolvers)
+        self.concurrency = max(1, min(int(concurrency), 20000))
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.limiter = RateLimiter(rate)
+        self.cache = cache
+        # Deux jeux de résolveurs peuvent donner des réponses différentes pour un même nom
+        self._cache_scope = tuple(sorted(self.resolvers))
+        self.stats = {"sent": 0, "cached": 0, "timeouts": 0, "retries": 0, "truncated": 0, "tcp": 0}
+        self._transports = []
+        self._pending = []
+        self._next_resolver = 0
+        self._wildcards = {}
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        for index, address in enumerate(self.resolvers):
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda index=index: _ResolverProtocol(self, index), remote_addr=address)
+            self._transports.append(transport)
+            self._pending.append({})
+        return self
+
+    async def __aexit__(self, *exc):
+        for transport in self._transports:
+            transport.close()
+        return False
+
+    def _on_datagram(self, index, data):
+        try:
+            response = parse_response(data)
+        except (IndexError, ValueError, struct.error):
+            return
+        pending = self._pending[index].get(response["id"])
+        # L'id seul ne suffit pas : la question doit correspondre à celle envoyée
+        if pending is None or pending[1] != response["question"] or pending[0].done():
+            return
+        pending[0].set_result(response)
+
+    async def _send(self, index, name, qtype):
+        pending = self._pending[index]
+        qid = random.getrandbits(16)
+        while qid in pending:
+            qid = random.getrandbits(16)
+        future = asyncio.get_running_loop().create_future()
+        pending[qid] = (future, (name, qtype))
+        try:
+            self._transports[index].sendto(build_query(qid, name, qtype))
+            self.stats["sent"] += 1
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            pending.pop(qid, None)
+
+    async def _send_tcp(self, index, name, qtype):
+        """Même requête sur TCP (préfixe de longueur, RFC 1035 4.2.2), pour les réponses tronquées en UDP"""
+        qid = random.getrandbits(16)
+        query = build_query(qid, name, qtype)
+
+        async def exchange():
+            reader, writer = await asyncio.open_connection(*self.resolvers[index])
+            try:
+                writer.write(struct.pack("!H", len(query)) + query)
+                await writer.drain()
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+                return await reader.readexactly(length)
+            finally:
+                writer.close()
+
+        response = parse_response(await asyncio.wait_for(exchange(), self.timeout))
+        if response["id"] != qid or response["question"] != (name, qtype):
+            raise ValueError("Réponse TCP ne correspondant pas à la requête")
+        return response
+
+    async def query(self, name, qtype=1):
+        """{'rcode', 'answers'} pour un nom ; rcode TIMEOUT si aucun résolveur n'a répondu"""
+        name = normalize_name(name)
+        key = (self._cache_scope, name, qtype)
+        record = self.cache.get(key)
+        if record is not None:
+            self.stats["cached"] += 1
+            return record
+
+        outcome = "TIMEOUT"
+        index = self._next_resolver
+        self._next_resolver = (index + 1) % len(self.resolvers)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                index = (index + 1) % len(self.resolvers)
+            await self.limiter.acquire()
+            try:
+                response = await self._send(index, name, qtype)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                DNS_QUERIES.inc(outcome="timeout")
+                continue
+            except OSError:
+                DNS_QUERIES.inc(outcome="error")
+                outcome = "ERROR"
+                continue
+            outcome = response["rcode"]
+            DNS_QUERIES.inc(outcome=outcome.lower())
+            if outcome in RETRY_RCODES:
+                continue
+            if response["truncated"]:
+                self.stats["truncated"] += 1
+                try:
+                    response = await self._send_tcp(index, name, qtype)
+                    self.stats["tcp"] += 1
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError, ValueError,
+                        IndexError, struct.error):
+                    DNS_QUERIES.inc(outcome="tcp_error")
+                    # Réponse partielle : signalée comme telle et jamais mise en cache
+                    return {"rcode": outcome, "answers": response["answers"], "truncated": True}
+                outcome = response["rcode"]
+            record = {"rcode": outcome, "answers": response["answers"]}
+            if response["answers"]:
+                ttl = min(a[2] for a in response["answers"])
+            else:
+                ttl = response["negative_ttl"] if response["negative_ttl"] is not None else NEGATIVE_TTL
+            self.cache.put(key, record, ttl)
+            return record
+        return {"rcode": outcome, "answers": []}
+
+    async def resolve(self, name, qtype=1):
+        """Valeurs finales + chaîne de CNAME d'un nom"""
+        record = await self.query(name, qtype)
+        values, chain = final_values(name, record["answers"], qtype)
+        result = {"name": normalize_name(name), "rcode": record["rcode"], "values": values, "cname": chain}
+        if record.get("truncated"):
+            result["truncated"] = True
+        return result
+
+    async def wildcard(self, parent, qtype=1):
+        """Valeurs renvoyées pour des sous-domaines aléatoires de `parent` (ensemble vide = pas de wildcard)"""
+        if parent not in self._wildcards:
+            self._wildcards[parent] = asyncio.ensure_future(self._probe_wildcard(parent, qtype))
+        return await self._wildcards[parent]
+
+    async def _probe_wildcard(self, parent, qtype):
+        values = set()
+        for _ in range(WILDCARD_PROBES):
+            label = "".join(random.choices(string.ascii_lowercase + string.digits, k=16))
+            result = await self.resolve(f"{label}.{parent}", qtype)
+            values.update(result["values"])
+        return frozenset(values)
+
+    async def resolve_many(self, names, qtype=1, detect_wildcards=True, on_result=None):
+        """
+        Résout un itérable de noms avec `concurrency` requêtes en vol au plus.
+        Un nom dont toutes les valeurs sont celles du wildcard de son parent est marqué 'wildcard'.
+        """
+        iterator = iter(names)
+
+        async def worker():
+            for name in iterator:
+                try:
+                    result = await self.resolve(name, qtype)
+                except ValueError:
+                    result = {"name": name, "rcode": "INVALID", "values": [], "cname": []}
+                if detect_wildcards and result["values"] and "." in result["name"]:
+                    parent = result["name"].split(".", 1)[1]
+                    wildcard = await self.wildcard(parent, qtype)
+                    result["wildcard"] = bool(wildcard) and set(result["values"]) <= wildcard
+                on_result(result)
+
+        workers = min(self.concurrency, len(names)) if hasattr(names, "__len__") else self.concurrency
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+
+############### JOB ###############
+
+def compact_results(results, include_wildcards=False):
+    """Noms résolus seulement, sous forme courte ; le reste en compteurs"""
+    counts = {"total": 0, "resolved": 0, "wildcard": 0, "truncated": 0, "nxdomain": 0, "no_answer": 0, "failed": 0}
+    resolved, failed = [], []
+    for r in results:
+        counts["total"] += 1
+        if r.get("truncated"):
+            # Réponse UDP tronquée et reprise TCP impossible : valeurs partielles, pas un nom résolu
+            counts["truncated"] += 1
+            if r["values"]:
+                resolved.append({"name": r["name"], "values": r["values"], "truncated": True})
+            else:
+                failed.append(f"{r['name']} (TRUNCATED)")
+        elif r["values"]:
+            if r.get("wildcard"):
+                counts["wildcard"] += 1
+                if not include_wildcards:
+                    continue
+            else:
+                counts["resolved"] += 1
+            entry = {"name": r["name"], "values": r["values"]}
+            if r["cname"]:
+                entry["cname"] = r["cname"]
+            if r.get("wildcard"):
+                entry["wildcard"] = True
+            resolved.append(entry)
+        elif r["rcode"] == "NXDOMAIN":
+            counts["nxdomain"] += 1
+        elif r["rcode"] == "NOERROR":
+            counts["no_answer"] += 1
+        else:
+            counts["failed"] += 1
+            failed.append(f"{r['name']} ({r['rcode']})")
+    resolved.sort(key=lambda e: e["name"])
+    return {"counts": counts, "resolved": resolved, "failed": failed[:MAX_LISTED_FAILURES]}
+
+def load_names(names=None, domain=None, wordlist=None):
+    """Noms explicites et/ou `<mot>.<domain>` pour chaque mot de la wordlist, dédupliqués dans l'ordre"""
+    if isinstance(names, str):
+        names = names.replace(",", " ").split()
+    collected = [normalize_name(n) for n in (names or []) if n.strip()]
+    if wordlist:
+        if not domain:
+            raise ValueError("Une wordlist nécessite un domaine")
+        domain = normalize_name(domain)
+        with open(wordlist, errors="replace") as f:
+            for line in f:
+                word = line.strip().rstrip(".").lower()
+                if word and not word.startswith("#"):
+                    collected.append(f"{word}.{domain}")
+    elif domain:
+        collected.append(normalize_name(domain))
+    if not collected:
+        raise ValueError("Aucun nom à résoudre")
+    return list(dict.fromkeys(collected))
+
+class DnsJob:
+    """Résolution en masse dans un thread dédié (sa propre boucle asyncio), statut au format des jobs"""
+
+    kind = "dns"
+
+    def __init__(self, names, record_type="A", resolvers=None, rate=DEFAULT_RATE,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 detect_wildcards=True, include_wildcards=False):
+        record_type = record_type.upper()
+        if record_type not in QTYPES:
+            raise ValueError(f"Type d'enregistrement non supporté : {record_type} ({', '.join(QTYPES)})")
+        self.id = uuid.uuid4().hex[:12]
+        self.names = names
+        self.record_type = record_type
+        self.resolver_args = dict(resolvers=resolvers, rate=rate, concurrency=concurrency,
+                                  timeout=timeout, retries=retries)
+        resolver_list(resolvers)  # valide la liste avant de démarrer
+        self.detect_wildcards = detect_wildcards
+        self.include_wildcards = include_wildcards
+        self.created = time.time()
+        self.finished = None
+        self.results = []
+        self.stats = {}
+        self.wildcards = {}
+        self.error = None
+
+    async def _resolve(self):
+        async with BulkResolver(**self.resolver_args) as resolver:
+            await resolver.resolve_many(self.names, QTYPES[self.record_type],
+                                        detect_wildcards=self.detect_wildcards, on_result=self.results.append)
+            self.stats = dict(resolver.stats)
+            self.wildcards = {parent: sorted(task.result()) for parent, task in resolver._wildcards.items()
+                              if task.done() and task.result()}
+
+    def run(self, executor=None):
+        try:
+            asyncio.run(self._resolve())
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished = time.time()
+        return self
+
+    def start(self, executor=None):
+        jobs[self.id] = self
+        threading.Thread(target=self.run, name=f"job-{self.id}", daemon=True).start()
+        return self
+
+    def status(self, include_output=False):
+        elapsed = (self.finished or time.time()) - self.created
+        info = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "record_type": self.record_type,
+            "status": ("failed" if self.error else "finished") if self.finished else "running",
+            "progress": {"done": len(self.results), "total": len(self.names)},
+            "elapsed": elapsed,
+            "rate": len(self.results) / elapsed if elapsed > 0 else 0.0,
+        }
+        if self.finished:
+            info["result"] = compact_results(self.results, self.include_wildcards)
+            info["result"]["wildcards"] = self.wildcards
+            info["queries"] = self.stats
+            if include_output:
+                info["all"] = self.results
+        if self.error:
+            info["error"] = self.error
+        return info
@@ -0,0 +1,228 @@
+import contextlib
+import copy
+import fcntl
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+############### FINGERPRINTS ###############
+#
+# Empreintes des résultats d'un engagement, conservées entre deux retests :
+#  - hôtes : ports ouverts et services (dernier scan complet) + résultat de la
+#    dernière sonde rapide, pour comparer sonde à sonde
+#  - web : chemins trouvés par bruteforce avec statut, taille et hash du corps
+# FINGERPRINT_DIR est un volume monté sur tous les exécuteurs (comme CRACK_DIR) :
+# un retest envoyé à un autre nœud retrouve la même référence. Un fichier JSON
+# par cible (FINGERPRINT_DIR/<engagement>/hosts/<adresse>.json, web/<url>.json),
+# mis à jour sous un verrou flock partagé entre les nœuds.
+
+FINGERPRINT_DIR = os.getenv("FINGERPRINT_DIR", "/home/pentest/results/fingerprints")
+ENGAGEMENT_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+SECTIONS = ("hosts", "web")
+
+# Jetons qui changent à chaque requête, retirés avant de hasher un corps : dates et heures,
+# timestamps Unix, valeurs des champs/meta CSRF et nonces. Les autres chiffres comptent.
+VOLATILE_CONTENT = re.compile(
+    rb"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+    rb"|\b\d{2}:\d{2}:\d{2}\b"
+    rb"|\b1\d{9}(?:\d{3})?\b"
+    rb"|(?i:(?:csrf|xsrf|token|nonce|authenticity)[\w-]*[\"']?\s*(?:=|:|content=|value=)\s*[\"']?)[\w+/=.-]+"
+    rb"|(?i:nonce=[\"'])[\w+/=-]+"
+)
+# Écart de taille (du corps normalisé) toléré avant de considérer un contenu comme modifié
+SIZE_TOLERANCE = float(os.getenv("FINGERPRINT_SIZE_TOLERANCE", "0.05"))
+
+def _target_file(target):
+    return hashlib.sha1(target.encode()).hexdigest()[:20] + ".json"
+
+class FingerprintStore:
+    def __init__(self, root=FINGERPRINT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, engagement):
+        if not ENGAGEMENT_PATTERN.match(engagement):
+            raise ValueError(f"Invalid engagement name: {engagement}")
+        return os.path.join(self.root, engagement)
+
+    def _read(self, directory):
+        data = {section: {} for section in SECTIONS}
+        data["updated"] = None
+        for section in SECTIONS:
+            try:
+                entries = list(os.scandir(os.path.join(directory, section)))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                with open(entry.path) as f:
+                    record = json.load(f)
+                data[section][record["target"]] = record["data"]
+                data["updated"] = max(data["updated"] or 0, record["updated"])
+        return data
+
+    @contextlib.contextmanager
+    def _locked(self, directory):
+        # Verrou de thread pour ce processus, flock pour les autres nœuds montant le même volume
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, ".lock"), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def load(self, engagement):
+        directory = self._path(engagement)
+        if not os.path.isdir(directory):
+            return self._read(directory)
+        with self._locked(directory):
+            return self._read(directory)
+
+    def update(self, engagement, mutate):
+        """Applique `mutate(data)` et réécrit de façon atomique les seules cibles modifiées"""
+        directory = self._path(engagement)
+        with self._locked(directory):
+            data = self._read(directory)
+            before = copy.deepcopy({section: data[section] for section in SECTIONS})
+            mutate(data)
+            now = time.time()
+            for section in SECTIONS:
+                section_dir = os.path.join(directory, section)
+                os.makedirs(section_dir, exist_ok=True)
+                for target in set(before[section]) - set(data[section]):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(section_dir, _target_file(target)))
+                for target, entry in data[section].items():
+                    if before[section].get(target) == entry:
+                        continue
+                    path = os.path.join(section_dir, _target_file(target))
+                    tmp = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp, "w") as f:
+                        json.dump({"target": target, "updated": now, "data": entry}, f, indent=2)
+                    os.replace(tmp, path)
+            data["updated"] = now
+            return data
+
+############### HOSTS ###############
+
+def host_fingerprint(host):
+    """Ports ouverts d'un hôte fusionné par scan_fanout -> {'22/tcp': {...}}"""
+    return {
+        f"{p['port']}/{p['protocol']}": {k: p.get(k) for k in ("service", "product", "version")}
+        for p in host.get("ports", []) if p.get("state") == "open"
+    }
+
+def in_targets(address, targets):
+    """L'adresse fait-elle partie des cibles (IP, CIDR ou nom d'hôte) ?"""
+    for target in targets:
+        if address == target:
+            return True
+        try:
+            if ipaddress.ip_address(address) in ipaddress.ip_network(target, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+def diff_ports(before, after):
+    opened = sorted(set(after) - set(before))
+    closed = sorted(set(before) - set(after))
+    changed = [
+        {"port": key, "before": before[key], "after": after[key]}
+        for key in sorted(set(before) & set(after)) if before[key] != after[key]
+    ]
+    return {"opened": opened, "closed": closed, "changed": changed}
+
+############### WEB ###############
+
+# gobuster: "/admin (Status: 301) [Size: 312]" ; ffuf: "admin [Status: 301, Size: 312, ...]" ;
+# dirb: "+ http://t/admin (CODE:200|SIZE:123)" / "==> DIRECTORY: http://t/admin/"
+HIT_PATTERNS = [
+    re.compile(r"^(?P<path>/\S*)\s+\(Status:\s*(?P<status>\d+)\)(?:\s*\[Size:\s*(?P<size>\d+)\])?"),
+    re.compile(r"^(?P<path>\S+)\s+\[Status:\s*(?P<status>\d+),\s*Size:\s*(?P<size>\d+)"),
+    re.compile(r"^\+\s+(?P<url>https?://\S+)\s+\(CODE:(?P<status>\d+)\|SIZE:(?P<size>\d+)\)"),
+    re.compile(r"^==> DIRECTORY:\s+(?P<url>https?://\S+)"),
+]
+
+def parse_hit(line, base_url):
+    """Extrait le chemin d'une ligne de résultat gobuster/ffuf/dirb (None si la ligne n'en est pas une)"""
+    for pattern in HIT_PATTERNS:
+        match = pattern.search(line.strip())
+        if not match:
+            continue
+        groups = match.groupdict()
+        if groups.get("url"):
+            path = urllib.parse.urlsplit(groups["url"]).path or "/"
+            base_path = urllib.parse.urlsplit(base_url).path.rstrip("/")
+            if base_path and path.startswith(base_path):
+                path = path[len(base_path):] or "/"
+        else:
+            path = groups["path"] if groups["path"].startswith("/") else "/" + groups["path"]
+        return path
+    return None
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+_opener = urllib.request.build_opener(
+    _NoRedirect, urllib.request.HTTPSHandler(context=ssl._create_unverified_context()))
+
+def fetch_fingerprint(url, timeout=10.0, max_body=1024 * 1024):
+    """Statut, taille, redirection et hash du corps normalisé d'une URL (sans suivre les redirections)"""
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (fingerprint)"})
+    try:
+        with _opener.open(request, timeout=timeout) as response:
+            status, headers, body = response.status, response.headers, response.read(max_body)
+    except urllib.error.HTTPError as e:
+        status, headers, body = e.code, e.headers, e.read(max_body) if e.fp else b""
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return {"status": None, "error": str(e)}
+    return {
+        "status": status,
+        "size": len(body),
+        "location": headers.get("Location"),
+        "sha256": hashlib.sha256(VOLATILE_CONTENT.sub(b"", body)).hexdigest(),
+    }
+
+def fetch_fingerprints(base_url, paths, timeout=10.0, workers=16):
+    base = base_url.rstrip("/")
+    paths = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths) or 1))) as pool:
+        results = pool.map(lambda p: fetch_fingerprint(base + p, timeout=timeout), paths)
+    return dict(zip(paths, results))
+
+def alive(fingerprint):
+    return fingerprint.get("status") not in (None, 404)
+
+def same_content(before, after):
+    """Même statut, même redirection, même corps normalisé et taille dans la tolérance"""
+    keys = ("status", "location", "sha256")
+    if not all(before.get(k) == after.get(k) for k in keys):
+        return False
+    size_before, size_after = before.get("size"), after.get("size")
+    if size_before is None or size_after is None:
+        return True
+    return abs(size_after - size_before) <= SIZE_TOLERANCE * max(size_before, size_after)
+
+def diff_paths(before, after):
+    added = sorted(p for p in after if p not in before and alive(after[p]))
+    removed = sorted(p for p in before if p not in after or not alive(after[p]))
+    changed = [
+        {"path": p, "before": before[p], "after": after[p]}
+        for p in sorted(set(before) & set(after))
+        if alive(after[p]) and not same_content(before[p], after[p])
+    ]
+    return {"added": added, "removed": removed, "changed": changed}
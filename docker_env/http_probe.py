@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import html
+import os
+import re
+import threading
+import time
+import uuid
+
+import aiohttp
+from yarl import URL
+
+from metrics import registry
+from sharded_jobs import jobs
+
+############### HTTP PROBE ###############
+#
+# Vérifie en masse quels hôtes / chemins répondent, sans un curl ou un
+# whatweb par URL : un seul client aiohttp dont les connexions (et sessions
+# TLS) sont réutilisées d'une URL à l'autre du même hôte.
+#
+#  - par URL : statut, titre, en-têtes d'identification du serveur, chaîne de
+#    redirections, taille et sha256 du corps
+#  - nombre de requêtes en vol borné globalement et par hôte (host:port)
+#  - timeout par requête, compté une fois la place obtenue chez l'hôte
+#  - cible sans schéma : https d'abord, http si la connexion échoue
+
+DEFAULT_CONCURRENCY = int(os.getenv("HTTP_PROBE_CONCURRENCY", "100"))
+DEFAULT_PER_HOST = int(os.getenv("HTTP_PROBE_PER_HOST", "8"))
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_PROBE_TIMEOUT", "10"))
+MAX_REDIRECTS = int(os.getenv("HTTP_PROBE_MAX_REDIRECTS", "5"))
+MAX_BODY = int(os.getenv("HTTP_PROBE_MAX_BODY", str(1024 * 1024)))   # Octets lus (titre + hash) par réponse
+# Au-delà, une demande de réponse synchrone (wait) part quand même en job : le thread Flask n'attend pas
+WAIT_MAX_TARGETS = int(os.getenv("HTTP_PROBE_WAIT_MAX_TARGETS", "50"))
+TITLE_WINDOW = 64 * 1024
+USER_AGENT = os.getenv("HTTP_PROBE_USER_AGENT",
+                       "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+FINGERPRINT_HEADERS = ("server", "x-powered-by", "x-aspnet-version", "x-aspnetmvc-version", "x-generator",
+                       "via", "content-type", "www-authenticate")
+
+TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title", re.IGNORECASE | re.DOTALL)
+CHARSET_RE = re.compile(r"charset=([\w-]+)", re.IGNORECASE)
+
+PROBE_REQUESTS = registry.counter(
+    "http_probe_requests_total",
+    "HTTP probe requests by outcome (status class or error)",
+    ("outcome",),
+)
+
+def target_urls(target):
+    """'host', 'host:8443' ou 'host/path' -> [https://..., http://...] ; une URL complète est gardée telle quelle"""
+    target = target.strip()
+    if re.match(r"^https?://", target, re.IGNORECASE):
+        return [target]
+    return [f"https://{target}", f"http://{target}"]
+
+def extract_title(head, content_type=""):
+    match = TITLE_RE.search(head)
+    if not match:
+        return None
+    charset = CHARSET_RE.search(content_type or "")
+    try:
+        title = match.group(1).decode(charset.group(1) if charset else "utf-8", "replace")
+    except LookupError:
+        title = match.group(1).decode("utf-8", "replace")
+    return " ".join(html.unescape(title).split())[:200]
+
+def _host_key(url):
+    return f"{url.host}:{url.port}"
+
+class HttpProber:
+    """Client aiohttp partagé ; à utiliser dans `async with` depuis une boucle asyncio"""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 max_redirects=MAX_REDIRECTS, method="GET", headers=None):
+        self.concurrency = max(1, min(int(concurrency), 2000))
+        self.per_host = max(1, int(per_host))
+        self.timeout = float(timeout)
+        self.max_redirects = max(0, int(max_redirects))
+        self.method = method.upper()
+        if self.method not in ("GET", "HEAD"):
+            raise ValueError(f"Méthode non supportée : {method} (GET ou HEAD)")
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self.stats = {"requests": 0, "errors": 0}
+        self._host_slots = {}
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ssl=False,
+                                         ttl_dns_cache=300)
+        # Pas de cookies : chaque URL est sondée comme par un client neuf
+        self.session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(),
+                                             headers=self.headers, auto_decompress=True)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        return False
+
+    async def _fetch(self, url):
+        """Une requête sans suivre les redirections ; lit au plus MAX_BODY octets du corps"""
+        async with self.session.request(self.method, url, allow_redirects=False) as response:
+            digest, head, length, truncated = hashlib.sha256(), bytearray(), 0, False
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                if length + len(chunk) > MAX_BODY:
+                    chunk, truncated = chunk[:MAX_BODY - length], True
+                digest.update(chunk)
+                length += len(chunk)
+                if len(head) < TITLE_WINDOW:
+                    head += chunk[:TITLE_WINDOW - len(head)]
+                if truncated:
+                    break
+            declared = response.headers.get("Content-Length")
+            return {
+                "status": response.status,
+                "headers": {k.lower(): v for k, v in response.headers.items() if k.lower() in FINGERPRINT_HEADERS},
+                "location": response.headers.get("Location"),
+                "content_length": int(declared) if declared and declared.isdigit() else length,
+                "sha256": digest.hexdigest() if length else None,
+                "truncated": truncated,
+                "title": extract_title(bytes(head), response.headers.get("Content-Type", "")),
+            }
+
+    async def _request(self, url):
+        key = _host_key(url)
+        if key not in self._host_slots:
+            self._host_slots[key] = asyncio.Semaphore(self.per_host)
+        async with self._host_slots[key]:
+            self.stats["requests"] += 1
+            try:
+                response = await asyncio.wait_for(self._fetch(url), self.timeout)
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+        PROBE_REQUESTS.inc(outcome=f"{response['status'] // 100}xx")
+        return response
+
+    async def _follow(self, url):
+        url = URL(url)
+        redirects, seen = [], {str(url)}
+        started = time.perf_counter()
+        while True:
+            response = await self._request(url)
+            if not (300 <= response["status"] < 400 and response["location"]) or len(redirects) >= self.max_redirects:
+                break
+            target = url.join(URL(response["location"]))
+            redirects.append({"url": str(url), "status": response["status"], "location": str(target)})
+            if str(target) in seen or target.scheme not in ("http", "https"):
+                break
+            seen.add(str(target))
+            url = target
+        result = {"final_url": str(url), **response, "redirects": redirects,
+                  "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+        del result["location"]
+        return result
+
+    async def probe(self, target):
+        """Résultat d'une cible ; sans schéma, http n'est tenté que si https n'a pas répondu"""
+        error = None
+        for url in target_urls(target):
+            try:
+                return {"target": target, "url": url, **await self._follow(url)}
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except (aiohttp.ClientError, ValueError, OSError) as e:
+                error = str(e) or e.__class__.__name__
+            PROBE_REQUESTS.inc(outcome="timeout" if error == "timeout" else "error")
+        return {"target": target, "error": error}
+
+    async def probe_many(self, targets, on_result):
+        iterator = iter(targets)
+
+        async def worker():
+            for target in iterator:
+                on_result(await self.probe(target))
+
+        workers = min(self.concurrency, len(targets)) if hasattr(targets, "__len__") else self.concurrency
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+
+############### JOB ###############
+
+def load_targets(targets=None, url_file=None):
+    """URLs / hôtes explicites et/ou un par ligne d'un fichier, dédupliqués dans l'ordre"""
+    if isinstance(targets, str):
+        targets = targets.replace(",", " ").split()
+    collected = [t.strip() for t in (targets or []) if t.strip()]
+    if url_file:
+        with open(url_file, errors="replace") as f:
+            collected += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not collected:
+        raise ValueError("Aucune URL à sonder")
+    return list(dict.fromkeys(collected))
+
+def compact_result(result):
+    """Retire les champs vides pour garder la réponse courte"""
+    return {k: v for k, v in result.items() if v not in (None, [], {}, False)}
+
+def summarize(results):
+    summary = {"total": len(results), "alive": 0, "errors": 0, "status": {}}
+    for r in results:
+        if "error" in r:
+            summary["errors"] += 1
+            continue
+        summary["alive"] += 1
+        code = str(r["status"])
+        summary["status"][code] = summary["status"].get(code, 0) + 1
+    return summary
+
+class ProbeJob:
+    """Sondage HTTP en masse dans un thread dédié (sa propre boucle asyncio), statut au format des jobs"""
+
+    kind = "http_probe"
+
+    def __init__(self, targets, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, max_redirects=MAX_REDIRECTS, method="GET", headers=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.targets = targets
+        self.prober_args = dict(concurrency=concurrency, per_host=per_host, timeout=timeout,
+                                max_redirects=max_redirects, method=method, headers=headers)
+        HttpProber(**self.prober_args)  # valide les paramètres avant de démarrer
+        self.created = time.time()
+        self.finished = None
+        self.results = []
+        self.stats = {}
+        self.error = None
+
+    async def _probe(self):
+        async with HttpProber(**self.prober_args) as prober:
+            await prober.probe_many(self.targets, self.results.append)
+            self.stats = dict(prober.stats)
+
+    def run(self, executor=None):
+        try:
+            asyncio.run(self._probe())
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished = time.time()
+        return self
+
+    def start(self, executor=None):
+        jobs[self.id] = self
+        threading.Thread(target=self.run, name=f"job-{self.id}", daemon=True).start()
+        return self
+
+    def status(self, include_output=False):
+        elapsed = (self.finished or time.time()) - self.created
+        info = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": ("failed" if self.error else "finished") if self.finished else "running",
+            "progress": {"done": len(self.results), "total": len(self.targets)},
+            "elapsed": elapsed,
+            "rate": len(self.results) / elapsed if elapsed > 0 else 0.0,
+        }
+        if self.finished:
+            order = {target: i for i, target in enumerate(self.targets)}
+            results = sorted(self.results, key=lambda r: order.get(r["target"], 0))
+            info["summary"] = summarize(results)
+            info["requests"] = self.stats
+            info["results"] = [compact_result(r) for r in results]
+        if self.error:
+            info["error"] = self.error
+        return info
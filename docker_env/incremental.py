@@ -0,0 +1,308 @@
+import os
+import shlex
+import threading
+import time
+import uuid
+
+import fingerprints
+import scan_fanout
+import wordlists
+from sharded_jobs import ShardedJob, jobs, MAX_PARALLEL
+
+############### INCREMENTAL RESCANS ###############
+#
+# Retest d'un engagement déjà scanné : une sonde peu coûteuse détecte ce qui a
+# bougé depuis la dernière fois, et seuls les hôtes / répertoires concernés
+# repassent par le scan complet. Le résultat est un rapport de différences,
+# et les empreintes de l'engagement sont mises à jour.
+#
+#  - hôtes : nmap -Pn --version-light sur les ports déjà connus (+ ports courants)
+#    et découverte -sn des plages pour repérer les nouveaux hôtes
+#  - web : re-requête des chemins déjà trouvés (statut, redirection, hash du
+#    corps) puis bruteforce limité aux répertoires qui ont changé
+
+# Ports toujours sondés, pour remarquer un service ouvert hors des ports connus
+COMMON_PORTS = os.getenv("RESCAN_COMMON_PORTS", "21,22,23,25,53,80,110,139,143,443,445,3306,3389,5432,8080,8443")
+
+store = fingerprints.FingerprintStore()
+
+class IncrementalJob:
+    """Base commune : exécution dans un thread, statut au format de ShardedJob"""
+
+    kind = "rescan"
+
+    def __init__(self, engagement, shard_timeout, max_parallel):
+        store._path(engagement)  # valide le nom avant de démarrer
+        self.id = uuid.uuid4().hex[:12]
+        self.engagement = engagement
+        self.shard_timeout = shard_timeout
+        self.max_parallel = max_parallel
+        self.created = time.time()
+        self.finished = None
+        self.phase = "pending"
+        self.phases = {}
+        self.current = None
+        self.delta = None
+        self.error = None
+
+    def _run_phase(self, executor, name, commands, merge):
+        self.phase = name
+        started = time.time()
+        job = ShardedJob(f"{self.kind}_{name}", commands, merge, self.shard_timeout,
+                         max_parallel=self.max_parallel)
+        self.current = job
+        if commands:
+            job.run(executor)
+        else:
+            job.finished = time.time()
+        self.phases[name] = {"commands": len(commands), "elapsed": time.time() - started}
+        return job.result()
+
+    def run(self, executor):
+        try:
+            self.delta = self.compute(executor)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.phase = "done"
+            self.current = None
+            self.finished = time.time()
+
+    def start(self, executor):
+        jobs[self.id] = self
+        threading.Thread(target=self.run, args=(executor,), name=f"job-{self.id}", daemon=True).start()
+        return self
+
+    def status(self, include_output=False):
+        info = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "engagement": self.engagement,
+            "status": "finished" if self.finished else "running",
+            "phase": self.phase,
+            "phases": self.phases,
+            "elapsed": (self.finished or time.time()) - self.created,
+            "result": self.delta,
+        }
+        if self.current is not None:
+            info["progress"] = self.current.status()["progress"]
+        if self.error:
+            info["error"] = self.error
+        return info
+
+############### HOSTS ###############
+
+def _probe_commands(known, extra_ports):
+    """Un nmap -Pn par groupe d'hôtes partageant les mêmes ports à sonder"""
+    by_ports = {}
+    for address, entry in known.items():
+        ports = {int(k.split("/")[0]) for k in entry["ports"] if k.endswith("/tcp")} | extra_ports
+        by_ports.setdefault(",".join(str(p) for p in sorted(ports)), []).append(address)
+    commands = []
+    for spec, addresses in by_ports.items():
+        for i in range(0, len(addresses), 16):
+            args = ["nmap", "-Pn", "-sV", "--version-light", "-p", spec, "-oX", "-", *addresses[i:i + 16]]
+            commands.append(" ".join(shlex.quote(a) for a in args))
+    return commands
+
+def _probe_changed(entry, probed):
+    """Compare la sonde aux empreintes : ports TCP ouverts, et services vus à la sonde précédente"""
+    known_open = {k for k in entry["ports"] if k.endswith("/tcp")}
+    if set(probed) != known_open:
+        return True
+    previous = entry.get("probe") or {}
+    return any(previous[k] != probed[k] for k in previous if k in probed)
+
+class IncrementalScan(IncrementalJob):
+    kind = "rescan"
+
+    def __init__(self, engagement, targets, ports="1-1000", options="", hosts_per_shard=16, port_chunks=4,
+                 shard_timeout=600, max_parallel=MAX_PARALLEL):
+        super().__init__(engagement, shard_timeout, max_parallel)
+        self.targets = targets
+        self.ports = ports
+        self.options = options
+        self.hosts_per_shard = hosts_per_shard
+        self.port_chunks = port_chunks
+        # Valide cibles, ports et options avant de lancer quoi que ce soit
+        scan_fanout.build_commands("nmap", options, targets, ports, hosts_per_shard, port_chunks)
+
+    def full_scan_commands(self, targets):
+        return scan_fanout.build_commands("nmap", self.options, targets, self.ports,
+                                          self.hosts_per_shard, self.port_chunks)
+
+    def compute(self, executor):
+        baseline = store.load(self.engagement)["hosts"]
+        known = {a: h for a, h in baseline.items() if fingerprints.in_targets(a, self.targets)}
+        merge = scan_fanout.make_scan_merger("nmap")
+
+        probed, discovered = {}, set()
+        if known:
+            # Ports courants limités à la plage du scan complet, sinon un port hors plage resterait "changé"
+            scope = scan_fanout.parse_ports(self.ports)
+            extra = {p for low, high in scan_fanout.parse_ports(COMMON_PORTS) for p in range(low, high + 1)
+                     if any(a <= p <= b for a, b in scope)}
+            probe_commands = _probe_commands(known, extra)
+
+            def split_merge(shards):
+                # -Pn marque tous les hôtes "up" : seule la découverte -sn dit qui répond encore
+                return {
+                    "probe": merge([s for s in shards if s["index"] < len(probe_commands)]),
+                    "discovery": merge([s for s in shards if s["index"] >= len(probe_commands)]),
+                }
+
+            probe = self._run_phase(executor, "probe",
+                                    probe_commands + scan_fanout.build_discovery_commands(self.targets),
+                                    split_merge)
+            discovered = {h["address"] for h in probe["discovery"]["hosts"] if h["status"] == "up"}
+            for host in probe["probe"]["hosts"]:
+                if host["address"] in known:
+                    probed[host["address"]] = fingerprints.host_fingerprint(host)
+
+        gone = sorted(a for a in known if not probed.get(a) and a not in discovered)
+        changed = sorted(a for a in known if a not in gone and _probe_changed(known[a], probed.get(a, {})))
+        new = sorted(a for a in discovered if a not in known)
+        if known:
+            # Hôtes nommés explicitement mais jamais vus : scannés même si la découverte (ping) les rate
+            names = {n for h in known.values() for n in h.get("hostnames", [])}
+            new += [t for t in self.targets if "/" not in t and t not in known and t not in names and t not in new]
+        rescan = changed + new if known else list(self.targets)
+
+        scanned = {}
+        if rescan:
+            full = self._run_phase(executor, "scan", self.full_scan_commands(rescan), merge)
+            scanned = {h["address"]: h for h in full["hosts"]}
+
+        now = time.time()
+        delta = {
+            "baseline": bool(known),
+            "new_hosts": [],
+            "removed_hosts": gone,
+            "changed_hosts": {},
+            "unchanged_hosts": len(known) - len(changed) - len(gone),
+            "rescanned": sorted(scanned),
+        }
+        updates = {}
+        for address, host in scanned.items():
+            ports = fingerprints.host_fingerprint(host)
+            if address in known:
+                diff = fingerprints.diff_ports(known[address]["ports"], ports)
+                if any(diff.values()):
+                    delta["changed_hosts"][address] = diff
+            elif ports or host["status"] == "up":
+                delta["new_hosts"].append({"address": address, "hostnames": host["hostnames"],
+                                           "ports": sorted(ports)})
+            updates[address] = {"ports": ports, "hostnames": host["hostnames"], "scanned": now}
+        for address, ports in probed.items():
+            if address in gone:
+                continue
+            entry = updates.setdefault(address, dict(known[address]))
+            entry["probe"] = ports
+            entry["probed"] = now
+
+        def mutate(data):
+            for address in gone:
+                data["hosts"].pop(address, None)
+            data["hosts"].update(updates)
+        delta["hosts_tracked"] = len(store.update(self.engagement, mutate)["hosts"])
+        return delta
+
+############### WEB ###############
+
+def _parent_dir(path):
+    return path.rstrip("/").rsplit("/", 1)[0] + "/"
+
+def _is_directory(path, fingerprint):
+    location = fingerprint.get("location") or ""
+    return path.endswith("/") or (fingerprint.get("status") in (301, 302, 307, 308)
+                                  and location.rstrip().endswith(path.rstrip("/") + "/"))
+
+def _rescan_dirs(diff):
+    """
+    Répertoires à re-bruteforcer : ceux dont l'index a changé, et les parents
+    des chemins disparus. Un fichier modifié est seulement signalé.
+    """
+    dirs = {c["path"] for c in diff["changed"] if c["path"].endswith("/")}
+    dirs.update(_parent_dir(path) for path in diff["removed"])
+    return sorted(dirs)
+
+class IncrementalWebScan(IncrementalJob):
+    kind = "rescan_web"
+
+    def __init__(self, engagement, url, command, wordlist, shards=None, hit_pattern=None,
+                 shard_timeout=3600, max_parallel=MAX_PARALLEL, probe_workers=16):
+        super().__init__(engagement, shard_timeout, max_parallel)
+        if "{url}" not in command or "{wordlist}" not in command:
+            raise ValueError("The command must contain {url} and {wordlist} placeholders")
+        self.url = url.rstrip("/")
+        self.command = command
+        self.wordlist = wordlist
+        self.shards = shards or os.cpu_count() or 2
+        self.hit_pattern = hit_pattern or wordlists.default_hit_pattern(command)
+        self.probe_workers = probe_workers
+
+    def bruteforce_commands(self, dirs):
+        shard_paths, _ = wordlists.make_shards(self.wordlist, self.shards)
+        commands, bases = [], []
+        for directory in dirs:
+            base = self.url + directory.rstrip("/")
+            for path in shard_paths:
+                commands.append(self.command.replace("{url}", base).replace("{wordlist}", path))
+                bases.append(directory)
+        return commands, bases
+
+    def compute(self, executor):
+        baseline = (store.load(self.engagement)["web"].get(self.url) or {}).get("paths", {})
+
+        self.phase = "probe"
+        started = time.time()
+        probed = fingerprints.fetch_fingerprints(self.url, list(baseline) + ["/"], workers=self.probe_workers)
+        self.phases["probe"] = {"requests": len(probed), "elapsed": time.time() - started}
+        before = dict(baseline)
+        if "/" not in before:
+            before["/"] = probed["/"]
+        diff = fingerprints.diff_paths(before, probed)
+        dirs = _rescan_dirs(diff) if baseline else ["/"]
+
+        found = set()
+        if dirs:
+            commands, bases = self.bruteforce_commands(dirs)
+            hit_merge = wordlists.make_hit_merger(self.hit_pattern)
+
+            def merge(shards):
+                paths = set()
+                for shard in shards:
+                    directory = bases[shard["index"]]
+                    for line in hit_merge([shard])["hits"]:
+                        path = fingerprints.parse_hit(line, self.url + directory)
+                        if path:
+                            paths.add(directory.rstrip("/") + path)
+                return {"paths": sorted(paths)}
+
+            found = set(self._run_phase(executor, "bruteforce", commands, merge)["paths"])
+
+        new_paths = sorted(found - set(probed))
+        fetched = fingerprints.fetch_fingerprints(self.url, new_paths, workers=self.probe_workers) if new_paths else {}
+        # Un répertoire répond souvent par une redirection fixe : on suit aussi son index "/admin/"
+        indexes = [p + "/" for p, fp in fetched.items() if _is_directory(p, fp) and p + "/" not in probed]
+        if indexes:
+            fetched.update(fingerprints.fetch_fingerprints(self.url, indexes, workers=self.probe_workers))
+        current = {p: fp for p, fp in probed.items() if fingerprints.alive(fp)}
+        current.update({p: fp for p, fp in fetched.items() if fingerprints.alive(fp)})
+
+        delta = {
+            "baseline": bool(baseline),
+            # La racine est toujours suivie (c'est elle qui déclenche un bruteforce complet)
+            "added": sorted(p for p in current if p not in baseline and p != "/"),
+            "removed": [p for p in diff["removed"] if p in baseline],
+            "changed": [c for c in diff["changed"] if c["path"] in baseline],
+            "unchanged": len([p for p in baseline if p in current and p != "/" and p not in
+                              {c["path"] for c in diff["changed"]}]),
+            "rescanned_dirs": dirs,
+            "paths_tracked": len(current) - ("/" in current),
+        }
+
+        def mutate(data):
+            data["web"][self.url] = {"paths": current, "command": self.command, "scanned": time.time()}
+        store.update(self.engagement, mutate)
+        return delta
@@ -0,0 +1,188 @@
+import ipaddress
+import json
+import re
+import shlex
+import xml.etree.ElementTree as ET
+
+############### SCAN FAN-OUT ###############
+#
+# Un scan nmap/masscan est découpé en sous-jobs (blocs de cibles x plages de
+# ports) lancés en parallèle par ShardedJob, chacun avec son propre timeout.
+# Les sorties XML (nmap) / JSON (masscan) des shards sont fusionnées par hôte.
+
+SUPPORTED_TOOLS = ("nmap", "masscan")
+TARGET_PATTERN = re.compile(r"^[A-Za-z0-9.:/_-]+$")
+# Options gérées par le fan-out lui-même : interdites dans 'options'
+RESERVED_OPTIONS = re.compile(r"^(-p|--ports|-o[NXGSAJLD]?|--top-ports|-iL)")
+
+def parse_ports(spec):
+    """'22,80,8000-8100' -> [(22, 22), (80, 80), (8000, 8100)] ; '-' -> toutes"""
+    spec = (spec or "1-1000").strip()
+    if spec in ("-", "all"):
+        spec = "1-65535"
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            low, high = int(low or 1), int(high or 65535)
+        else:
+            low = high = int(part)
+        if not (1 <= low <= high <= 65535):
+            raise ValueError(f"Invalid port range: {part}")
+        ranges.append((low, high))
+    return ranges
+
+def split_ports(ranges, chunks):
+    """Répartit l'ensemble des ports en `chunks` groupes de taille équivalente"""
+    total = sum(high - low + 1 for low, high in ranges)
+    chunks = max(1, min(chunks, total))
+    per_chunk = -(-total // chunks)
+    groups, current, size = [], [], 0
+    for low, high in ranges:
+        while low <= high:
+            take = min(high - low + 1, per_chunk - size)
+            current.append((low, low + take - 1))
+            size += take
+            low += take
+            if size == per_chunk:
+                groups.append(current)
+                current, size = [], 0
+    if current:
+        groups.append(current)
+    return [",".join(f"{a}-{b}" if a != b else str(a) for a, b in group) for group in groups]
+
+def split_targets(targets, hosts_per_shard):
+    """Découpe les réseaux CIDR en sous-réseaux d'environ `hosts_per_shard` adresses"""
+    groups, singles = [], []
+    for target in targets:
+        target = target.strip()
+        if not target:
+            continue
+        if not TARGET_PATTERN.match(target):
+            raise ValueError(f"Invalid target: {target}")
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            singles.append(target)
+            continue
+        if network.num_addresses <= hosts_per_shard:
+            singles.append(str(network) if network.num_addresses > 1 else str(network.network_address))
+            continue
+        new_prefix = network.max_prefixlen - max(0, (hosts_per_shard - 1).bit_length())
+        groups.extend([str(subnet)] for subnet in network.subnets(new_prefix=max(new_prefix, network.prefixlen)))
+    for i in range(0, len(singles), hosts_per_shard):
+        groups.append(singles[i:i + hosts_per_shard])
+    return groups
+
+def build_commands(tool, options, targets, ports, hosts_per_shard=16, port_chunks=4):
+    if tool not in SUPPORTED_TOOLS:
+        raise ValueError(f"Unsupported tool: {tool}")
+    option_args = shlex.split(options or "")
+    for arg in option_args:
+        if RESERVED_OPTIONS.match(arg):
+            raise ValueError(f"Option {arg} is managed by the fan-out, remove it from 'options'")
+    target_groups = split_targets(targets, hosts_per_shard)
+    port_groups = split_ports(parse_ports(ports), port_chunks)
+    output = ["-oX", "-"] if tool == "nmap" else ["-oJ", "-"]
+    commands = []
+    for group in target_groups:
+        for port_spec in port_groups:
+            args = [tool, *option_args, "-p", port_spec, *output, *group]
+            commands.append(" ".join(shlex.quote(a) for a in args))
+    return commands
+
+def build_discovery_commands(targets, hosts_per_shard=256):
+    """Découverte d'hôtes seule (nmap -sn), sans scan de ports"""
+    commands = []
+    for group in split_targets(targets, hosts_per_shard):
+        args = ["nmap", "-sn", "-oX", "-", *group]
+        commands.append(" ".join(shlex.quote(a) for a in args))
+    return commands
+
+############### MERGE ###############
+
+def _iter_nmap_hosts(xml_text):
+    """Lit les <host> complets, même si le XML est tronqué (shard tué au timeout)"""
+    parser = ET.XMLPullParser(events=("end",))
+    try:
+        parser.feed(xml_text)
+        for _, element in parser.read_events():
+            if element.tag == "host":
+                yield element
+    except ET.ParseError:
+        for _, element in parser.read_events():
+            if element.tag == "host":
+                yield element
+
+def _merge_nmap_host(hosts, element):
+    address = element.find("address")
+    if address is None:
+        return
+    host = hosts.setdefault(address.get("addr"), {
+        "address": address.get("addr"), "status": "unknown", "hostnames": [], "ports": {}
+    })
+    status = element.find("status")
+    if status is not None and status.get("state") == "up":
+        host["status"] = "up"
+    for hostname in element.findall("hostnames/hostname"):
+        if hostname.get("name") not in host["hostnames"]:
+            host["hostnames"].append(hostname.get("name"))
+    for port in element.findall("ports/port"):
+        state = port.find("state")
+        service = port.find("service")
+        key = f"{port.get('portid')}/{port.get('protocol')}"
+        host["ports"][key] = {
+            "port": int(port.get("portid")),
+            "protocol": port.get("protocol"),
+            "state": state.get("state") if state is not None else None,
+            "service": service.get("name") if service is not None else None,
+            "product": service.get("product") if service is not None else None,
+            "version": service.get("version") if service is not None else None,
+        }
+
+def _merge_masscan_line(hosts, line):
+    line = line.strip().rstrip(",")
+    if not line.startswith("{"):
+        return
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return
+    host = hosts.setdefault(record.get("ip"), {
+        "address": record.get("ip"), "status": "up", "hostnames": [], "ports": {}
+    })
+    for port in record.get("ports", []):
+        key = f"{port.get('port')}/{port.get('proto')}"
+        host["ports"][key] = {
+            "port": port.get("port"),
+            "protocol": port.get("proto"),
+            "state": port.get("status"),
+            "service": (port.get("service") or {}).get("name"),
+            "product": None,
+            "version": None,
+        }
+
+def make_scan_merger(tool):
+    def merge(shards):
+        hosts = {}
+        for shard in shards:
+            if tool == "nmap":
+                for element in _iter_nmap_hosts(shard["stdout"]):
+                    _merge_nmap_host(hosts, element)
+            else:
+                for line in shard["stdout"].splitlines():
+                    _merge_masscan_line(hosts, line)
+        result = []
+        for host in sorted(hosts.values(), key=lambda h: h["address"]):
+            ports = sorted(host["ports"].values(), key=lambda p: (p["protocol"] or "", p["port"]))
+            result.append({**host, "ports": ports})
+        incomplete = [s["index"] for s in shards if s["status"] == "timeout"]
+        return {
+            "hosts": result,
+            "open_ports": sum(1 for h in result for p in h["ports"] if p["state"] == "open"),
+            "incomplete_shards": incomplete,
+        }
+    return merge
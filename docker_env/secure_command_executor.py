@@ -2,11 +2,15 @@ import subprocess
 import shlex
 import time
 import os
+import resource
+import signal
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+from metrics import registry
+
 class CommandCategory(Enum):
     RECONNAISSANCE = "reconnaissance"
     SCANNING = "scanning" 
@@ -16,6 +20,50 @@ class CommandCategory(Enum):
     REPORTING = "reporting"
     BASIC = "basic"
 
+EXECUTION_TIME = registry.histogram(
+    "executor_command_duration_seconds",
+    "Execution time of synchronous commands by category",
+    ("category",),
+)
+VALIDATION_REJECTIONS = registry.counter(
+    "executor_validation_rejections_total",
+    "Commands rejected during validation by reason",
+    ("reason",),
+)
+TIMEOUTS = registry.counter(
+    "executor_timeouts_total",
+    "Synchronous commands killed after hitting the timeout",
+    ("category",),
+)
+
+GIB = 1024 ** 3
+
+@dataclass
+class ResourceProfile:
+    nice: int = 0
+    cpu_quota: Optional[float] = None       # Nombre de cœurs (cgroup v2 cpu.max)
+    cpu_seconds: Optional[int] = None       # RLIMIT_CPU
+    # cgroup memory.max uniquement : RLIMIT_AS compte l'espace d'adressage réservé, pas la mémoire
+    # utilisée, et fait échouer les runtimes Go ou hashcat (GPU) bien avant la limite réelle
+    memory_bytes: Optional[int] = None
+    max_wall_time: Optional[int] = None     # Secondes avant kill (reaper pour l'arrière-plan)
+    max_open_files: Optional[int] = None    # RLIMIT_NOFILE
+
+# Profils par défaut : les outils lourds (scan, cracking) passent derrière les commandes interactives
+DEFAULT_RESOURCE_PROFILES = {
+    CommandCategory.BASIC: ResourceProfile(nice=0, memory_bytes=1 * GIB, max_open_files=1024),
+    CommandCategory.RECONNAISSANCE: ResourceProfile(nice=5, cpu_quota=1.0, memory_bytes=2 * GIB,
+                                                    max_wall_time=3600, max_open_files=4096),
+    CommandCategory.SCANNING: ResourceProfile(nice=10, cpu_quota=1.0, memory_bytes=1 * GIB,
+                                              max_wall_time=3600, max_open_files=4096),
+    CommandCategory.ENUMERATION: ResourceProfile(nice=5, cpu_quota=2.0, memory_bytes=2 * GIB,
+                                                 max_wall_time=7200, max_open_files=4096),
+    CommandCategory.EXPLOITATION: ResourceProfile(nice=10, cpu_quota=2.0, memory_bytes=4 * GIB,
+                                                  max_wall_time=4 * 3600, max_open_files=1024),
+    CommandCategory.POST_EXPLOITATION: ResourceProfile(nice=5, memory_bytes=1 * GIB, max_open_files=1024),
+    CommandCategory.REPORTING: ResourceProfile(nice=0, memory_bytes=1 * GIB, max_open_files=1024),
+}
+
 @dataclass
 class CommandResult:
     success: bool
@@ -27,9 +75,17 @@ class CommandResult:
     category: CommandCategory
 
 class SecureCommandExecutor:
-    def __init__(self, timeout: int = 300, max_output_size: int = None):
+    def __init__(self, timeout: int = 300, max_output_size: int = None, workspace: str = "/home/pentest/workspace",
+                 resource_profiles: Optional[Dict[CommandCategory, ResourceProfile]] = None,
+                 cgroup_root: Optional[str] = os.getenv("EXECUTOR_CGROUP_ROOT")):
         self.timeout = timeout
         self.max_output_size = max_output_size
+        self.workspace = workspace
+        self.resource_profiles = dict(DEFAULT_RESOURCE_PROFILES)
+        if resource_profiles:
+            self.resource_profiles.update(resource_profiles)
+        # Racine d'un cgroup v2 délégué à l'utilisateur pentest (optionnel)
+        self.cgroup_root = cgroup_root
         self.logger = self._setup_logging()
         
         # Liste blanche des commandes autorisées - mise à jour avec tous les outils du Dockerfile
@@ -184,39 +240,118 @@ class SecureCommandExecutor:
         
         return logger
     
-    def _validate_command(self, command: str) -> Tuple[bool, str, CommandCategory]:
+    def get_resource_profile(self, category: CommandCategory) -> ResourceProfile:
+        return self.resource_profiles.get(category) or ResourceProfile()
+
+    def _resource_preexec(self, category: CommandCategory):
+        """
+        Fonction exécutée dans l'enfant entre fork et exec : nice, rlimits et cgroup
+        sont en place avant la première instruction de l'outil, et hérités par tout
+        ce qu'il lance ensuite.
+        """
+        profile = self.get_resource_profile(category)
+        limits = []
+        if profile.max_open_files:
+            limits.append((resource.RLIMIT_NOFILE, profile.max_open_files))
+        if profile.cpu_seconds:
+            limits.append((resource.RLIMIT_CPU, profile.cpu_seconds))
+        procs_file = None
+        if self.cgroup_root and (profile.cpu_quota or profile.memory_bytes):
+            procs_file = self._prepare_cgroup(category, profile)
+
+        def preexec():
+            # Pas de logging ici (processus enfant) : une limite refusée laisse la valeur héritée
+            if profile.nice:
+                try:
+                    os.setpriority(os.PRIO_PROCESS, 0, profile.nice)
+                except OSError:
+                    pass
+            for limit, value in limits:
+                try:
+                    resource.setrlimit(limit, (value, value))
+                except (OSError, ValueError):
+                    pass
+            if procs_file:
+                try:
+                    with open(procs_file, "w") as f:
+                        f.write("0")  # "0" = le processus qui écrit
+                except OSError:
+                    pass
+
+        return preexec
+
+    def _prepare_cgroup(self, category: CommandCategory, profile: ResourceProfile) -> Optional[str]:
+        """Crée et configure le cgroup de la catégorie ; renvoie son cgroup.procs (None si indisponible)"""
+        cgroup = os.path.join(self.cgroup_root, category.value)
+        try:
+            os.makedirs(cgroup, exist_ok=True)
+            if profile.cpu_quota:
+                period = 100000
+                with open(os.path.join(cgroup, "cpu.max"), "w") as f:
+                    f.write(f"{int(profile.cpu_quota * period)} {period}")
+            if profile.memory_bytes:
+                with open(os.path.join(cgroup, "memory.max"), "w") as f:
+                    f.write(str(profile.memory_bytes))
+            return os.path.join(cgroup, "cgroup.procs")
+        except OSError as e:
+            self.logger.warning(f"Cgroup {cgroup} indisponible: {e}")
+            return None
+
+    def _kill_group(self, process):
+        """Tue tout le groupe de processus (enfant + descendants) lancé avec start_new_session"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+
+    def _reject(self, reason_code: str, message: str) -> Tuple[bool, str, CommandCategory, str]:
+        return False, message, None, reason_code
+
+    def _inspect_command(self, command: str) -> Tuple[bool, str, CommandCategory, Optional[str]]:
         if not command or not command.strip():
-            return False, "Commande vide", None
+            return self._reject("empty", "Commande vide")
         
         try:
             parsed = shlex.split(command)
         except ValueError as e:
-            return False, f"Erreur de parsing: {e}", None
+            return self._reject("parse_error", f"Erreur de parsing: {e}")
         
         if not parsed:
-            return False, "Commande vide après parsing", None
+            return self._reject("empty", "Commande vide après parsing")
         
         base_command = parsed[0].split('/')[-1]
         
         if base_command in self.forbidden_commands:
-            return False, f"Commande interdite: {base_command}", None
+            return self._reject("forbidden", f"Commande interdite: {base_command}")
         
         if base_command not in self.allowed_commands:
-            return False, f"Commande non autorisée: {base_command}", None
+            return self._reject("not_allowed", f"Commande non autorisée: {base_command}")
         
         # Vérifications de patterns dangereux
         dangerous_patterns = ["&&", "||", ";", "|", ">", ">>", "<", "`", "$("]
         for pattern in dangerous_patterns:
             if pattern in command:
-                return False, f"Pattern dangereux détecté: {pattern}", None
+                return self._reject("dangerous_pattern", f"Pattern dangereux détecté: {pattern}")
         
         category = self.allowed_commands[base_command]
-        return True, "Commande validée", category
+        return True, "Commande validée", category, None
+
+    def _validate_command(self, command: str) -> Tuple[bool, str, CommandCategory]:
+        """Vérification sans effet de bord (pré-validation des jobs, tests...)"""
+        is_valid, reason, category, _ = self._inspect_command(command)
+        return is_valid, reason, category
+
+    def validate_or_reject(self, command: str) -> Tuple[bool, str, CommandCategory]:
+        """Validation au point où la requête est effectivement refusée : le refus est compté une fois"""
+        is_valid, reason, category, reason_code = self._inspect_command(command)
+        if not is_valid:
+            VALIDATION_REJECTIONS.inc(reason=reason_code)
+        return is_valid, reason, category
     
     def execute_command(self, command: str, working_dir: Optional[str] = None) -> CommandResult:
         start_time = time.time()
         
-        is_valid, reason, category = self._validate_command(command)
+        is_valid, reason, category = self.validate_or_reject(command)
         if not is_valid:
             self.logger.warning(f"Commande refusée: {command} - Raison: {reason}")
             return CommandResult(
@@ -235,7 +370,7 @@ class SecureCommandExecutor:
         if working_dir and os.path.exists(working_dir):
             cwd = working_dir
         else:
-            cwd = "/home/pentest/workspace"
+            cwd = self.workspace
             # Créer le répertoire s'il n'existe pas
             if not os.path.exists(cwd):
                 try:
@@ -250,18 +385,32 @@ class SecureCommandExecutor:
                 stderr=subprocess.PIPE,
                 stdin=subprocess.DEVNULL,
                 cwd=cwd,
-                text=True
+                text=True,
+                # Groupe dédié : le timeout tue aussi les descendants
+                start_new_session=True,
+                preexec_fn=self._resource_preexec(category)
             )
+            profile = self.get_resource_profile(category)
+            timeout = min(self.timeout, profile.max_wall_time) if profile.max_wall_time else self.timeout
             
             try:
-                stdout, stderr = process.communicate(timeout=self.timeout)
+                stdout, stderr = process.communicate(timeout=timeout)
             except subprocess.TimeoutExpired:
-                process.kill()
-                stdout, stderr = process.communicate()
+                self._kill_group(process)
+                try:
+                    stdout, stderr = process.communicate(timeout=5)
+                except subprocess.TimeoutExpired:
+                    # Un descendant sorti du groupe (setsid) garde les pipes ouverts : on abandonne la sortie
+                    for stream in (process.stdout, process.stderr):
+                        stream.close()
+                    process.wait()
+                    stdout = ""
+                TIMEOUTS.inc(category=category.value)
+                EXECUTION_TIME.observe(time.time() - start_time, category=category.value)
                 return CommandResult(
                     success=False,
                     stdout=stdout if stdout else "",
-                    stderr=f"Timeout après {self.timeout}s",
+                    stderr=f"Timeout après {timeout}s",
                     return_code=-1,
                     execution_time=time.time() - start_time,
                     command=command,
@@ -270,6 +419,7 @@ class SecureCommandExecutor:
             
             execution_time = time.time() - start_time
             success = process.returncode == 0
+            EXECUTION_TIME.observe(execution_time, category=category.value)
             
             self.logger.info(f"Commande terminée - Code retour: {process.returncode}")
             
@@ -300,10 +450,10 @@ class SecureCommandExecutor:
     
     def execute_background_command(self, command):
         start_time = time.time()
-        cwd = "/home/pentest/workspace"
+        cwd = self.workspace
         
         # Validation existante
-        is_valid, reason, category = self._validate_command(command)
+        is_valid, reason, category = self.validate_or_reject(command)
         if not is_valid:
             self.logger.warning(f"Commande refusée: {command} - Raison: {reason}")
             return CommandResult(
@@ -314,7 +464,7 @@ class SecureCommandExecutor:
                 execution_time=0,
                 command=command,
                 category=category,
-            ), -1
+            ), -1, None
 
         self.logger.info(f"Exécution de la commande [{category.value}]: {command}")
         
@@ -325,7 +475,10 @@ class SecureCommandExecutor:
                 stderr=subprocess.PIPE,
                 stdin=subprocess.DEVNULL,
                 cwd=cwd,
-                text=True
+                text=True,
+                # Groupe de processus dédié : le reaper peut tuer toute l'arborescence
+                start_new_session=True,
+                preexec_fn=self._resource_preexec(category)
             )
             
             # Attendre un court moment pour détecter les erreurs immédiates
@@ -343,7 +496,7 @@ class SecureCommandExecutor:
                     execution_time=time.time() - start_time,
                     command=command,
                     category=category,
-                ), -1
+                ), -1, None
                 
         except FileNotFoundError:
             error_msg = f"Commande introuvable: {command.split()[0]}"
@@ -356,7 +509,7 @@ class SecureCommandExecutor:
                 execution_time=time.time() - start_time,
                 command=command,
                 category=category,
-            ), -1
+            ), -1, None
             
         except PermissionError:
             error_msg = f"Permission refusée pour: {command}"
@@ -369,7 +522,7 @@ class SecureCommandExecutor:
                 execution_time=time.time() - start_time,
                 command=command,
                 category=category,
-            ), -1
+            ), -1, None
             
         except Exception as e:
             self.logger.error(f"Erreur lors de l'exécution: {e}")
@@ -381,7 +534,7 @@ class SecureCommandExecutor:
                 execution_time=time.time() - start_time,
                 command=command,
                 category=category,
-            ), -1
+            ), -1, None
 
         pid = process.pid
         self.logger.info(f"Commande lancée en arrière-plan avec PID: {pid}")
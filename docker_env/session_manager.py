@@ -0,0 +1,196 @@
+import os
+import re
+import shlex
+import threading
+import time
+import uuid
+
+import pexpect
+
+from metrics import registry
+from secure_command_executor import VALIDATION_REJECTIONS
+
+############### SESSIONS INTERACTIVES ###############
+#
+# Sessions PTY persistantes (ssh, nc, script python interactif...) pilotées avec pexpect.
+# Une fois la connexion établie, chaque commande suivante passe par la même
+# session : plus de handshake SSH ni de démarrage de processus par commande.
+
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "900"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "32"))
+MAX_READ = 200000
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07")
+
+# Invites courantes : shell ($ # > %), REPL python, mots de passe, confirmation de clé SSH
+DEFAULT_PROMPT = (
+    r"(?:[\$#>%] ?$)"
+    r"|(?:>>> ?$)"
+    r"|(?:[Pp]assword[^:\n]*: ?$)"
+    r"|(?:passphrase[^:\n]*: ?$)"
+    r"|(?:\(yes/no[^)]*\)\? ?$)"
+)
+
+# Seules les lignes de la commande de lancement sont validées : un interpréteur ou un
+# éditeur local (REPL python, :! de vim) exécuterait ensuite n'importe quoi sans contrôle.
+# Les sessions sont donc réservées aux clients distants, et python3 à un script.
+SESSION_COMMANDS = frozenset({"ssh", "telnet", "nc", "netcat-traditional", "smbclient", "rpcclient", "python3"})
+
+def session_refusal(args):
+    """Motif de refus d'une session pour cette commande, None si elle est acceptée"""
+    base = args[0].split("/")[-1]
+    if base not in SESSION_COMMANDS:
+        return f"{base} n'est pas autorisé en session interactive ({', '.join(sorted(SESSION_COMMANDS))})"
+    # Seule forme acceptée : python3 <script> [args]. Aucune option de l'interpréteur, car
+    # certaines prennent une valeur (-X dev, -W ignore) ou se groupent (-ic) et masqueraient -i/-c/-m
+    if base == "python3" and (len(args) < 2 or args[1].startswith("-")):
+        return "python3 en session : uniquement 'python3 <script> [args]', sans option de l'interpréteur"
+    return None
+
+SESSIONS_OPEN = registry.gauge("api_sessions_open", "Interactive PTY sessions currently open")
+SESSIONS_CLOSED = registry.counter("api_sessions_closed_total", "Closed interactive sessions by reason", ("reason",))
+
+class Session:
+    def __init__(self, command, child, prompt):
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.child = child
+        # Sans MULTILINE : '$' ne correspond qu'à la fin des données reçues
+        self.prompt = re.compile(prompt)
+        self.created = time.time()
+        self.last_used = self.created
+        self.lock = threading.Lock()
+
+    def info(self):
+        return {
+            "session_id": self.id,
+            "command": self.command,
+            "pid": self.child.pid,
+            "alive": self.child.isalive(),
+            "created": self.created,
+            "idle_for": time.time() - self.last_used,
+        }
+
+class SessionManager:
+    def __init__(self, executor, idle_ttl=SESSION_IDLE_TTL, max_sessions=MAX_SESSIONS):
+        self.executor = executor
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _drain(child, settle=0.1):
+        """Lit ce qui arrive encore pendant `settle` secondes"""
+        data = ""
+        while True:
+            try:
+                data += child.read_nonblocking(size=65536, timeout=settle)
+            except (pexpect.TIMEOUT, pexpect.EOF):
+                return data
+
+    def _read_until(self, session, pattern, timeout):
+        """Lit jusqu'à l'invite (ou au motif demandé), EOF ou timeout"""
+        child = session.child
+        deadline = time.time() + timeout
+        output, matched = "", "timeout"
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            index = child.expect([pattern or session.prompt, pexpect.EOF, pexpect.TIMEOUT], timeout=remaining)
+            output += child.before or ""
+            if index != 0:
+                matched = "eof" if index == 1 else "timeout"
+                break
+            output += child.after
+            if pattern is not None:
+                matched = "pattern"
+                break
+            # L'invite doit être la dernière chose affichée : sinon on continue à lire
+            extra = self._drain(child)
+            output += extra
+            if not extra or session.prompt.search(extra):
+                matched = "prompt"
+                break
+        output = ANSI_ESCAPE.sub("", output).replace("\r\n", "\n")
+        return output[-MAX_READ:], matched
+
+    def open(self, command, prompt=None, timeout=30):
+        is_valid, reason, category = self.executor.validate_or_reject(command)
+        if not is_valid:
+            raise ValueError(f"Commande refusée: {reason}")
+        args = shlex.split(command)
+        refusal = session_refusal(args)
+        if refusal:
+            VALIDATION_REJECTIONS.inc(reason="session_not_allowed")
+            raise ValueError(f"Commande refusée: {refusal}")
+        with self._lock:
+            if len(self.sessions) >= self.max_sessions:
+                raise RuntimeError(f"Too many open sessions ({self.max_sessions})")
+
+        os.makedirs(self.executor.workspace, exist_ok=True)
+        child = pexpect.spawn(args[0], args[1:], encoding="utf-8", codec_errors="replace",
+                              cwd=self.executor.workspace, dimensions=(50, 200), timeout=timeout,
+                              preexec_fn=self.executor._resource_preexec(category))
+        session = Session(command, child, prompt or DEFAULT_PROMPT)
+        with self._lock:
+            self.sessions[session.id] = session
+            SESSIONS_OPEN.set(len(self.sessions))
+        self.executor.logger.info(f"Session {session.id} ouverte [{category.value}]: {command}")
+
+        with session.lock:
+            output, matched = self._read_until(session, None, timeout)
+        return {**session.info(), "output": output, "matched": matched}
+
+    def get(self, session_id):
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def send(self, session_id, text, expect=None, timeout=30, newline=True):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        pattern = re.compile(expect) if expect else None
+        with session.lock:
+            if not session.child.isalive():
+                return {**session.info(), "output": "", "matched": "eof"}
+            if newline:
+                session.child.sendline(text)
+            else:
+                session.child.send(text)
+            output, matched = self._read_until(session, pattern, timeout)
+            session.last_used = time.time()
+        # Le PTY renvoie l'écho de la saisie en première ligne
+        if newline and output.startswith(text):
+            output = output[len(text):].lstrip("\n")
+        return {**session.info(), "output": output, "matched": matched}
+
+    def close(self, session_id, reason="closed"):
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+            SESSIONS_OPEN.set(len(self.sessions))
+        if session is None:
+            return False
+        try:
+            session.child.close(force=True)
+        except Exception:
+            pass
+        SESSIONS_CLOSED.inc(reason=reason)
+        self.executor.logger.info(f"Session {session_id} fermée ({reason})")
+        return True
+
+    def list(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return [s.info() for s in sessions]
+
+    def reap_idle(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            if not session.child.isalive():
+                self.close(session.id, reason="exited")
+            elif self.idle_ttl and now - session.last_used > self.idle_ttl and not session.lock.locked():
+                self.close(session.id, reason="idle_ttl")
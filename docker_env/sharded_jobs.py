@@ -0,0 +1,115 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import registry
+
+############### SHARDED JOBS ###############
+#
+# Un job découpe un travail long en N commandes indépendantes (shards) lancées
+# en parallèle via l'exécuteur (validation + profils de ressources), chacune
+# avec son propre timeout. Les sorties sont fusionnées par une fonction propre
+# au type de job (bruteforce, scan...).
+
+MAX_PARALLEL = int(os.getenv("SHARDED_JOBS_MAX_PARALLEL", str(os.cpu_count() or 2)))
+
+SHARDS_RUNNING = registry.gauge("jobs_shards_running", "Shards of sharded jobs currently running")
+SHARDS_FINISHED = registry.counter("jobs_shards_finished_total", "Finished shards by outcome", ("kind", "outcome"))
+
+jobs = {}  # job_id -> ShardedJob
+
+class ShardedJob:
+    def __init__(self, kind, commands, merge, shard_timeout, max_parallel=MAX_PARALLEL, on_done=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.merge = merge
+        self.shard_timeout = shard_timeout
+        self.max_parallel = max(1, min(max_parallel, len(commands)))
+        self.on_done = on_done
+        self.created = time.time()
+        self.finished = None
+        self.shards = [
+            {"index": i, "command": cmd, "status": "pending", "return_code": None,
+             "stdout": "", "stderr": "", "started": None, "ended": None}
+            for i, cmd in enumerate(commands)
+        ]
+        self._lock = threading.Lock()
+        self._result = None
+
+    def _run_shard(self, executor, shard):
+        shard["status"] = "running"
+        shard["started"] = time.time()
+        SHARDS_RUNNING.inc()
+        try:
+            result, pid, process = executor.execute_background_command(shard["command"])
+            if process is None:
+                shard.update(status="failed", stdout=result.stdout or "", stderr=result.stderr or "",
+                             return_code=result.return_code)
+                return
+            try:
+                stdout, stderr = process.communicate(timeout=self.shard_timeout)
+                shard["status"] = "done" if process.returncode == 0 else "failed"
+            except subprocess.TimeoutExpired:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    process.kill()
+                stdout, stderr = process.communicate()
+                shard["status"] = "timeout"
+            shard.update(stdout=stdout or "", stderr=stderr or "", return_code=process.returncode)
+        except Exception as e:
+            shard.update(status="failed", stderr=f"Erreur d'exécution: {e}")
+        finally:
+            shard["ended"] = time.time()
+            SHARDS_RUNNING.dec()
+            SHARDS_FINISHED.inc(kind=self.kind, outcome=shard["status"])
+
+    def run(self, executor):
+        """Exécute tous les shards et bloque jusqu'à la fin (start() le fait dans un thread)"""
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix=f"job-{self.id}") as pool:
+            list(pool.map(lambda shard: self._run_shard(executor, shard), self.shards))
+        self.finished = time.time()
+        if self.on_done:
+            try:
+                self.on_done(self)
+            except Exception:
+                pass
+
+    def start(self, executor):
+        jobs[self.id] = self
+        threading.Thread(target=self.run, args=(executor,), name=f"job-{self.id}", daemon=True).start()
+        return self
+
+    def result(self):
+        """Fusion des shards terminés (partielle tant que le job tourne)"""
+        if self.finished and self._result is not None:
+            return self._result
+        done = [s for s in self.shards if s["status"] not in ("pending", "running")]
+        merged = self.merge(done)
+        if self.finished:
+            with self._lock:
+                self._result = merged
+        return merged
+
+    def status(self, include_output=False):
+        counts = {}
+        for shard in self.shards:
+            counts[shard["status"]] = counts.get(shard["status"], 0) + 1
+        completed = sum(v for k, v in counts.items() if k not in ("pending", "running"))
+        info = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": "finished" if self.finished else "running",
+            "progress": {"completed": completed, "total": len(self.shards), "by_status": counts},
+            "elapsed": (self.finished or time.time()) - self.created,
+            "result": self.result(),
+        }
+        if include_output:
+            info["shards"] = [
+                {k: v for k, v in shard.items() if k != "stdout"} for shard in self.shards
+            ]
+        return info
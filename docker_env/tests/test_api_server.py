@@ -0,0 +1,164 @@
+import time
+
+import pytest
+
+import api_server
+from secure_command_executor import SecureCommandExecutor
+
+def reaped(reason):
+    return api_server.REAPED._values.get((reason,), 0)
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_server, "executor", SecureCommandExecutor(timeout=5, workspace=str(tmp_path),
+                                                                      cgroup_root=None))
+    # Le reaper est appelé à la main avec une horloge simulée
+    monkeypatch.setattr(api_server, "ensure_reaper", lambda: None)
+    api_server.processes.clear()
+    yield api_server.app.test_client()
+    for info in api_server.processes.values():
+        if info["process"].poll() is None:
+            api_server._kill_process_group(info, "test")
+            info["process"].wait()
+    api_server.processes.clear()
+
+@pytest.fixture
+def start(client, tmp_path):
+    """Lance un script Python en arrière-plan via l'API ; renvoie (pid, info)"""
+    def start(body, name="job.py"):
+        path = tmp_path / name
+        path.write_text("import sys, time\n" + body)
+        response = client.post("/execute/background", json={"command": f"python3 {path}"})
+        assert response.status_code == 200, response.get_json()
+        pid = response.get_json()["PID"]
+        return pid, api_server.processes[pid]
+    return start
+
+def wait_exit(info, timeout=5):
+    info["process"].wait(timeout=timeout)
+
+############### REAPER ###############
+
+def test_reaper_collects_the_exit_code(start):
+    # Au-delà des 0.1 s pendant lesquelles l'API signale directement un échec immédiat
+    pid, info = start("print('done', flush=True)\ntime.sleep(0.3)\nsys.exit(3)\n")
+    wait_exit(info)
+    before = reaped("exited")
+    api_server.reap_background_processes()
+    assert info["return_code"] == 3
+    assert info["ended_at"] is not None and info["killed_reason"] is None
+    assert reaped("exited") == before + 1
+
+def test_reaper_kills_after_max_wall_time(start):
+    pid, info = start("print('working', flush=True)\ntime.sleep(60)\n")
+    info["max_wall_time"] = 10
+    api_server.reap_background_processes(now=info["started_at"] + 5)
+    assert info["return_code"] is None
+    before = reaped("max_wall_time")
+    api_server.reap_background_processes(now=info["started_at"] + 11)
+    assert info["killed_reason"] == "max_wall_time"
+    assert info["return_code"] == -9
+    assert reaped("max_wall_time") == before + 1
+
+def test_reaper_kills_idle_processes(start, monkeypatch):
+    monkeypatch.setattr(api_server, "IDLE_TTL", 30)
+    pid, info = start("print('banner', flush=True)\ntime.sleep(60)\n")
+    deadline = time.time() + 5
+    while not info["stdout"] and time.time() < deadline:
+        time.sleep(0.02)
+    last = api_server._last_activity(info)
+    assert last > info["started_at"]
+    # L'inactivité se compte depuis la dernière ligne, pas depuis le lancement
+    api_server.reap_background_processes(now=last + 20)
+    assert info["return_code"] is None
+    api_server.reap_background_processes(now=last + 31)
+    assert info["killed_reason"] == "idle_ttl"
+    assert info["return_code"] == -9
+
+def test_finished_processes_are_evicted_after_retention(start, client, monkeypatch):
+    monkeypatch.setattr(api_server, "RETENTION", 100)
+    pid, info = start("print('bye')\n")
+    wait_exit(info)
+    api_server.reap_background_processes()
+    ended = info["ended_at"]
+    api_server.reap_background_processes(now=ended + 50)
+    assert client.get(f"/background/{pid}").get_json()["process"]["return_code"] == 0
+    api_server.reap_background_processes(now=ended + 101)
+    assert pid not in api_server.processes
+    assert client.get(f"/background/{pid}").status_code == 404
+
+############### LONG-POLL ###############
+
+def lines(result, stream="stdout"):
+    return [entry["line"] for entry in result[stream]]
+
+def test_wait_returns_up_to_the_pattern_then_continues_from_the_cursor(start, client):
+    pid, _ = start("for line in ('starting', 'loading', 'READY on :8080', 'GET /'):\n"
+                   "    print(line, flush=True)\n    time.sleep(0.1)\ntime.sleep(0.5)\n")
+    first = client.get(f"/background/{pid}/wait", query_string={"pattern": "READY", "timeout": 5}).get_json()
+    assert first["reason"] == "pattern"
+    assert first["match"]["line"] == "READY on :8080"
+    assert lines(first) == ["starting", "loading", "READY on :8080"]
+    assert first["status"] == "running"
+
+    # Les lignes arrivées après la correspondance sont rendues par l'appel suivant
+    second = client.get(f"/background/{pid}/wait", query_string={"cursor": first["cursor"], "timeout": 5}).get_json()
+    assert second["reason"] == "exited"
+    assert lines(second) == ["GET /"]
+    assert second["return_code"] == 0
+    assert second["cursor"] == "4,0"
+
+def test_wait_for_a_number_of_new_lines(start, client):
+    pid, _ = start("for i in range(5):\n    print(i, flush=True)\n    time.sleep(0.1)\ntime.sleep(5)\n")
+    result = client.get(f"/background/{pid}/wait", query_string={"lines": 2, "timeout": 5}).get_json()
+    assert result["reason"] == "lines"
+    assert len(lines(result)) >= 2
+    assert lines(result)[:2] == ["0", "1"]
+
+def test_wait_returns_on_exit_with_both_streams(start, client):
+    pid, _ = start("print('out', flush=True)\nprint('err', file=sys.stderr, flush=True)\n"
+                   "time.sleep(0.3)\nsys.exit(2)\n")
+    started = time.time()
+    result = client.get(f"/background/{pid}/wait", query_string={"timeout": 10}).get_json()
+    assert time.time() - started < 5
+    assert result["reason"] == "exited"
+    assert result["return_code"] == 2
+    assert lines(result) == ["out"] and lines(result, "stderr") == ["err"]
+    only_err = client.get(f"/background/{pid}/wait", query_string={"stream": "stderr", "timeout": 1}).get_json()
+    assert "stdout" not in only_err and lines(only_err, "stderr") == ["err"]
+
+def test_wait_timeout_is_capped(start, client, monkeypatch):
+    monkeypatch.setattr(api_server, "WAIT_MAX_TIMEOUT", 0.3)
+    pid, _ = start("time.sleep(30)\n")
+    started = time.time()
+    result = client.get(f"/background/{pid}/wait", query_string={"timeout": 60}).get_json()
+    assert result["reason"] == "timeout"
+    assert time.time() - started < 2
+    assert result["cursor"] == "0,0"
+
+def test_wait_rejects_bad_parameters(start, client):
+    pid, _ = start("time.sleep(30)\n")
+    assert client.get(f"/background/{pid}/wait", query_string={"pattern": "("}).status_code == 400
+    assert client.get(f"/background/{pid}/wait", query_string={"cursor": "x"}).status_code == 400
+    assert client.get(f"/background/{pid}/wait", query_string={"stream": "all"}).status_code == 400
+    assert client.get("/background/999999/wait").status_code == 404
+
+############### HTTP PROBE ###############
+
+def test_probe_waits_only_for_small_target_lists(client, site, monkeypatch):
+    url, pages = site
+    pages["/"] = (200, b"<title>Home</title>", None)
+    result = client.post("/jobs/probe", json={"urls": f"{url}/ {url}/missing", "wait": True}).get_json()
+    assert result["status"] == "finished"
+    assert [r.get("status") for r in result["results"]] == [200, 404]
+    assert result["results"][0]["title"] == "Home"
+
+    monkeypatch.setattr(api_server.http_probe, "WAIT_MAX_TARGETS", 1)
+    started = client.post("/jobs/probe", json={"urls": f"{url}/ {url}/missing", "wait": True}).get_json()
+    assert "results" not in started and started["urls"] == 2
+    assert "note" in started
+    job = api_server.jobs[started["job_id"]]
+    deadline = time.time() + 5
+    while job.finished is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert client.get(f"/jobs/{started['job_id']}").get_json()["summary"]["alive"] == 2
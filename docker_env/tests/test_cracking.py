@@ -0,0 +1,71 @@
+import pytest
+
+from cracking import Potfile, parse_status_line
+
+@pytest.fixture
+def pot(tmp_path):
+    path = tmp_path / "shared.pot"
+    path.write_text(
+        "5f4dcc3b5aa765d61d8327deb882cf99:password\n"
+        "$NT$8846f7eaee8fb117ad06bdd830b7586c:password\n"
+        "$dynamic_0$e10adc3949ba59abbe56e057f20f883e:$HEX[313233343536]\n"
+        "sha1$salt:with:colons$0123456789abcdef:p:ss\n"
+    )
+    return Potfile(str(path)), path
+
+def test_potfile_lookup_plain_hash(pot):
+    potfile, _ = pot
+    assert potfile.lookup("5F4DCC3B5AA765D61D8327DEB882CF99") == "password"
+    assert potfile.lookup("00000000000000000000000000000000") is None
+
+def test_potfile_strips_john_tags_and_decodes_hex(pot):
+    potfile, _ = pot
+    assert potfile.lookup("8846f7eaee8fb117ad06bdd830b7586c") == "password"
+    assert potfile.lookup("$NT$8846f7eaee8fb117ad06bdd830b7586c") == "password"
+    assert potfile.lookup("e10adc3949ba59abbe56e057f20f883e") == "123456"
+
+def test_potfile_hash_with_colons(pot):
+    potfile, _ = pot
+    # Le clair commence au premier ':' qui suit le hash complet, et peut lui-même contenir des ':'
+    assert potfile.lookup("sha1$salt:with:colons$0123456789abcdef") == "p:ss"
+
+def test_potfile_user_hash_line(pot):
+    potfile, _ = pot
+    assert potfile.lookup("admin:5f4dcc3b5aa765d61d8327deb882cf99:::") == "password"
+
+def test_potfile_reloads_when_file_changes(pot):
+    potfile, path = pot
+    assert potfile.lookup("d8578edf8458ce06fbc5bb76a58c5ca4") is None
+    with open(path, "a") as f:
+        f.write("d8578edf8458ce06fbc5bb76a58c5ca4:qwerty\n")
+    assert potfile.lookup("d8578edf8458ce06fbc5bb76a58c5ca4") == "qwerty"
+
+def test_potfile_missing_file(tmp_path):
+    assert Potfile(str(tmp_path / "absent.pot")).lookup("5f4dcc3b5aa765d61d8327deb882cf99") is None
+
+@pytest.mark.parametrize("line, expected", [
+    ("0g 0:00:00:03 9.67% (ETA: 10:22:03) 0g/s 476813p/s 476813c/s 476813C/s 123456..tigger",
+     {"cracked": 0, "elapsed": 3, "rate": 476813.0, "percent": 9.67, "eta": "10:22:03"}),
+    ("1g 0:00:01:00 DONE (2024-01-01 10:00) 0.01g/s 1.2Mp/s 1.2Mc/s 1.2MC/s abc..xyz",
+     {"cracked": 1, "elapsed": 60, "rate": 1200000.0, "percent": 100.0}),
+    ("2g 1:02:00:00 0.5g/s 3KC/s", {"cracked": 2, "elapsed": 93600, "rate": 3000.0}),
+    ("Loaded 1 password hash (Raw-MD5 [MD5 256/256 AVX2 8x3])", {}),
+])
+def test_parse_john_status(line, expected):
+    assert parse_status_line("john", line) == expected
+
+@pytest.mark.parametrize("line, expected", [
+    ("Speed.#1.........:  1234.5 kH/s (0.10ms) @ Accel:1024", {"rate": 1234500.0}),
+    ("Speed.#*.........:  2.5 GH/s", {"rate": 2.5e9}),
+    ("Recovered........: 1/3 (33.33%) Digests", {"cracked": 1}),
+    ("Progress.........: 100/1000 (10.00%)", {"percent": 10.0}),
+    ("Time.Estimated...: Mon Jan  1 10:00:00 2024 (5 mins, 3 secs)", {"eta": "Mon Jan  1 10:00:00 2024 (5 mins, 3 secs)"}),
+    ("Session..........: hashcat", {}),
+    ("{not json", {}),
+])
+def test_parse_hashcat_status(line, expected):
+    assert parse_status_line("hashcat", line) == expected
+
+def test_parse_hashcat_status_json():
+    line = '{"progress": [50, 200], "recovered_hashes": [2, 5], "devices": [{"speed": 1000}, {"speed": 500}]}'
+    assert parse_status_line("hashcat", line) == {"percent": 25.0, "cracked": 2, "rate": 1500.0}
@@ -0,0 +1,193 @@
+import asyncio
+import struct
+
+import pytest
+
+from dns_resolver import (BulkResolver, DnsJob, ResponseCache, build_query, compact_results, encode_name,
+                          final_values, parse_resolver, parse_response)
+
+def record(rtype, rdata, ttl=60, name=b"\xc0\x0c"):
+    return name + struct.pack("!HHIH", rtype, 1, ttl, len(rdata)) + rdata
+
+def response(query, records, rcode=0, truncated=False):
+    """Réponse à `query` (même id et question) avec les enregistrements donnés en section answer"""
+    qid = struct.unpack("!H", query[:2])[0]
+    flags = 0x8180 | rcode | (0x0200 if truncated else 0)
+    return struct.pack("!HHHHHH", qid, flags, 1, len(records), 0, 0) + query[12:] + b"".join(records)
+
+def a_records(count):
+    return [record(1, bytes([10, 0, i // 256, i % 256])) for i in range(count)]
+
+def test_encode_name():
+    assert encode_name("WWW.Example.com.") == b"\x03www\x07example\x03com\x00"
+    assert encode_name("bücher.example") == b"\x0dxn--bcher-kva\x07example\x00"
+    for invalid in ("", "a..b", "x" * 64 + ".com", ("a." * 127) + "com"):
+        with pytest.raises(ValueError):
+            encode_name(invalid)
+
+def test_build_query_header_and_question():
+    query = build_query(0x1234, "example.com", 28)
+    assert struct.unpack("!HHHHHH", query[:12]) == (0x1234, 0x0100, 1, 0, 0, 0)
+    assert query[12:] == b"\x07example\x03com\x00" + struct.pack("!HH", 28, 1)
+
+def test_parse_response_follows_compression_pointers():
+    query = build_query(7, "www.example.com", 1)
+    cname_target = b"\x03cdn\xc0\x10"   # "cdn" + pointeur vers "example.com" dans la question
+    data = response(query, [record(5, cname_target, ttl=300),
+                            record(1, bytes([192, 0, 2, 1]), name=b"\x03cdn\xc0\x10")])
+    parsed = parse_response(data)
+    assert parsed["id"] == 7
+    assert parsed["rcode"] == "NOERROR"
+    assert parsed["question"] == ("www.example.com", 1)
+    assert parsed["answers"] == [("www.example.com", 5, 300, "cdn.example.com"),
+                                 ("cdn.example.com", 1, 60, "192.0.2.1")]
+    assert final_values("www.example.com", parsed["answers"], 1) == (["192.0.2.1"], ["cdn.example.com"])
+
+def test_parse_response_mx_txt_aaaa():
+    query = build_query(1, "example.com", 15)
+    data = response(query, [record(15, struct.pack("!H", 10) + b"\x04mail\xc0\x0c"),
+                            record(16, b"\x05hello\x06 world"),
+                            record(28, bytes(15) + b"\x01")])
+    values = [a[3] for a in parse_response(data)["answers"]]
+    assert values == ["10 mail.example.com", "hello world", "::1"]
+
+def test_parse_response_rcode():
+    assert parse_response(response(build_query(1, "nope.example", 1), [], rcode=3))["rcode"] == "NXDOMAIN"
+
+def test_parse_response_rejects_incomplete_record():
+    data = response(build_query(1, "example.com", 1), a_records(3))
+    with pytest.raises(ValueError):
+        parse_response(data[:-2])
+
+def test_parse_response_keeps_complete_records_when_truncated():
+    data = response(build_query(1, "example.com", 1), a_records(3), truncated=True)
+    parsed = parse_response(data[:-2])
+    assert parsed["truncated"] is True
+    assert [a[3] for a in parsed["answers"]] == ["10.0.0.0", "10.0.0.1"]
+
+def test_parse_resolver():
+    assert parse_resolver("1.1.1.1") == ("1.1.1.1", 53)
+    assert parse_resolver("127.0.0.1:5353") == ("127.0.0.1", 5353)
+    assert parse_resolver("[::1]:5353") == ("::1", 5353)
+    with pytest.raises(ValueError):
+        parse_resolver("dns.google")
+
+def test_response_cache_expires_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("dns_resolver.time.time", lambda: now[0])
+    cache = ResponseCache(max_entries=2)
+    cache.put(("a", 1), "A", ttl=10)
+    cache.put(("b", 1), "B", ttl=100)
+    cache.put(("z", 1), "Z", ttl=0)
+    assert cache.get(("z", 1)) is None
+    cache.get(("a", 1))
+    cache.put(("c", 1), "C", ttl=100)
+    assert cache.get(("b", 1)) is None
+    now[0] += 11
+    assert cache.get(("a", 1)) is None
+    assert cache.get(("c", 1)) == "C"
+
+def test_compact_results_counts_truncated_apart():
+    results = [
+        {"name": "a.t", "rcode": "NOERROR", "values": ["10.0.0.1"], "cname": []},
+        {"name": "b.t", "rcode": "NOERROR", "values": ["10.0.0.2"], "cname": [], "truncated": True},
+        {"name": "c.t", "rcode": "NOERROR", "values": [], "cname": [], "truncated": True},
+        {"name": "d.t", "rcode": "NXDOMAIN", "values": [], "cname": []},
+    ]
+    compact = compact_results(results)
+    assert compact["counts"]["resolved"] == 1
+    assert compact["counts"]["truncated"] == 2
+    assert {"name": "b.t", "values": ["10.0.0.2"], "truncated": True} in compact["resolved"]
+    assert "c.t (TRUNCATED)" in compact["failed"]
+
+def resolve_truncated(tcp):
+    """Serveur local : UDP tronqué (TC) au milieu d'un enregistrement, TCP complet si `tcp`"""
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        class Udp(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                self.transport.sendto(response(data, a_records(60), truncated=True)[:512], addr)
+
+        async def handle(reader, writer):
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+            full = response(await reader.readexactly(length), a_records(60))
+            writer.write(struct.pack("!H", len(full)) + full)
+            await writer.drain()
+            writer.close()
+
+        transport, _ = await loop.create_datagram_endpoint(Udp, local_addr=("127.0.0.1", 0))
+        port = transport.get_extra_info("sockname")[1]
+        server = await asyncio.start_server(handle, "127.0.0.1", port) if tcp else None
+        cache = ResponseCache()
+        try:
+            async with BulkResolver([f"127.0.0.1:{port}"], rate=0, timeout=1, retries=0, cache=cache) as resolver:
+                result = await resolver.resolve("big.test")
+                return result, dict(resolver.stats), len(cache)
+        finally:
+            transport.close()
+            if server:
+                server.close()
+
+    return asyncio.run(main())
+
+def test_truncated_answer_is_retried_over_tcp():
+    result, stats, cached = resolve_truncated(tcp=True)
+    assert len(result["values"]) == 60
+    assert "truncated" not in result
+    assert stats["truncated"] == 1 and stats["tcp"] == 1
+    assert cached == 1
+
+def test_truncated_answer_without_tcp_is_flagged_and_not_cached():
+    result, stats, cached = resolve_truncated(tcp=False)
+    assert result["truncated"] is True
+    assert 0 < len(result["values"]) < 60
+    assert stats["tcp"] == 0
+    assert cached == 0
+
+def test_cache_is_scoped_by_resolver_set():
+    """DNS split-horizon : le même nom résolu par un résolveur interne puis public"""
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        class Udp(asyncio.DatagramProtocol):
+            def __init__(self, address):
+                self.address = address
+
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                self.transport.sendto(response(data, [record(1, bytes(self.address))]), addr)
+
+        internal, _ = await loop.create_datagram_endpoint(lambda: Udp([10, 0, 0, 1]), local_addr=("127.0.0.1", 0))
+        public, _ = await loop.create_datagram_endpoint(lambda: Udp([203, 0, 113, 1]), local_addr=("127.0.0.1", 0))
+        cache = ResponseCache()
+        try:
+            values = []
+            for transport in (internal, public, internal):
+                port = transport.get_extra_info("sockname")[1]
+                async with BulkResolver([f"127.0.0.1:{port}"], rate=0, timeout=1, retries=0, cache=cache) as resolver:
+                    values.append((await resolver.resolve("app.corp.test"))["values"])
+            return values, len(cache), resolver.stats["cached"]
+        finally:
+            internal.close()
+            public.close()
+
+    values, cached, hits = asyncio.run(main())
+    assert values == [["10.0.0.1"], ["203.0.113.1"], ["10.0.0.1"]]
+    assert cached == 2
+    assert hits == 1
+
+def test_failed_job_reports_failed(monkeypatch):
+    job = DnsJob(["a.test"], resolvers="127.0.0.1:53")
+
+    async def broken():
+        raise OSError("network unreachable")
+    monkeypatch.setattr(job, "_resolve", broken)
+    status = job.run().status()
+    assert status["status"] == "failed"
+    assert status["error"] == "network unreachable"
@@ -0,0 +1,66 @@
+import pytest
+
+import fingerprints
+from fingerprints import FingerprintStore, diff_paths, same_content
+
+def fp(status=200, sha256="a", size=100, location=None):
+    return {"status": status, "sha256": sha256, "size": size, "location": location}
+
+def test_store_keeps_one_file_per_target_and_survives_a_new_instance(tmp_path):
+    store = FingerprintStore(str(tmp_path))
+
+    def mutate(data):
+        data["hosts"]["10.0.0.1"] = {"ports": {"22/tcp": {}}}
+        data["hosts"]["10.0.0.2"] = {"ports": {}}
+        data["web"]["http://t"] = {"paths": {"/": fp()}}
+    store.update("acme", mutate)
+    assert len(list((tmp_path / "acme" / "hosts").glob("*.json"))) == 2
+    assert len(list((tmp_path / "acme" / "web").glob("*.json"))) == 1
+
+    # Un autre nœud (autre instance, même volume) retrouve la référence
+    other = FingerprintStore(str(tmp_path))
+    data = other.load("acme")
+    assert set(data["hosts"]) == {"10.0.0.1", "10.0.0.2"}
+    assert data["web"]["http://t"]["paths"]["/"]["sha256"] == "a"
+    assert data["updated"]
+
+    other.update("acme", lambda d: d["hosts"].pop("10.0.0.2"))
+    assert set(store.load("acme")["hosts"]) == {"10.0.0.1"}
+    assert len(list((tmp_path / "acme" / "hosts").glob("*.json"))) == 1
+
+def test_store_without_baseline_and_invalid_names(tmp_path):
+    store = FingerprintStore(str(tmp_path))
+    assert store.load("never-seen") == {"hosts": {}, "web": {}, "updated": None}
+    with pytest.raises(ValueError):
+        store.load("../etc")
+
+def test_volatile_tokens_are_stripped_but_other_digits_count(site):
+    url, pages = site
+    pages["/a"] = (200, b'<p>Items: 42</p><input name="csrf_token" value="f00ba4"> 2024-05-01T10:00:00Z', None)
+    before = fingerprints.fetch_fingerprint(url + "/a")
+    pages["/a"] = (200, b'<p>Items: 42</p><input name="csrf_token" value="99aa77"> 2024-06-11T08:30:12Z', None)
+    assert same_content(before, fingerprints.fetch_fingerprint(url + "/a"))
+    pages["/a"] = (200, b'<p>Items: 43</p><input name="csrf_token" value="99aa77"> 2024-06-11T08:30:12Z', None)
+    assert not same_content(before, fingerprints.fetch_fingerprint(url + "/a"))
+
+def test_fetch_does_not_follow_redirects_and_reports_errors(site):
+    url, pages = site
+    pages["/admin"] = (301, b"", "/admin/")
+    assert fingerprints.fetch_fingerprint(url + "/admin")["location"] == "/admin/"
+    assert fingerprints.fetch_fingerprint(url + "/missing")["status"] == 404
+    assert fingerprints.fetch_fingerprint("http://127.0.0.1:1/")["status"] is None
+
+def test_same_content_compares_size_within_tolerance():
+    assert same_content(fp(size=1000), fp(size=1030))
+    assert not same_content(fp(size=1000), fp(size=1200))
+    assert not same_content(fp(), fp(sha256="b"))
+    assert not same_content(fp(), fp(status=302, location="/login"))
+
+def test_diff_paths():
+    before = {"/same": fp(), "/changed": fp(), "/gone": fp(), "/404": fp()}
+    after = {"/same": fp(), "/changed": fp(sha256="b"), "/404": fp(status=404), "/new": fp(),
+             "/dead": {"status": None, "error": "timeout"}}
+    diff = diff_paths(before, after)
+    assert diff["added"] == ["/new"]
+    assert diff["removed"] == ["/404", "/gone"]
+    assert [c["path"] for c in diff["changed"]] == ["/changed"]
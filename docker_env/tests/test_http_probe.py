@@ -0,0 +1,107 @@
+import asyncio
+
+from aiohttp import web
+
+import http_probe
+from http_probe import HttpProber, ProbeJob, extract_title, target_urls
+
+def app():
+    routes = web.RouteTableDef()
+
+    @routes.get("/")
+    async def index(request):
+        return web.Response(body="<html><head><title> Admin &amp;\n Panel </title></head></html>".encode(),
+                            content_type="text/html", headers={"Server": "nginx/1.18.0", "X-Powered-By": "PHP/7.4"})
+
+    @routes.get("/old")
+    async def old(request):
+        raise web.HTTPMovedPermanently("/login")
+
+    @routes.get("/login")
+    async def login(request):
+        return web.Response(text="<title>Login</title>", content_type="text/html")
+
+    @routes.get("/loop")
+    async def loop(request):
+        raise web.HTTPFound("/loop")
+
+    @routes.get("/slow")
+    async def slow(request):
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    @routes.get("/big")
+    async def big(request):
+        return web.Response(body=b"x" * 5000)
+
+    application = web.Application()
+    application.add_routes(routes)
+    return application
+
+def probe(*targets, **kwargs):
+    """Sonde les cibles contre un serveur aiohttp local ; '{base}' et '{hostport}' sont remplacés"""
+    async def main():
+        runner = web.AppRunner(app())
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with HttpProber(**kwargs) as prober:
+                return [await prober.probe(t.format(base=f"http://127.0.0.1:{port}", hostport=f"127.0.0.1:{port}"))
+                        for t in targets]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+def test_target_urls():
+    assert target_urls("10.0.0.5:8443/admin") == ["https://10.0.0.5:8443/admin", "http://10.0.0.5:8443/admin"]
+    assert target_urls("HTTP://x") == ["HTTP://x"]
+
+def test_extract_title():
+    assert extract_title(b"<TITLE lang=en>Caf\xe9</title>", "text/html; charset=latin-1") == "Café"
+    assert extract_title(b"<title>a &lt; b</title>") == "a < b"
+    assert extract_title(b"<html>no title</html>") is None
+
+def test_title_and_fingerprint_headers():
+    [result] = probe("{base}/")
+    assert result["status"] == 200
+    assert result["title"] == "Admin & Panel"
+    assert result["headers"]["server"] == "nginx/1.18.0"
+    assert result["headers"]["x-powered-by"] == "PHP/7.4"
+    assert result["sha256"] and result["redirects"] == []
+
+def test_redirect_chain_is_followed_and_loops_stop():
+    followed, looping = probe("{base}/old", "{base}/loop")
+    assert followed["status"] == 200 and followed["title"] == "Login"
+    assert followed["final_url"].endswith("/login")
+    assert [r["status"] for r in followed["redirects"]] == [301]
+    assert looping["status"] == 302
+    assert len(looping["redirects"]) == 1
+
+def test_host_without_scheme_falls_back_to_http():
+    [result] = probe("{hostport}/login", timeout=2)
+    assert result["url"].startswith("http://")
+    assert result["title"] == "Login"
+
+def test_timeout_and_connection_errors():
+    slow, refused = probe("{base}/slow", "http://127.0.0.1:1/", timeout=0.2)
+    assert slow["error"] == "timeout"
+    assert "error" in refused and "status" not in refused
+
+def test_body_read_is_capped(monkeypatch):
+    monkeypatch.setattr(http_probe, "MAX_BODY", 1000)
+    [result] = probe("{base}/big")
+    assert result["truncated"] is True
+    assert result["content_length"] == 5000
+
+def test_failed_job_reports_failed(monkeypatch):
+    job = ProbeJob(["http://127.0.0.1:1/"])
+
+    async def broken():
+        raise RuntimeError("loop crashed")
+    monkeypatch.setattr(job, "_probe", broken)
+    status = job.run().status()
+    assert status["status"] == "failed"
+    assert status["error"] == "loop crashed"
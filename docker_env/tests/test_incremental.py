@@ -0,0 +1,128 @@
+import pytest
+
+import fingerprints
+import incremental
+import wordlists
+from incremental import IncrementalScan, IncrementalWebScan, _probe_changed, _rescan_dirs
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = fingerprints.FingerprintStore(str(tmp_path / "fingerprints"))
+    monkeypatch.setattr(incremental, "store", store)
+    monkeypatch.setattr(wordlists, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(wordlists, "SHARD_DIR", str(tmp_path / "shards"))
+    return store
+
+def fake_phases(job, results):
+    """Remplace l'exécution des phases : renvoie le résultat prévu et note les commandes lancées"""
+    job.ran = {}
+
+    def run_phase(executor, name, commands, merge):
+        job.ran[name] = commands
+        return results[name](commands) if callable(results[name]) else results[name]
+    job._run_phase = run_phase
+    return job
+
+def host(address, *ports, status="up"):
+    return {"address": address, "status": status, "hostnames": [],
+            "ports": [{"port": p, "protocol": "tcp", "state": "open", "service": s, "product": None, "version": None}
+                      for p, s in ports]}
+
+############### HOSTS ###############
+
+def test_probe_changed():
+    entry = {"ports": {"22/tcp": {}, "80/tcp": {}, "53/udp": {}}, "probe": {"22/tcp": {"service": "ssh"}}}
+    assert not _probe_changed(entry, {"22/tcp": {"service": "ssh"}, "80/tcp": {"service": "http"}})
+    assert _probe_changed(entry, {"22/tcp": {"service": "ssh"}})
+    assert _probe_changed(entry, {"22/tcp": {"service": "ssh"}, "80/tcp": {}, "443/tcp": {}})
+    assert _probe_changed(entry, {"22/tcp": {"service": "telnet"}, "80/tcp": {}})
+
+def test_first_network_rescan_is_a_full_scan(store):
+    job = fake_phases(IncrementalScan("acme", ["10.0.0.0/30"], ports="1-100"),
+                      {"scan": {"hosts": [host("10.0.0.1", (22, "ssh"))]}})
+    delta = job.compute(None)
+    assert "probe" not in job.ran
+    assert delta["baseline"] is False
+    assert [h["address"] for h in delta["new_hosts"]] == ["10.0.0.1"]
+    assert list(store.load("acme")["hosts"]["10.0.0.1"]["ports"]) == ["22/tcp"]
+
+def test_network_rescan_only_rescans_changed_hosts(store):
+    def baseline(data):
+        for address in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            data["hosts"][address] = {"ports": {"22/tcp": {"service": "ssh", "product": None, "version": None}},
+                                      "hostnames": []}
+    store.update("acme", baseline)
+    probe = {"probe": {"hosts": [host("10.0.0.1", (22, "ssh")), host("10.0.0.2", (22, "ssh"), (80, "http"))]},
+             "discovery": {"hosts": [host("10.0.0.1"), host("10.0.0.2"), host("10.0.0.5")]}}
+    job = fake_phases(IncrementalScan("acme", ["10.0.0.0/29"], ports="1-100"),
+                      {"probe": probe, "scan": {"hosts": [host("10.0.0.2", (22, "ssh"), (80, "http")),
+                                                          host("10.0.0.5", (443, "https"))]}})
+    delta = job.compute(None)
+    assert delta["removed_hosts"] == ["10.0.0.3"]
+    assert delta["unchanged_hosts"] == 1
+    assert delta["changed_hosts"]["10.0.0.2"]["opened"] == ["80/tcp"]
+    assert [h["address"] for h in delta["new_hosts"]] == ["10.0.0.5"]
+    assert delta["rescanned"] == ["10.0.0.2", "10.0.0.5"]
+    assert set(store.load("acme")["hosts"]) == {"10.0.0.1", "10.0.0.2", "10.0.0.5"}
+
+############### WEB ###############
+
+def test_rescan_dirs():
+    diff = {"changed": [{"path": "/admin/"}, {"path": "/index.php"}], "removed": ["/backup/old.zip", "/img"],
+            "added": []}
+    assert _rescan_dirs(diff) == ["/", "/admin/", "/backup/"]
+
+@pytest.fixture
+def web_job(tmp_path, store):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("admin\nlogin\n")
+
+    def make(url, found):
+        job = IncrementalWebScan("acme", url, "gobuster dir -q -u {url} -w {wordlist}", str(wordlist), shards=1)
+        # Le bruteforce "trouve" les chemins donnés (déjà fusionnés, relatifs à la racine)
+        return fake_phases(job, {"bruteforce": lambda commands: {"paths": found}})
+    return make
+
+def test_web_rescan_without_baseline_bruteforces_the_root(site, web_job, store):
+    url, pages = site
+    pages["/"] = (200, b"home", None)
+    pages["/admin"] = (301, b"", url + "/admin/")
+    pages["/admin/"] = (200, b"panel", None)
+    job = web_job(url, ["/admin"])
+    delta = job.compute(None)
+    assert delta["baseline"] is False
+    assert delta["rescanned_dirs"] == ["/"]
+    assert len(job.ran["bruteforce"]) == 1
+    # La redirection vers l'index est suivie et l'index est suivi lui aussi
+    assert delta["added"] == ["/admin", "/admin/"]
+    assert set(store.load("acme")["web"][url]["paths"]) == {"/", "/admin", "/admin/"}
+
+def test_web_rescan_reports_changed_unchanged_new_and_removed(site, web_job, store):
+    url, pages = site
+    pages.update({"/": (200, b"home", None), "/admin/": (200, b"panel v1", None),
+                  "/login": (200, b"login", None), "/old": (200, b"old", None)})
+    web_job(url, ["/admin/", "/login", "/old"]).compute(None)
+
+    pages["/admin/"] = (200, b"panel v2", None)
+    del pages["/old"]
+    pages["/admin/users"] = (200, b"users", None)
+    job = web_job(url, ["/admin/users"])
+    delta = job.compute(None)
+    assert delta["baseline"] is True
+    assert [c["path"] for c in delta["changed"]] == ["/admin/"]
+    assert delta["removed"] == ["/old"]
+    assert delta["unchanged"] == 1
+    # Seuls le répertoire modifié et le parent du chemin disparu sont relancés
+    assert delta["rescanned_dirs"] == ["/", "/admin/"]
+    assert "/admin/users" in delta["added"]
+    assert "/old" not in store.load("acme")["web"][url]["paths"]
+
+def test_unchanged_site_skips_the_bruteforce(site, web_job):
+    url, pages = site
+    pages.update({"/": (200, b"home", None), "/login": (200, b"login", None)})
+    web_job(url, ["/login"]).compute(None)
+    job = web_job(url, [])
+    delta = job.compute(None)
+    assert delta["rescanned_dirs"] == []
+    assert "bruteforce" not in job.ran
+    assert delta["unchanged"] == 1 and not delta["added"] and not delta["removed"] and not delta["changed"]
@@ -0,0 +1,85 @@
+import pytest
+
+from scan_fanout import build_commands, make_scan_merger, parse_ports, split_ports, split_targets
+
+def nmap_xml(*hosts, closed=True):
+    body = "".join(hosts)
+    xml = f'<?xml version="1.0"?>\n<nmaprun scanner="nmap">{body}'
+    return xml + "</nmaprun>" if closed else xml
+
+def nmap_host(address, ports=(), hostname=None, state="up"):
+    names = f'<hostnames><hostname name="{hostname}" type="PTR"/></hostnames>' if hostname else "<hostnames/>"
+    port_xml = "".join(
+        f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+        f'<service name="{name}" product="{product}" version="1.0"/></port>'
+        for port, name, product in ports
+    )
+    return (f'<host><status state="{state}"/><address addr="{address}" addrtype="ipv4"/>{names}'
+            f"<ports>{port_xml}</ports></host>")
+
+def shard(index, stdout, status="finished"):
+    return {"index": index, "stdout": stdout, "status": status}
+
+def test_parse_ports():
+    assert parse_ports("22,80,8000-8100") == [(22, 22), (80, 80), (8000, 8100)]
+    assert parse_ports("-") == [(1, 65535)]
+    assert parse_ports(None) == [(1, 1000)]
+    assert parse_ports("-1024") == [(1, 1024)]
+    with pytest.raises(ValueError):
+        parse_ports("0-10")
+    with pytest.raises(ValueError):
+        parse_ports("100-20")
+
+def test_split_ports_covers_every_port_once():
+    groups = split_ports(parse_ports("1-10,20,30-35"), 3)
+    assert groups == ["1-6", "7-10,20,30", "31-35"]
+    assert split_ports([(80, 80)], 4) == ["80"]
+
+def test_split_targets():
+    assert split_targets(["10.0.0.0/24"], 64) == [["10.0.0.0/26"], ["10.0.0.64/26"], ["10.0.0.128/26"],
+                                                  ["10.0.0.192/26"]]
+    assert split_targets(["10.0.0.1", "host.lan", "10.0.1.0/30"], 2) == [["10.0.1.0/31"], ["10.0.1.2/31"],
+                                                                         ["10.0.0.1", "host.lan"]]
+    with pytest.raises(ValueError):
+        split_targets(["10.0.0.1;id"], 16)
+
+def test_build_commands_rejects_managed_options():
+    with pytest.raises(ValueError):
+        build_commands("nmap", "-sV -p 22", ["10.0.0.1"], "80")
+    commands = build_commands("nmap", "-sV", ["10.0.0.1"], "1-100", port_chunks=2)
+    assert commands == ["nmap -sV -p 1-50 -oX - 10.0.0.1", "nmap -sV -p 51-100 -oX - 10.0.0.1"]
+
+def test_nmap_merge_combines_ports_of_the_same_host():
+    merge = make_scan_merger("nmap")
+    result = merge([
+        shard(0, nmap_xml(nmap_host("10.0.0.5", [(22, "ssh", "OpenSSH")], hostname="web.lan"),
+                          nmap_host("10.0.0.6", state="down"))),
+        shard(1, nmap_xml(nmap_host("10.0.0.5", [(443, "https", "nginx"), (80, "http", "nginx")],
+                                    hostname="web.lan"))),
+    ])
+    hosts = {h["address"]: h for h in result["hosts"]}
+    assert [p["port"] for p in hosts["10.0.0.5"]["ports"]] == [22, 80, 443]
+    assert hosts["10.0.0.5"]["hostnames"] == ["web.lan"]
+    assert hosts["10.0.0.5"]["status"] == "up"
+    assert hosts["10.0.0.6"]["status"] == "unknown"
+    assert result["open_ports"] == 3
+    assert result["incomplete_shards"] == []
+
+def test_nmap_merge_keeps_complete_hosts_of_truncated_output():
+    # Shard tué au timeout : le XML s'arrête au milieu du deuxième <host>
+    partial = nmap_xml(nmap_host("10.0.0.7", [(21, "ftp", "vsftpd")]), closed=False)
+    partial += '<host><status state="up"/><address addr="10.0.0.8"'
+    result = make_scan_merger("nmap")([shard(0, partial, status="timeout")])
+    assert [h["address"] for h in result["hosts"]] == ["10.0.0.7"]
+    assert result["incomplete_shards"] == [0]
+
+def test_masscan_merge():
+    stdout = "\n".join([
+        "[",
+        '{"ip": "10.0.0.9", "timestamp": "1", "ports": [{"port": 80, "proto": "tcp", "status": "open"}]},',
+        '{"ip": "10.0.0.9", "timestamp": "2", "ports": [{"port": 22, "proto": "tcp", "status": "open"}]}',
+        "]",
+    ])
+    result = make_scan_merger("masscan")([shard(0, stdout)])
+    assert [p["port"] for p in result["hosts"][0]["ports"]] == [22, 80]
+    assert result["open_ports"] == 2
@@ -0,0 +1,88 @@
+import resource
+import time
+
+import pytest
+
+from secure_command_executor import (VALIDATION_REJECTIONS, CommandCategory, ResourceProfile,
+                                     SecureCommandExecutor)
+
+def rejections(reason):
+    return VALIDATION_REJECTIONS._values.get((reason,), 0)
+
+@pytest.fixture
+def executor(tmp_path):
+    profiles = {CommandCategory.BASIC: ResourceProfile(nice=7, max_open_files=200)}
+    return SecureCommandExecutor(timeout=2, workspace=str(tmp_path), resource_profiles=profiles, cgroup_root=None)
+
+def script(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text(body)
+    return str(path)
+
+def alive(pid):
+    """Vivant = présent dans /proc et pas à l'état zombie"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+@pytest.mark.parametrize("command, reason", [
+    ("", "empty"),
+    ("nmap 'unterminated", "parse_error"),
+    ("rm -rf /", "forbidden"),
+    ("bash -c id", "not_allowed"),
+    ("ls -la; id", "dangerous_pattern"),
+    ("cat /etc/passwd | grep root", "dangerous_pattern"),
+])
+def test_inspection_rejects(executor, command, reason):
+    is_valid, _, category, code = executor._inspect_command(command)
+    assert (is_valid, category, code) == (False, None, reason)
+
+def test_validate_command_has_no_side_effect(executor):
+    before = rejections("forbidden")
+    assert executor._validate_command("rm -rf /")[0] is False
+    assert rejections("forbidden") == before
+
+def test_refusal_is_counted_once(executor):
+    before = rejections("not_allowed")
+    result = executor.execute_command("bash -c id")
+    assert result.success is False and "refusée" in result.stderr
+    assert rejections("not_allowed") == before + 1
+
+def test_validated_command_category(executor):
+    assert executor._validate_command("nmap -sV 10.0.0.1") == (True, "Commande validée", CommandCategory.RECONNAISSANCE)
+
+def test_limits_are_applied_before_exec(executor, tmp_path):
+    path = script(tmp_path, "limits.py", "import os, resource\n"
+                  "print(os.getpriority(os.PRIO_PROCESS, 0), resource.getrlimit(resource.RLIMIT_NOFILE)[0])\n")
+    result = executor.execute_command(f"python3 {path}")
+    assert result.success, result.stderr
+    nice, nofile = result.stdout.split()
+    assert int(nice) >= 7
+    assert int(nofile) == min(200, resource.getrlimit(resource.RLIMIT_NOFILE)[1])
+
+def test_memory_cap_does_not_limit_address_space(tmp_path):
+    # Sans cgroup, la mémoire n'est pas plafonnée par RLIMIT_AS (runtimes Go, hashcat GPU)
+    profiles = {CommandCategory.BASIC: ResourceProfile(memory_bytes=64 * 1024 ** 2)}
+    executor = SecureCommandExecutor(timeout=5, workspace=str(tmp_path), resource_profiles=profiles, cgroup_root=None)
+    path = script(tmp_path, "as.py", "import resource\nprint(resource.getrlimit(resource.RLIMIT_AS)[0])\n")
+    result = executor.execute_command(f"python3 {path}")
+    assert result.success, result.stderr
+    assert int(result.stdout) == resource.getrlimit(resource.RLIMIT_AS)[0]
+
+def test_timeout_kills_the_whole_process_group(executor, tmp_path):
+    pid_file = tmp_path / "grandchild.pid"
+    path = script(tmp_path, "spawn.py", "import subprocess, sys, time\n"
+                  "child = subprocess.Popen(['sleep', '60'])\n"
+                  f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+                  "time.sleep(60)\n")
+    started = time.time()
+    result = executor.execute_command(f"python3 {path}")
+    assert result.success is False and "Timeout" in result.stderr
+    assert time.time() - started < 10
+    grandchild = int(pid_file.read_text())
+    deadline = time.time() + 2
+    while alive(grandchild) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not alive(grandchild)
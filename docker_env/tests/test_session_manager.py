@@ -0,0 +1,70 @@
+import shlex
+
+import pytest
+
+from secure_command_executor import VALIDATION_REJECTIONS, SecureCommandExecutor
+from session_manager import SessionManager, session_refusal
+
+@pytest.mark.parametrize("command", [
+    "ssh -p 22 kali@10.0.0.5",
+    "/usr/bin/ssh kali@10.0.0.5",
+    "nc 10.0.0.5 4444",
+    "smbclient //10.0.0.5/share -N",
+    "python3 exploit.py 10.0.0.5",
+    "python3 exploit.py -i -c x",
+])
+def test_remote_clients_and_scripts_are_accepted(command):
+    assert session_refusal(shlex.split(command)) is None
+
+@pytest.mark.parametrize("command", [
+    "python3",
+    "python3 -i exploit.py",
+    "python3 -c input()",
+    "python3 -m http.server",
+    "python3 -",
+    "python3 -u exploit.py",
+    "python3 -X dev -c pass",
+    "python3 -W ignore -c pass",
+    "python3 -ic pass",
+    "python3 -Im code",
+    "vim notes.txt",
+    "awk -f script.awk",
+    "bash -i",
+])
+def test_local_interpreters_are_refused(command):
+    assert session_refusal(shlex.split(command))
+
+def test_open_refuses_before_spawning(tmp_path):
+    manager = SessionManager(SecureCommandExecutor(workspace=str(tmp_path), cgroup_root=None))
+    before = VALIDATION_REJECTIONS._values.get(("session_not_allowed",), 0)
+    with pytest.raises(ValueError):
+        manager.open("python3")
+    assert manager.sessions == {}
+    assert VALIDATION_REJECTIONS._values.get(("session_not_allowed",), 0) == before + 1
+
+def test_send_expect_round_trip(tmp_path):
+    script = tmp_path / "login.py"
+    script.write_text(
+        "name = input('login: ')\n"
+        "while True:\n"
+        "    line = input(f'{name}> ')\n"
+        "    if line == 'quit':\n"
+        "        break\n"
+        "    print(f'echo {line.upper()}')\n"
+    )
+    manager = SessionManager(SecureCommandExecutor(workspace=str(tmp_path), cgroup_root=None))
+    opened = manager.open(f"python3 {script}", prompt=r"(?:login: |> )$", timeout=10)
+    try:
+        assert opened["matched"] == "prompt" and opened["output"].endswith("login: ")
+        session_id = opened["session_id"]
+        assert manager.send(session_id, "kali", timeout=10)["output"].endswith("kali> ")
+        reply = manager.send(session_id, "hello", timeout=10)
+        assert reply["matched"] == "prompt"
+        assert reply["output"].splitlines()[0] == "echo HELLO"
+        # Motif explicite : on rend la main dès qu'il apparaît, sans attendre l'invite
+        reply = manager.send(session_id, "again", expect=r"echo \w+", timeout=10)
+        assert (reply["matched"], reply["output"].strip()) == ("pattern", "echo AGAIN")
+        assert manager.send(session_id, "quit", timeout=10)["matched"] == "eof"
+    finally:
+        manager.close(opened["session_id"])
+    assert manager.list() == []
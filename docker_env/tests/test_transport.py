@@ -0,0 +1,78 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+import transport
+
+PAYLOAD = {"stdout": "x" * 4000, "ports": {22, 80}, "raw": b"\xff", 443: "https"}
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.json = transport.FastJSONProvider(app)
+
+    @app.route("/big")
+    def big():
+        return jsonify(PAYLOAD)
+
+    @app.route("/small")
+    def small():
+        return jsonify({"status": "ok"})
+
+    @app.after_request
+    def compress(response):
+        transport.compress_response(response)
+        return response
+
+    return app.test_client()
+
+def decoded(response):
+    return json.loads(response.data)
+
+def test_plain_json_without_headers(client):
+    response = client.get("/big")
+    assert response.mimetype == "application/json"
+    assert "Content-Encoding" not in response.headers
+    body = decoded(response)
+    # Les types que json refuse (set, bytes, clés non str) sont convertis
+    assert sorted(body["ports"]) == [22, 80] and body["raw"] == "�" and body["443"] == "https"
+
+def test_zstd_preferred_then_gzip(client):
+    zstandard = pytest.importorskip("zstandard")
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, zstd"})
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    data = zstandard.ZstdDecompressor().decompressobj().decompress(response.data)
+    assert json.loads(data)["stdout"] == PAYLOAD["stdout"]
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data))["stdout"] == PAYLOAD["stdout"]
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "zstd, gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert decoded(response) == {"status": "ok"}
+
+def test_msgpack_when_preferred(client):
+    if transport.msgpack is None:
+        pytest.skip("no msgpack implementation installed")
+    response = client.get("/big", headers={"Accept": "application/msgpack, application/json;q=0.5"})
+    assert response.mimetype == transport.MSGPACK_MIMETYPE
+    body = transport.msgpack.unpackb(response.data)
+    assert body["stdout"] == PAYLOAD["stdout"]
+    assert client.get("/big", headers={"Accept": "application/json"}).mimetype == "application/json"
+
+def test_fallback_without_optional_accelerators(client, monkeypatch):
+    monkeypatch.setattr(transport, "orjson", None)
+    monkeypatch.setattr(transport, "zstandard", None)
+    monkeypatch.setattr(transport, "msgpack", None)
+    response = client.get("/big", headers={"Accept": "application/msgpack", "Accept-Encoding": "zstd, gzip"})
+    # Ni msgpack ni zstd : JSON de la stdlib, compressé en gzip
+    assert response.mimetype == "application/json"
+    assert response.headers["Content-Encoding"] == "gzip"
+    body = json.loads(gzip.decompress(response.data))
+    assert body["stdout"] == PAYLOAD["stdout"] and body["443"] == "https"
+    assert client.get("/big", headers={"Accept-Encoding": "zstd"}).headers.get("Content-Encoding") is None
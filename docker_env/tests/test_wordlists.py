@@ -0,0 +1,116 @@
+import os
+import threading
+
+import pytest
+
+import wordlists
+
+@pytest.fixture
+def wordlist(tmp_path, monkeypatch):
+    monkeypatch.setattr(wordlists, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(wordlists, "SHARD_DIR", str(tmp_path / "shards"))
+    path = tmp_path / "words.txt"
+    words = [f"word{i}" for i in range(1000)]
+    # Doublons et fin de fichier sans saut de ligne
+    path.write_bytes(("\n".join(words + ["word1", "word2\r", "", "word999"])).encode())
+    return str(path), words
+
+def read_shards(paths):
+    return [open(p, "rb").read().decode().splitlines() for p in paths]
+
+def test_index_deduplicates(wordlist):
+    path, words = wordlist
+    meta = wordlists.build_index(path)
+    assert meta["lines"] == 1003
+    assert meta["unique"] == 1000
+    assert meta["duplicates"] == 3
+    assert wordlists.load_index(path)["unique"] == 1000
+
+def test_shards_cover_each_word_once(wordlist):
+    path, words = wordlist
+    paths, _ = wordlists.make_shards(path, 4)
+    assert [os.path.basename(p) for p in paths] == ["shard_000.txt", "shard_001.txt", "shard_002.txt", "shard_003.txt"]
+    shards = read_shards(paths)
+    assert [len(s) for s in shards] == [250, 250, 250, 250]
+    assert sum(shards, []) == words
+
+def test_shards_are_reused_and_keyed_by_count(wordlist):
+    path, _ = wordlist
+    first, _ = wordlists.make_shards(path, 4)
+    again, _ = wordlists.make_shards(path, 4)
+    other, _ = wordlists.make_shards(path, 3)
+    assert first == again
+    assert os.path.dirname(other[0]) != os.path.dirname(first[0])
+
+def test_stale_index_of_a_large_list_is_rebuilt_without_dedup(wordlist, monkeypatch):
+    path, _ = wordlist
+    # Au-delà du seuil, la reconstruction dans l'API ne garde pas l'ensemble des empreintes
+    monkeypatch.setattr(wordlists, "INLINE_DEDUP_MAX_BYTES", 100)
+    meta = wordlists.load_index(path)
+    assert meta["deduplicated"] is False
+    assert meta["unique"] == meta["lines"] == 1003
+    paths, _ = wordlists.make_shards(path, 2)
+    assert sum(len(s) for s in read_shards(paths)) == 1003
+
+def test_eviction_drops_least_recently_used_sets(wordlist, monkeypatch):
+    path, _ = wordlist
+    monkeypatch.setattr(wordlists, "SHARD_GRACE", 0)
+    old, _ = wordlists.make_shards(path, 2)
+    recent, _ = wordlists.make_shards(path, 3)
+    os.utime(os.path.dirname(old[0]), (1, 1))
+    set_size = sum(os.path.getsize(p) for p in recent)
+    # Le cache ne peut contenir qu'un jeu et demi : le plus ancien saute, pas le jeu demandé
+    monkeypatch.setattr(wordlists, "SHARD_CACHE_BYTES", set_size * 3 // 2)
+    current, _ = wordlists.make_shards(path, 4)
+    assert not os.path.exists(os.path.dirname(old[0]))
+    assert all(os.path.exists(p) for p in recent + current)
+
+def test_eviction_spares_sets_in_use(wordlist, monkeypatch):
+    path, _ = wordlist
+    paths, _ = wordlists.make_shards(path, 2)
+    monkeypatch.setattr(wordlists, "SHARD_CACHE_BYTES", 0)
+    assert wordlists.evict_shards() == []
+    assert wordlists.evict_shards(now=os.path.getmtime(os.path.dirname(paths[0])) + wordlists.SHARD_GRACE + 1) == [os.path.dirname(paths[0])]
+
+def test_concurrent_jobs_on_the_same_wordlist(wordlist):
+    path, words = wordlist
+    wordlists.build_index(path)
+    results, errors = [], []
+
+    def job():
+        try:
+            results.append(wordlists.make_shards(path, 5)[0])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=job) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    for paths in results:
+        assert sum(read_shards(paths), []) == words
+    # Aucun fichier temporaire laissé dans le répertoire des shards
+    assert all(name.endswith(".txt") for name in os.listdir(os.path.dirname(results[0][0])))
+
+def test_dedup_digest_is_stable_across_processes(wordlist):
+    # Le résultat ne dépend pas de PYTHONHASHSEED : l'index construit dans un autre processus est identique
+    import subprocess
+    import sys
+    path, _ = wordlist
+    code = ("import sys, wordlists; wordlists.INDEX_DIR = sys.argv[2]; "
+            "print(wordlists.build_index(sys.argv[1])['unique'])")
+    outputs = set()
+    for seed in ("1", "2"):
+        env = {**os.environ, "PYTHONHASHSEED": seed, "PYTHONPATH": os.path.dirname(wordlists.__file__)}
+        outputs.add(subprocess.check_output([sys.executable, "-c", code, path, wordlists.INDEX_DIR], env=env).strip())
+    assert outputs == {b"1000"}
+
+def test_hit_merger_dedups_across_shards():
+    merge = wordlists.make_hit_merger(wordlists.DEFAULT_HIT_PATTERNS["gobuster"])
+    result = merge([
+        {"index": 1, "stdout": "/admin (Status: 301)\nProgress: 50%\n"},
+        {"index": 0, "stdout": "\x1b[2K/login  (Status: 200)\n/admin (Status: 301)\n"},
+    ])
+    assert result == {"hits": ["/login  (Status: 200)", "/admin (Status: 301)"], "hit_count": 2}
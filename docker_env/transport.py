@@ -0,0 +1,117 @@
+import enum
+import gzip
+import json
+import os
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+# Accélérateurs optionnels : à défaut, on retombe sur json (stdlib) et gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ormsgpack as msgpack
+except ImportError:
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+############### TRANSPORT ###############
+#
+# Sérialisation et compression négociées avec le client :
+#  - Accept: application/msgpack      -> corps msgpack au lieu de JSON
+#  - Accept-Encoding: zstd / gzip     -> corps compressé au-delà de MIN_COMPRESS_SIZE
+# Sans en-têtes, les réponses restent en JSON non compressé (curl, anciens clients).
+
+MSGPACK_MIMETYPE = "application/msgpack"
+MIN_COMPRESS_SIZE = int(os.getenv("API_COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("API_GZIP_LEVEL", "5"))
+ZSTD_LEVEL = int(os.getenv("API_ZSTD_LEVEL", "3"))
+
+def _default(o):
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if isinstance(o, bytes):
+        return o.decode("utf-8", "replace")
+    if isinstance(o, enum.Enum):
+        return o.value
+    raise TypeError(f"Object of type {type(o).__name__} is not serializable")
+
+def dumps_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+def _str_keys(obj):
+    """Clés de dict converties en str comme en JSON : les décodeurs msgpack refusent les autres par défaut"""
+    if isinstance(obj, dict):
+        return {(k if isinstance(k, str) else str(k.value if isinstance(k, enum.Enum) else k)): _str_keys(v)
+                for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_str_keys(v) for v in obj]
+    return obj
+
+def dumps_msgpack(obj):
+    if hasattr(msgpack, "OPT_NON_STR_KEYS"):  # ormsgpack
+        try:
+            return msgpack.packb(obj, default=_default)
+        except TypeError:
+            # Clé non str quelque part : second passage avec les clés converties
+            return msgpack.packb(_str_keys(obj), default=_default)
+    return msgpack.packb(_str_keys(obj), default=_default, use_bin_type=True)
+
+def available_encodings():
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+def compress(data, encoding):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return data
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() via orjson, ou msgpack quand le client le préfère"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_json(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        offered = ["application/json", MSGPACK_MIMETYPE] if msgpack is not None else ["application/json"]
+        if request and request.accept_mimetypes.best_match(offered) == MSGPACK_MIMETYPE:
+            return self._app.response_class(dumps_msgpack(obj), mimetype=MSGPACK_MIMETYPE)
+        # dumps_json retombe sur json (stdlib) sans orjson, avec les mêmes conversions (_default)
+        return self._app.response_class(dumps_json(obj), mimetype=self.mimetype)
+
+def compress_response(response):
+    """Compresse le corps selon Accept-Encoding ; renvoie l'encodage appliqué (ou None)"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or "Content-Encoding" in response.headers):
+        return None
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if not encoding:
+        return None
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return None
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return encoding
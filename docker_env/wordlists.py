@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import shlex
+import shutil
+import tempfile
+import time
+from array import array
+
+############### WORDLIST INDEX ###############
+#
+# Les wordlists de l'image sont pré-indexées au build : offsets de début de
+# ligne (uniquement la première occurrence de chaque mot), statistiques de
+# longueur. Un job de bruteforce découpe ensuite la liste en N shards
+# contigus, copiés par tranches du fichier mappé en mémoire. Les outils
+# (gobuster, hydra...) attendent un chemin de fichier : les shards sont donc
+# des fichiers, sur disque (un /dev/shm de conteneur ne fait que 64 Mo),
+# réutilisés tant que la wordlist ne change pas et évincés du plus ancien au
+# plus récent au-delà de SHARD_CACHE_BYTES.
+
+INDEX_DIR = os.getenv("WORDLIST_INDEX_DIR", "/home/pentest/wordlist_index")
+SHARD_DIR = os.getenv("WORDLIST_SHARD_DIR", "/home/pentest/results/wordlist_shards")
+SHARD_CACHE_BYTES = int(os.getenv("WORDLIST_SHARD_CACHE_BYTES", str(4 * 1024 ** 3)))
+SHARD_GRACE = float(os.getenv("WORDLIST_SHARD_GRACE", "3600"))  # Un jeu utilisé depuis moins longtemps n'est pas évincé
+# Au-delà, un index périmé est reconstruit dans l'API sans dédoublonnage : l'ensemble des
+# empreintes coûterait plus d'1 Go de RAM sur rockyou (l'image l'indexe au build, hors API)
+INLINE_DEDUP_MAX_BYTES = int(os.getenv("WORDLIST_INLINE_DEDUP_MAX_BYTES", str(16 * 1024 ** 2)))
+
+def _index_paths(path):
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    base = os.path.join(INDEX_DIR, f"{os.path.basename(path)}.{key}")
+    return base + ".json", base + ".offsets"
+
+def _write_atomic(path, write):
+    """Écrit via un fichier temporaire unique puis os.replace : deux jobs peuvent indexer la même wordlist"""
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    os.replace(tmp, path)
+
+def build_index(path, dedup=True):
+    """Indexe une wordlist : offsets des lignes uniques + statistiques de longueur"""
+    meta_path, offsets_path = _index_paths(path)
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    offsets = array("Q")
+    seen = set()
+    total = duplicates = 0
+    min_len, max_len, sum_len = None, 0, 0
+    histogram = {}
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            mm = None
+        else:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = 0
+        while mm is not None and start < size:
+            end = mm.find(b"\n", start)
+            if end == -1:
+                end = size
+            word = mm[start:end].rstrip(b"\r")
+            if word:
+                total += 1
+                # Empreinte stable (hash() est salé par processus) ; 64 bits : collision négligeable même sur rockyou
+                digest = hashlib.blake2b(word, digest_size=8).digest()
+                if dedup and digest in seen:
+                    duplicates += 1
+                else:
+                    if dedup:
+                        seen.add(digest)
+                    offsets.append(start)
+                    length = len(word)
+                    min_len = length if min_len is None else min(min_len, length)
+                    max_len = max(max_len, length)
+                    sum_len += length
+                    bucket = str(min(length, 32))
+                    histogram[bucket] = histogram.get(bucket, 0) + 1
+            start = end + 1
+        if mm is not None:
+            mm.close()
+
+    _write_atomic(offsets_path, offsets.tofile)
+    unique = len(offsets)
+    meta = {
+        "path": os.path.abspath(path),
+        "size": size,
+        "mtime": os.path.getmtime(path),
+        "lines": total,
+        "unique": unique,
+        "duplicates": duplicates,
+        "deduplicated": dedup,
+        "length": {"min": min_len or 0, "max": max_len, "mean": sum_len / unique if unique else 0,
+                   "histogram": histogram},
+        "offsets": offsets_path,
+    }
+    _write_atomic(meta_path, lambda f: f.write(json.dumps(meta, indent=2).encode()))
+    return meta
+
+def load_index(path):
+    """Charge l'index (le reconstruit si absent ou si la wordlist a changé, sans dédoublonner une grosse liste)"""
+    meta_path, _ = _index_paths(path)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["size"] == os.path.getsize(path) and meta["mtime"] == os.path.getmtime(path):
+            return meta
+    return build_index(path, dedup=os.path.getsize(path) <= INLINE_DEDUP_MAX_BYTES)
+
+def _load_offsets(meta):
+    offsets = array("Q")
+    with open(meta["offsets"], "rb") as f:
+        offsets.frombytes(f.read())
+    return offsets
+
+def _dir_size(path):
+    total = 0
+    try:
+        for entry in os.scandir(path):
+            # Un autre job peut renommer ses fichiers temporaires (ou évincer le jeu) pendant le parcours
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat().st_size
+            except FileNotFoundError:
+                continue
+    except FileNotFoundError:
+        pass
+    return total
+
+def evict_shards(keep=None, now=None):
+    """Supprime les jeux de shards les moins récemment utilisés tant que le cache dépasse SHARD_CACHE_BYTES"""
+    now = now or time.time()
+    try:
+        sets = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(SHARD_DIR) if entry.is_dir()]
+    except FileNotFoundError:
+        return []
+    sizes = {path: _dir_size(path) for _, path in sets}
+    total = sum(sizes.values())
+    evicted = []
+    for mtime, path in sorted(sets):
+        if total <= SHARD_CACHE_BYTES:
+            break
+        # Un job en cours peut encore ouvrir ses shards : on ne touche ni au jeu demandé ni aux jeux récents
+        if path == keep or now - mtime < SHARD_GRACE:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+        evicted.append(path)
+    return evicted
+
+def make_shards(path, count):
+    """Découpe la wordlist en `count` fichiers de taille équivalente (sans doublons si l'index est dédoublonné)"""
+    meta = load_index(path)
+    count = max(1, min(count, meta["unique"] or 1))
+    key = hashlib.sha1(f"{meta['path']}:{meta['mtime']}:{count}".encode()).hexdigest()[:16]
+    shard_dir = os.path.join(SHARD_DIR, key)
+    shard_paths = [os.path.join(shard_dir, f"shard_{i:03d}.txt") for i in range(count)]
+    if all(os.path.exists(p) for p in shard_paths):
+        os.utime(shard_dir)  # Date de dernière utilisation, pour l'éviction
+        return shard_paths, meta
+
+    os.makedirs(shard_dir, exist_ok=True)
+    evict_shards(keep=shard_dir)
+    offsets = _load_offsets(meta)
+    per_shard = -(-len(offsets) // count)
+    with open(path, "rb") as f:
+        if meta["size"] == 0:
+            for p in shard_paths:
+                open(p, "wb").close()
+            return shard_paths, meta
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for i, shard_path in enumerate(shard_paths):
+                chunk = offsets[i * per_shard:(i + 1) * per_shard]
+                # Fichier temporaire unique : deux jobs sur la même wordlist peuvent écrire le même shard en
+                # même temps ; le contenu est identique et os.replace est atomique, le dernier gagne
+                fd, tmp = tempfile.mkstemp(prefix=f"shard_{i:03d}.", suffix=".tmp", dir=shard_dir)
+                try:
+                    with os.fdopen(fd, "wb") as out:
+                        run_start = run_end = None
+                        # Les lignes consécutives sont copiées en une seule tranche du mmap
+                        for offset in chunk:
+                            end = mm.find(b"\n", offset)
+                            end = meta["size"] if end == -1 else end + 1
+                            if run_end == offset:
+                                run_end = end
+                                continue
+                            if run_start is not None:
+                                out.write(mm[run_start:run_end])
+                            run_start, run_end = offset, end
+                        if run_start is not None:
+                            out.write(mm[run_start:run_end])
+                            if not mm[run_end - 1:run_end] == b"\n":
+                                out.write(b"\n")
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+                os.replace(tmp, shard_path)
+        finally:
+            mm.close()
+    return shard_paths, meta
+
+############### HIT MERGING ###############
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+# Lignes de sortie considérées comme des résultats, par outil
+DEFAULT_HIT_PATTERNS = {
+    "gobuster": r"\(Status: \d+\)|^Found: ",
+    "ffuf": r"\[Status: \d+",
+    "dirb": r"^\+ |^==> DIRECTORY",
+    "wfuzz": r"^\d{9}:\s+\d{3}\s",
+    "hydra": r"^\[\d+\]\[[^\]]+\] host:",
+    "medusa": r"ACCOUNT FOUND",
+    "john": r"^\S.*\(\S+\)\s*$",
+}
+
+def _hit_key(line):
+    # gobuster/ffuf affichent une barre de progression : on normalise espaces et codes ANSI
+    return " ".join(ANSI_ESCAPE.sub("", line).split())
+
+def make_hit_merger(pattern):
+    regex = re.compile(pattern) if pattern else None
+
+    def merge(shards):
+        hits, seen = [], set()
+        for shard in sorted(shards, key=lambda s: s["index"]):
+            for line in shard["stdout"].splitlines():
+                line = ANSI_ESCAPE.sub("", line).strip()
+                if not line or (regex and not regex.search(line)):
+                    continue
+                key = _hit_key(line)
+                if key not in seen:
+                    seen.add(key)
+                    hits.append(line)
+        return {"hits": hits, "hit_count": len(hits)}
+
+    return merge
+
+def default_hit_pattern(command):
+    base = shlex.split(command)[0].split("/")[-1]
+    return DEFAULT_HIT_PATTERNS.get(base)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-indexe les wordlists pour le bruteforce parallèle")
+    parser.add_argument("command", choices=["index", "stats"])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--no-dedup", action="store_true")
+    args = parser.parse_args()
+
+    for wordlist in args.paths:
+        meta = build_index(wordlist, dedup=not args.no_dedup) if args.command == "index" else load_index(wordlist)
+        print(f"{wordlist}: {meta['unique']} mots uniques / {meta['lines']} lignes "
+              f"({meta['duplicates']} doublons), longueur {meta['length']['min']}-{meta['length']['max']} "
+              f"(moyenne {meta['length']['mean']:.1f})")
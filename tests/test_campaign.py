@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from utils import campaign as campaign_module
+from utils.campaign import Campaign
+
+class FakeTracer:
+    def __init__(self, run_name=None):
+        self.path = f"traces/{run_name}.jsonl"
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def runs(tmp_path, monkeypatch):
+    """Records (graph, prompt) of every agent run instead of calling the LLM"""
+    calls = []
+    lock = threading.Lock()
+
+    def run_agent(graph, inputs, config, **kwargs):
+        with lock:
+            calls.append((graph, inputs["messages"][1][1]))
+        if "fail" in inputs["messages"][1][1]:
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(campaign_module, "CAMPAIGN_DIR", str(tmp_path))
+    monkeypatch.setattr(campaign_module, "RunTracer", FakeTracer)
+    monkeypatch.setattr(campaign_module, "run_agent_openai", run_agent)
+    return calls
+
+def make_campaign(targets, template="Test {target}", name="c"):
+    return Campaign(name, lambda target: f"graph-{target}", ("system", "sys"), targets, concurrency=2,
+                    prompt_template=template)
+
+def test_template_with_literal_braces(runs):
+    template = 'Target {target}. Try the payload {"user": {"$ne": null}} and {0} too.'
+    make_campaign(["http://a"], template).run()
+    assert runs == [("graph-http://a", 'Target http://a. Try the payload {"user": {"$ne": null}} and {0} too.')]
+
+def test_each_target_gets_its_own_graph(runs):
+    make_campaign(["a", "b", "c"]).run()
+    assert sorted(runs) == [("graph-a", "Test a"), ("graph-b", "Test b"), ("graph-c", "Test c")]
+
+def test_resume_only_reruns_unfinished_targets(runs):
+    first = make_campaign(["ok", "fail"])
+    first.run()
+    assert first.state["targets"]["ok"]["status"] == "done"
+    assert first.state["targets"]["fail"]["status"] == "failed"
+    assert first.state["targets"]["fail"]["error"] == "boom"
+    runs.clear()
+    make_campaign(["ok", "fail"]).run()
+    assert [prompt for _, prompt in runs] == ["Test fail"]
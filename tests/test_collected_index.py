@@ -0,0 +1,67 @@
+import uuid
+
+import pytest
+
+from utils import collected_index
+from utils.collected_index import CollectedIndex, CollectingCallback, chunk_text, search_collected, to_fts_query
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = CollectedIndex(str(tmp_path / "collected.sqlite"))
+    monkeypatch.setattr(collected_index, "_index", index)
+    return index
+
+def test_chunk_text_splits_on_lines_and_long_lines():
+    text = "a" * 6 + "\n" + "b" * 2 + "\n" + "c" * 25 + "\n\n"
+    chunks = chunk_text(text, size=10)
+    assert chunks == ["aaaaaa\nbb\n", "c" * 10, "c" * 10, "ccccc\n\n"]
+    assert "".join(chunks) == text
+    assert chunk_text("  \n\n") == []
+
+def test_to_fts_query_quotes_every_term():
+    assert to_fts_query('admin "panel" OR login*') == '"admin" "panel" "OR" "login"'
+    assert to_fts_query("admin panel", any_term=True) == '"admin" OR "panel"'
+    assert to_fts_query("!!") == ""
+
+def test_add_dedups_by_content_digest(index):
+    first = index.add("web_scraper", "http://a", "Apache Tomcat manager")
+    assert first is not None
+    assert index.add("read_txt", "/tmp/copy.txt", "Apache Tomcat manager") is None
+    assert index.counts() == (1, len("Apache Tomcat manager"))
+
+def test_search_prefers_all_terms_then_falls_back_to_any(index):
+    both = index.add("web_scraper", "http://a", "The admin panel is at /manager")
+    one = index.add("web_scraper", "http://b", "Login form for the admin area")
+    index.add("read_txt", "/notes.txt", "Nothing relevant here")
+    assert [r["doc_id"] for r in index.search("admin manager")] == [both]
+    # No document has both terms: falls back to either
+    assert {r["doc_id"] for r in index.search("manager login")} == {both, one}
+    assert [r["doc_id"] for r in index.search("admin", tool_name="web_scraper")] in ([both, one], [one, both])
+    assert index.search("admin", tool_name="read_pdf") == []
+    assert "[admin]" in index.search("admin")[0]["snippet"]
+
+def test_search_collected_returns_full_document_by_id(index):
+    text = "\n".join(f"line {i} secret-token" for i in range(400))
+    doc_id = index.add("pentest_api_tool", "execute: cat config", text)
+    assert search_collected.invoke({"query": "", "doc_id": doc_id}) == f"[pentest_api_tool] execute: cat config\n{text}"
+    assert search_collected.invoke({"query": "", "doc_id": 999}).startswith("❌")
+    assert f"doc {doc_id}" in search_collected.invoke({"query": "secret token"})
+    assert search_collected.invoke({"query": "absent"}).startswith("No collected material")
+
+def run_tool(callback, name, output, tool_input=None):
+    run_id = uuid.uuid4()
+    callback.on_tool_start({"name": name}, "", run_id=run_id, inputs=tool_input or {"action": "execute",
+                                                                                  "command": "id"})
+    callback.on_tool_end(output, run_id=run_id)
+
+def test_callback_skips_failures_and_counts_duplicates(index):
+    callback = CollectingCallback(index)
+    run_tool(callback, "pentest_api_tool", {"success": True, "stdout": "uid=0(root)"})
+    run_tool(callback, "pentest_api_tool", {"success": True, "stdout": "uid=0(root)"})
+    run_tool(callback, "pentest_api_tool", {"success": False, "stderr": "Commande refusée"})
+    run_tool(callback, "get_job_tool", {"error": "Job not found"})
+    run_tool(callback, "pentest_api_tool", "⚠️ Error communicating with API: refused")
+    run_tool(callback, "search_collected", "not an indexed tool")
+    assert callback.stats == {"indexed": 1, "duplicates": 1}
+    [hit] = index.search("root")
+    assert hit["source"] == "execute: id"
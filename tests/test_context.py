@@ -0,0 +1,90 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from utils.context import ContextCompactor, OutputStore, estimate_tokens, recall_output
+
+def conversation(output_sizes):
+    """One AI tool call + its tool output per entry of `output_sizes`, after a user prompt"""
+    messages = [HumanMessage(content="Pentest http://target")]
+    for i, size in enumerate(output_sizes):
+        messages.append(AIMessage(content="", tool_calls=[{"name": "web_scraper", "args": {"query": str(i)},
+                                                           "id": f"call_{i}"}]))
+        messages.append(ToolMessage(content=f"{i}" * size, tool_call_id=f"call_{i}", name="web_scraper",
+                                    id=f"tool_{i}"))
+    return messages
+
+def compacted(messages):
+    return [i for i, m in enumerate(messages) if isinstance(m, ToolMessage) and "compacted, handle=" in m.content]
+
+def test_older_bulky_outputs_are_compacted_recent_kept():
+    compactor = ContextCompactor(keep_recent=4, min_chars=1000, store=OutputStore())
+    messages = conversation([5000, 500, 5000, 5000, 5000])
+    result = compactor.compact(messages)
+    # The last 4 messages (two turns) stay intact, and so does the small output
+    assert compacted(result) == [2, 6]
+    assert result[-1].content == messages[-1].content
+    assert messages[2].content == "0" * 5000  # the graph state is not modified
+
+def test_recent_outputs_compacted_oldest_first_above_ceiling():
+    compactor = ContextCompactor(max_prompt_tokens=2000, keep_recent=6, min_chars=1000, store=OutputStore())
+    result = compactor.compact(conversation([4000, 4000, 4000]))
+    # Every turn is recent; the ceiling forces compaction of all but the latest output
+    assert compacted(result) == [2, 4]
+    assert estimate_tokens(result) > 1000
+
+def test_compacted_message_keeps_tool_call_identity():
+    compactor = ContextCompactor(keep_recent=0, min_chars=10, excerpt_chars=20, store=OutputStore())
+    original = conversation([100])[2]
+    [message] = compactor.compact([original])
+    assert (message.tool_call_id, message.name, message.id) == ("call_0", "web_scraper", "tool_0")
+    assert message.content.startswith("0" * 20 + "\n[... compacted")
+
+def test_recall_output_returns_full_text():
+    compactor = ContextCompactor(keep_recent=0, min_chars=10)
+    text = "line\n" * 5000
+    [message] = compactor.compact([ToolMessage(content=text, tool_call_id="c")])
+    handle = message.content.split("handle=")[1].split(",")[0]
+    assert recall_output.invoke({"handle": handle, "length": len(text)}) == text
+    assert recall_output.invoke({"handle": handle, "start": 0, "length": 10}).startswith("line\nline\n\n\n[⚠️")
+    assert recall_output.invoke({"handle": "out_unknown"}).startswith("❌")
+
+def test_hook_records_stats():
+    compactor = ContextCompactor(keep_recent=2, min_chars=1000, store=OutputStore())
+    update = compactor({"messages": conversation([8000, 8000])})
+    assert len(compacted(update["llm_input_messages"])) == 1
+    [(before, after)] = compactor.stats
+    assert after < before
+
+def test_store_evicts_least_recently_used_outputs():
+    store = OutputStore(max_chars=25)
+    first, second = store.put("a" * 10), store.put("b" * 10)
+    assert store.put("a" * 10) == first  # storing again only refreshes it
+    assert store.get(first) is not None
+    store.put("c" * 10)
+    assert store.get(second) is None
+    assert store.get(first) == "a" * 10
+    huge = store.put("d" * 100)
+    assert len(store) == 1 and store.get(huge) == "d" * 100
+
+def test_outputs_are_stored_once_across_steps():
+    store = OutputStore()
+    puts = []
+    put = store.put
+    store.put = lambda content: puts.append(len(content)) or put(content)
+    compactor = ContextCompactor(keep_recent=2, min_chars=1000, store=store)
+    messages = conversation([5000, 5000, 5000])
+    first = compactor.compact(messages[:5])
+    second = compactor.compact(messages)
+    # The second step only stores the output that just left the recent window
+    assert puts == [5000, 5000]
+    assert second[2] is first[2]
+
+def test_evicted_output_is_stored_again():
+    store = OutputStore(max_chars=6000)
+    compactor = ContextCompactor(keep_recent=0, min_chars=1000, store=store)
+    message = conversation([5000])[2]
+    [compacted_once] = compactor.compact([message])
+    handle = compacted_once.content.split("handle=")[1].split(",")[0]
+    store.put("x" * 5000)  # pushes the output out
+    assert store.get(handle) is None
+    compactor.compact([message])
+    assert store.get(handle) == message.content
@@ -0,0 +1,187 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from tools.executor_pool import ExecutorPool
+
+class JsonServer:
+    """Executor stand-in answering every request with {"ok": true} and counting them"""
+
+    def __init__(self):
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                server.requests.append((self.command, self.path, self.rfile.read(length)))
+                body = json.dumps({"ok": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class DroppingServer:
+    """Reads the request, then closes the connection without answering (crash mid-request)"""
+
+    def __init__(self):
+        self.received = 0
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.recv(65536)
+            self.received += 1
+            conn.close()
+
+    def close(self):
+        self.sock.close()
+
+def refused_url():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}"
+
+@pytest.fixture
+def live():
+    server = JsonServer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def dropping():
+    server = DroppingServer()
+    yield server
+    server.close()
+
+def make_pool(*urls):
+    # No health checks during the test: routing only reacts to the failures it sees
+    return ExecutorPool(list(urls), health_interval=float("inf"))
+
+def test_post_fails_over_when_the_connection_is_refused(live):
+    pool = make_pool(refused_url(), live.url)
+    node, response = pool.request("POST", "/execute", json={"command": "id"})
+    assert node.index == 1 and response.json() == {"ok": True}
+    assert pool.nodes[0].healthy is False
+    assert len(live.requests) == 1
+
+def test_post_is_not_replayed_once_the_node_received_it(dropping, live):
+    pool = make_pool(dropping.url, live.url)
+    with pytest.raises(requests.ConnectionError):
+        pool.request("POST", "/execute", json={"command": "nmap 10.0.0.1"})
+    assert dropping.received == 1
+    assert live.requests == []
+
+def test_get_fails_over_after_a_dropped_connection(dropping, live):
+    pool = make_pool(dropping.url, live.url)
+    node, _ = pool.request("GET", "/commands/allowed")
+    assert node.index == 1
+    assert [r[:2] for r in live.requests] == [("GET", "/commands/allowed")]
+
+def test_pinned_request_never_fails_over(live):
+    pool = make_pool(refused_url(), live.url)
+    with pytest.raises(requests.ConnectionError):
+        pool.request_pinned("GET", "0:42", "/jobs/{id}")
+    assert live.requests == []
+
+def test_outstanding_counters_are_released(live):
+    pool = make_pool(refused_url(), live.url)
+    pool.request("POST", "/execute", json={"command": "id"})
+    assert [n.outstanding for n in pool.nodes] == [0, 0]
+
+def test_pinned_handles_reach_their_node(live):
+    pool = make_pool(refused_url(), live.url)
+    data = pool.create_pinned("/sessions", {"command": "ssh x"}, "session_id")
+    assert data == {"ok": True}
+    pool.request_pinned("GET", "1:abc", "/jobs/{id}")
+    assert live.requests[-1][:2] == ("GET", "/jobs/abc")
+
+def test_resolve_handle():
+    pool = make_pool("http://a", "http://b")
+    assert pool.resolve_handle(" 1:1234 ") == (pool.nodes[1], "1234")
+    assert pool.resolve_handle("0:ab:cd") == (pool.nodes[0], "ab:cd")
+    with pytest.raises(ValueError):
+        pool.resolve_handle("1234")
+    single = make_pool("http://a")
+    assert single.resolve_handle("1234") == (single.nodes[0], "1234")
+
+class SlowServer(JsonServer):
+    """Answers after 'delay' seconds, like a synchronous /execute or a long-poll"""
+
+    def __init__(self, delay):
+        super().__init__()
+        handler = self.httpd.RequestHandlerClass
+        reply = handler._reply
+
+        def slow_reply(request):
+            time.sleep(delay)
+            reply(request)
+
+        handler.do_GET = handler.do_POST = slow_reply
+
+@pytest.fixture
+def slow():
+    server = SlowServer(delay=0.5)
+    yield server
+    server.close()
+
+def test_requests_time_out_on_a_hung_node(slow):
+    pool = ExecutorPool([slow.url], health_interval=float("inf"), read_timeout=0.1)
+    with pytest.raises(requests.Timeout):
+        pool.request("POST", "/execute", json={"command": "id"})
+    assert pool.nodes[0].outstanding == 0
+
+def test_long_polls_get_the_server_wait_on_top(slow):
+    pool = ExecutorPool([slow.url], health_interval=float("inf"), read_timeout=0.1)
+    assert pool.wait_timeout(30) == (pool.connect_timeout, 45.0)
+    response = pool.get_background("0:42", "/wait", params={"timeout": 1})
+    assert response.json() == {"ok": True}
+    assert slow.requests[-1][1].startswith("/background/42/wait?timeout=1")
+
+def test_stale_nodes_are_checked_once_by_concurrent_callers(live):
+    pool = ExecutorPool([live.url, live.url], health_interval=60)
+    checks = []
+
+    def check_health(node):
+        checks.append(node.index)
+        time.sleep(0.2)
+        node.last_check = time.time()
+        return True
+
+    pool.check_health = check_health
+    threads = [threading.Thread(target=pool.request, args=("GET", "/health")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(checks) == [0, 1]
+    assert not any(n.checking for n in pool.nodes)
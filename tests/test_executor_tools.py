@@ -0,0 +1,49 @@
+import pytest
+
+from tools import executor_jobs, executor_sessions
+from tools.registry import TOOL_REGISTRY, import_tool
+
+class RecordingPool:
+    """Returns the pool call itself instead of reaching an executor"""
+
+    def __getattr__(self, method):
+        return lambda *args, **kwargs: (method, args, kwargs)
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    for module in (executor_jobs, executor_sessions):
+        monkeypatch.setattr(module, "get_pool", RecordingPool)
+        monkeypatch.setattr(module, "decode_response", lambda response: response)
+
+def test_job_and_session_tools_are_registered():
+    for name in ("bruteforce_tool", "scan_tool", "rescan_tool", "crack_tool", "dns_tool", "http_probe_tool",
+                 "get_job_tool", "session_tool"):
+        assert import_tool(TOOL_REGISTRY[name]).name == name
+
+def test_crack_tool():
+    assert executor_jobs.crack_tool.invoke({"hashes": "/tmp/hashes.txt", "wordlist": "/w", "tool": "hydra"}) == \
+        ("start_job", ("/jobs/crack", {"tool": "john", "wordlist": "/w", "options": "", "hash_file": "/tmp/hashes.txt"}), {})
+    assert executor_jobs.crack_tool.invoke({"action": "resume", "job_id": "1:ab"}) == \
+        ("request_pinned", ("POST", "1:ab", "/jobs/crack/{id}/resume"), {})
+    assert executor_jobs.crack_tool.invoke({"action": "stop"}).startswith("❌")
+
+def test_rescan_tool_routes_network_and_web():
+    assert executor_jobs.rescan_tool.invoke({"engagement": "e", "targets": "10.0.0.0/24"})[1][0] == "/jobs/rescan"
+    web = executor_jobs.rescan_tool.invoke({"engagement": "e", "url": "http://t", "wordlist": "/w",
+                                            "command": "gobuster dir -u {url} -w {wordlist}"})
+    assert web[1][0] == "/jobs/rescan/web"
+    assert executor_jobs.rescan_tool.invoke({"engagement": "e", "url": "http://t"}).startswith("❌")
+
+def test_dns_and_probe_wait_only_for_explicit_lists():
+    assert executor_jobs.dns_tool.invoke({"targets": "a.example"})[1][1]["wait"] is True
+    assert "wait" not in executor_jobs.dns_tool.invoke({"domain": "example", "wordlist": "/w"})[1][1]
+    assert executor_jobs.http_probe_tool.invoke({"targets": "/tmp/urls.txt"})[1][1] == {"url_file": "/tmp/urls.txt"}
+    assert executor_jobs.http_probe_tool.invoke({"targets": "a, b"})[1][1] == {"urls": "a, b", "wait": True}
+
+def test_session_tool():
+    assert executor_sessions.session_tool.invoke({"action": "open", "command": "ssh x"}) == \
+        ("create_pinned", ("/sessions", {"command": "ssh x", "timeout": 30}, "session_id"),
+         {"timeout": ("wait_timeout", (30,), {})})
+    sent = executor_sessions.session_tool.invoke({"action": "send", "session_id": "0:s", "text": "", "expect": "\\$"})
+    assert sent[2] == {"json": {"input": "", "timeout": 30, "expect": "\\$"}, "timeout": ("wait_timeout", (30,), {})}
+    assert executor_sessions.session_tool.invoke({"action": "exec"}).startswith("❌")
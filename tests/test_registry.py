@@ -0,0 +1,117 @@
+import importlib
+import json
+import sys
+import textwrap
+
+import dotenv
+import pytest
+
+from tools import registry
+from tools.registry import LazyTool, _local_imports, _source_hash, load_tools
+
+@pytest.fixture
+def source_tree(tmp_path, monkeypatch):
+    """tools/ and utils/ packages under a temporary root, for hashing without importing"""
+    monkeypatch.setattr(registry, "SOURCE_ROOT", str(tmp_path))
+
+    def write(module, body):
+        path = tmp_path.joinpath(*module.split(".")).with_suffix(".py")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(body))
+        return path
+    return write
+
+def test_local_imports_resolve_relative_and_submodule_imports(source_tree):
+    path = source_tree("tools.scanner", """
+        import os
+        import utils.helpers
+        from . import pool
+        from .pool import get_pool
+        from utils import tool_cache
+
+        def later():
+            from tools.parsing import parse  # deferred imports count too
+    """)
+    imports = set(_local_imports(str(path), "tools.scanner"))
+    assert {"utils.helpers", "tools.pool", "tools.pool.get_pool", "utils.tool_cache", "tools.parsing"} <= imports
+    assert "os" not in imports
+
+def test_hash_follows_transitive_local_imports(source_tree):
+    source_tree("tools.scanner", "from tools.pool import get_pool\n")
+    source_tree("tools.pool", "import utils.helpers\n")
+    helpers = source_tree("utils.helpers", "TIMEOUT = 10\n")
+    unrelated = source_tree("utils.other", "X = 1\n")
+    before = _source_hash("tools.scanner:scan")
+
+    unrelated.write_text("X = 2\n")
+    assert _source_hash("tools.scanner:scan") == before
+    helpers.write_text("TIMEOUT = 30\n")
+    assert _source_hash("tools.scanner:scan") != before
+    assert _source_hash("tools.scanner:other") != _source_hash("tools.scanner:scan")
+
+def test_import_cycles_terminate(source_tree):
+    source_tree("tools.a", "import tools.b\n")
+    source_tree("tools.b", "import tools.a\n")
+    assert _source_hash("tools.a:x")
+
+ECHO_TOOL = '''
+from langchain_core.tools import tool
+
+@tool
+def echo_tool(text: str) -> str:
+    """{description}
+
+    Args:
+        text: Text to echo
+    """
+    return "echo " + text
+'''
+
+@pytest.fixture
+def echo_module(tmp_path, monkeypatch):
+    """A tool module importable as 'echo_tools', registered as 'echo_tool'"""
+    monkeypatch.setattr(registry, "SOURCE_ROOT", str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(registry.TOOL_REGISTRY, "echo_tool", "echo_tools:echo_tool")
+    monkeypatch.delitem(sys.modules, "echo_tools", raising=False)
+    path = tmp_path / "echo_tools.py"
+
+    def write(description):
+        path.write_text(ECHO_TOOL.format(description=description))
+        sys.modules.pop("echo_tools", None)
+    write("Echoes its input.")
+    return write
+
+def test_manifest_binds_tools_without_importing_them(tmp_path, echo_module):
+    manifest = str(tmp_path / "manifest.json")
+    [first] = load_tools(["echo_tool"], manifest_path=manifest)
+    # Missing entry: the tool is imported once to describe it
+    assert first.loaded
+    entry = json.load(open(manifest))["echo_tool"]
+    assert entry["description"].startswith("Echoes its input.")
+    assert entry["parameters"]["properties"]["text"]["type"] == "string"
+
+    sys.modules.pop("echo_tools")
+    [lazy] = load_tools(["echo_tool"], manifest_path=manifest)
+    assert isinstance(lazy, LazyTool) and not lazy.loaded
+    assert "echo_tools" not in sys.modules
+    assert lazy.description == first.description
+    assert lazy.invoke({"text": "hi"}) == "echo hi"
+    assert lazy.loaded
+
+def test_changed_source_refreshes_the_manifest(tmp_path, echo_module):
+    manifest = str(tmp_path / "manifest.json")
+    load_tools(["echo_tool"], manifest_path=manifest)
+    echo_module("Repeats its input.")
+    [tool] = load_tools(["echo_tool"], manifest_path=manifest)
+    assert tool.loaded
+    assert tool.description.startswith("Repeats its input.")
+    assert json.load(open(manifest))["echo_tool"]["description"].startswith("Repeats")
+
+def test_web_search_loads_dotenv_on_import(monkeypatch):
+    calls = []
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda *args, **kwargs: calls.append(1))
+    monkeypatch.delitem(sys.modules, "tools.web_search", raising=False)
+    importlib.import_module("tools.web_search")
+    # The module works without app.py having loaded the .env first
+    assert calls == [1]
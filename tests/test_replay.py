@@ -0,0 +1,88 @@
+import pytest
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from utils.replay import Cassette, RecordingLLMCache, ReplayMiss, ToolRecorder
+
+LLM_STRING = '{"model": "gpt-4.1", "temperature": 0}'
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = Cassette(str(tmp_path / "cassette.sqlite"))
+    yield cassette
+    cassette.close()
+
+def prompt(*messages):
+    return dumps(list(messages))
+
+def test_key_ignores_volatile_message_fields():
+    live = AIMessage(content="Running nmap", id="run-1234",
+                     usage_metadata={"input_tokens": 10, "output_tokens": 3, "total_tokens": 13},
+                     response_metadata={"model_name": "gpt-4.1-2025-04-14"})
+    cached = AIMessage(content="Running nmap", id="run-9999",
+                       usage_metadata={"input_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+    question = HumanMessage(content="Scan 10.0.0.1")
+    assert RecordingLLMCache.key(prompt(question, live), LLM_STRING) == \
+        RecordingLLMCache.key(prompt(question, cached), LLM_STRING)
+
+def test_key_depends_on_content_and_llm_string():
+    base = prompt(HumanMessage(content="Scan 10.0.0.1"))
+    assert RecordingLLMCache.key(base, LLM_STRING) != RecordingLLMCache.key(
+        prompt(HumanMessage(content="Scan 10.0.0.2")), LLM_STRING)
+    assert RecordingLLMCache.key(base, LLM_STRING) != RecordingLLMCache.key(base, LLM_STRING.replace("0}", "1}"))
+
+def test_key_of_plain_string_prompt():
+    assert RecordingLLMCache.normalize_prompt("not json") == "not json"
+
+def test_llm_record_then_replay(cassette):
+    question = prompt(HumanMessage(content="hello"))
+    generation = ChatGeneration(message=AIMessage(content="hi", id="run-1"))
+    recorder = RecordingLLMCache(cassette, "record")
+    assert recorder.lookup(question, LLM_STRING) is None
+    recorder.update(question, LLM_STRING, [generation])
+
+    replay = RecordingLLMCache(cassette, "replay")
+    [replayed] = replay.lookup(question, LLM_STRING)
+    assert replayed.message.content == "hi"
+    with pytest.raises(ReplayMiss):
+        replay.lookup(prompt(HumanMessage(content="unknown")), LLM_STRING)
+
+def test_tool_outputs_replay_in_call_order(cassette):
+    outputs = iter(["running", "running", "finished"])
+    recorder = ToolRecorder(cassette, "record")
+    args = {"action": "get_process", "pid": "0:12"}
+    recorded = [recorder.call("pentest_api_tool", args, lambda: next(outputs)) for _ in range(3)]
+
+    replay = ToolRecorder(cassette, "replay")
+    never = lambda: pytest.fail("replay must not call the tool")
+    # Arguments are canonicalized like the tool cache: whitespace and None values do not matter
+    replayed = [replay.call("pentest_api_tool", {**args, "pid": " 0:12", "expect": None}, never) for _ in range(3)]
+    assert replayed == recorded == ["running", "running", "finished"]
+    with pytest.raises(ReplayMiss):
+        replay.call("pentest_api_tool", args, never)
+
+def test_record_mode_always_runs_the_tool_and_overwrites(cassette):
+    args = {"action": "execute", "command": "id"}
+    ToolRecorder(cassette, "record").call("pentest_api_tool", args, lambda: "uid=1000(old)")
+    calls = []
+    rerecord = ToolRecorder(cassette, "record")
+    output = rerecord.call("pentest_api_tool", args, lambda: calls.append(1) or "uid=0(root)")
+    assert output == "uid=0(root)" and calls == [1]
+    assert rerecord.stats == {"replayed": 0, "recorded": 1}
+    assert ToolRecorder(cassette, "replay").call("pentest_api_tool", args, lambda: None) == "uid=0(root)"
+
+def test_occurrences_are_counted_per_scope(cassette):
+    args = {"action": "get_process", "pid": "0:12"}
+    recorder = ToolRecorder(cassette, "record")
+    # Two campaign targets poll the same process, interleaved
+    for output_a, output_b in (("a1", "b1"), ("a2", "b2")):
+        recorder.call("pentest_api_tool", args, lambda: output_a, scope="10.0.0.1")
+        recorder.call("pentest_api_tool", args, lambda: output_b, scope="10.0.0.2")
+
+    replay = ToolRecorder(cassette, "replay")
+    never = lambda: pytest.fail("replay must not call the tool")
+    assert [replay.call("pentest_api_tool", args, never, scope="10.0.0.2") for _ in range(2)] == ["b1", "b2"]
+    assert [replay.call("pentest_api_tool", args, never, scope="10.0.0.1") for _ in range(2)] == ["a1", "a2"]
+    with pytest.raises(ReplayMiss):
+        replay.call("pentest_api_tool", args, never)
@@ -0,0 +1,49 @@
+import json
+
+from utils import startup_profile
+from utils.startup_profile import compare_to_baseline, parse_importtime, profile
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2500 |       2500 |     langchain_core.tools
+import time:       800 |       3300 |   tools.registry
+import time:       300 |       3600 | app
+some unrelated stderr line
+"""
+
+def report(median, heavy=("app", "tools.registry")):
+    return {"module": "app", "runs": 3, "startup_ms": {"median": median, "min": median, "max": median},
+            "module_count": 3, "top_cumulative": [{"module": m, "cumulative_ms": 1.0, "self_ms": 1.0} for m in heavy],
+            "top_self": [], "first_party": []}
+
+def test_parse_importtime():
+    modules = parse_importtime(IMPORTTIME)
+    assert [m["module"] for m in modules] == ["_io", "langchain_core.tools", "tools.registry", "app"]
+    assert modules[1] == {"module": "langchain_core.tools", "self_ms": 2.5, "cumulative_ms": 2.5, "depth": 2}
+    assert modules[3]["depth"] == 0
+
+def test_compare_to_baseline():
+    baseline = report(500)
+    assert compare_to_baseline(report(550), baseline, tolerance=0.2) == []
+    regressions = compare_to_baseline(report(700, heavy=("app", "openai")), baseline, tolerance=0.2)
+    assert regressions == ["startup 700 ms > baseline 500 ms", "new heavy imports: openai"]
+    assert compare_to_baseline(report(550), baseline, tolerance=0.2, max_ms=520) == ["startup 550 ms > budget 520 ms"]
+
+def test_profile_runs_fresh_interpreters():
+    result = profile("tools.executor_pool", runs=2, top=5)
+    assert result["runs"] == 2
+    assert result["startup_ms"]["min"] <= result["startup_ms"]["median"] <= result["startup_ms"]["max"]
+    assert "tools.executor_pool" in [m["module"] for m in result["first_party"]]
+    assert len(result["top_cumulative"]) == 5
+
+def test_main_saves_baseline_and_fails_on_regression(tmp_path, monkeypatch, capsys):
+    baseline = tmp_path / "baseline.json"
+    monkeypatch.setattr(startup_profile, "profile", lambda module, runs, top: report(500))
+    assert startup_profile.main(["--save-baseline", str(baseline)]) == 0
+    assert json.loads(baseline.read_text())["startup_ms"]["median"] == 500
+
+    monkeypatch.setattr(startup_profile, "profile", lambda module, runs, top: report(800))
+    assert startup_profile.main(["--baseline", str(baseline)]) == 1
+    assert "startup 800 ms > baseline 500 ms" in capsys.readouterr().out
+    assert startup_profile.main(["--baseline", str(baseline), "--tolerance", "1"]) == 0
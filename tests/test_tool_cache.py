@@ -0,0 +1,84 @@
+import pytest
+from langchain_core.tools import tool
+
+from utils.tool_cache import NEVER_CACHE, CachePolicy, ToolCallCache, canonical_args, is_error_result, memoize_tools
+
+def test_canonical_args_strips_and_drops_none():
+    assert canonical_args("  example.com \n") == {"input": "example.com"}
+    assert canonical_args({"query": " admin ", "limit": None, "page": 2}) == {"query": "admin", "page": 2}
+
+def test_key_ignores_argument_order_and_whitespace():
+    a = ToolCallCache.key("t", canonical_args({"a": "x ", "b": 1}))
+    b = ToolCallCache.key("t", canonical_args({"b": 1, "a": "x", "c": None}))
+    assert a == b
+    assert a != ToolCallCache.key("other", canonical_args({"a": "x", "b": 1}))
+    assert a != ToolCallCache.key("t", canonical_args({"a": "y", "b": 1}))
+
+@pytest.mark.parametrize("result, expected", [
+    ("❌ You must provide a command", True),
+    ("  ⚠️ Error communicating with API: refused", True),
+    ("Error: 404", True),
+    ("PORT STATE SERVICE", False),
+    ({"success": False, "stdout": "", "stderr": "Commande refusée"}, True),
+    ({"error": "Job inconnu"}, True),
+    ({"success": True, "stdout": "root"}, False),
+    (["a", "b"], False),
+])
+def test_is_error_result(result, expected):
+    assert is_error_result(result) is expected
+
+@pytest.mark.parametrize("args, cacheable", [
+    ({"action": "allowed"}, True),
+    ({"action": "execute", "command": "whois example.com"}, True),
+    ({"action": "execute", "command": "/usr/bin/dig example.com"}, True),
+    ({"action": "execute", "command": "nmap -sV 10.0.0.1"}, False),
+    ({"action": "execute", "command": "cat /tmp/out.txt"}, False),
+    ({"action": "execute_background", "command": "whois example.com"}, False),
+    ({"action": "wait", "pid": "0:12"}, False),
+])
+def test_pentest_api_policy(args, cacheable):
+    assert ToolCallCache().policy("pentest_api_tool", args).cacheable is cacheable
+
+def test_unknown_and_job_tools_are_never_cached():
+    cache = ToolCallCache()
+    assert cache.policy("some_new_tool", {}) is NEVER_CACHE
+    for name in ("get_job_tool", "session_tool", "dns_tool", "scan_tool"):
+        assert cache.policy(name, {}) is NEVER_CACHE
+
+def test_call_memoizes_successes_and_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.tool_cache.time.time", lambda: now[0])
+    cache = ToolCallCache()
+    calls = []
+    compute = lambda: calls.append(1) or {"success": True, "stdout": "registrar"}
+    args = {"action": "execute", "command": "whois example.com"}
+    cache.call("pentest_api_tool", args, compute)
+    cache.call("pentest_api_tool", {**args, "command": " whois example.com "}, compute)
+    assert len(calls) == 1
+    now[0] += 121
+    cache.call("pentest_api_tool", args, compute)
+    assert len(calls) == 2
+    assert cache.stats["pentest_api_tool"] == {"hits": 1, "misses": 2, "uncached": 0}
+
+def test_failed_results_are_not_memoized():
+    cache = ToolCallCache()
+    results = iter([{"success": False, "stderr": "timeout"}, "⚠️ Error communicating with API: x",
+                    {"success": True, "stdout": "ok"}, "never computed"])
+    args = {"action": "execute", "command": "dig example.com"}
+    outputs = [cache.call("pentest_api_tool", args, lambda: next(results)) for _ in range(4)]
+    assert outputs[2:] == [{"success": True, "stdout": "ok"}, {"success": True, "stdout": "ok"}]
+
+def test_memoized_tool_wraps_invocations():
+    calls = []
+
+    @tool
+    def lookup(query: str) -> str:
+        """Looks something up"""
+        calls.append(query)
+        return f"result for {query}"
+
+    cache = ToolCallCache({"lookup": CachePolicy(ttl=60)})
+    [wrapped] = memoize_tools([lookup], cache)
+    assert wrapped.name == "lookup"
+    assert wrapped.invoke({"query": "x"}) == wrapped.invoke({"query": "x "}) == "result for x"
+    assert calls == ["x"]
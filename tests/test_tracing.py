@@ -0,0 +1,114 @@
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation, LLMResult
+
+from utils import tracing
+from utils.tracing import RunTracer, critical_path, latest_trace, load_spans, summarize
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tracing.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def tracer(tmp_path, clock):
+    return RunTracer(str(tmp_path), run_name="run_test")
+
+def chat_result(input_tokens, output_tokens):
+    message = AIMessage(content="ok", usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                                      "total_tokens": input_tokens + output_tokens})
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+def span(kind, name, start, end):
+    return {"kind": kind, "name": name, "start": start, "end": end, "duration_s": end - start}
+
+def test_llm_and_tool_spans_pair_by_run_id(tracer, clock):
+    llm, tool_a, tool_b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    tracer.on_chat_model_start({}, [["system", "user"]], run_id=llm, invocation_params={"model": "gpt-4.1"})
+    clock.now += 2
+    tracer.on_llm_end(chat_result(120, 30), run_id=llm)
+    # Two tool calls of the same step, ending in the reverse order
+    tracer.on_tool_start({"name": "web_scraper"}, "http://a", run_id=tool_a)
+    tracer.on_tool_start({"name": "pentest_api_tool"}, "{'action': 'health'}", run_id=tool_b)
+    clock.now += 1
+    tracer.on_tool_end("short", run_id=tool_b)
+    clock.now += 4
+    tracer.on_tool_error(TimeoutError("read timed out"), run_id=tool_a)
+    tracer.on_tool_end("never started", run_id=uuid.uuid4())
+    tracer.close()
+
+    spans = load_spans(tracer.path)
+    assert [(s["kind"], s["name"]) for s in spans] == [("llm", "gpt-4.1"), ("tool", "pentest_api_tool"),
+                                                       ("tool", "web_scraper"), ("run", "run_test")]
+    llm_span, health, scrape, run = spans
+    assert llm_span["duration_s"] == 2 and llm_span["input_messages"] == 2
+    assert (llm_span["input_tokens"], llm_span["output_tokens"], llm_span["total_tokens"]) == (120, 30, 150)
+    assert health["duration_s"] == 1 and health["output_chars"] == 5
+    assert scrape["duration_s"] == 5 and scrape["error"] == "read timed out"
+    assert len(scrape["args_hash"]) == 16 and scrape["args_hash"] != health["args_hash"]
+    assert run["duration_s"] == 7
+    assert {s["run"] for s in spans} == {"run_test"}
+    assert len({s["span_id"] for s in spans}) == 4
+
+def test_completion_llm_falls_back_to_token_usage(tracer, clock):
+    run_id = uuid.uuid4()
+    tracer.on_llm_start({"name": "OpenAI"}, ["prompt"], run_id=run_id)
+    clock.now += 1
+    tracer.on_llm_end(LLMResult(generations=[[Generation(text="ok")]],
+                                llm_output={"token_usage": {"prompt_tokens": 7, "completion_tokens": 3,
+                                                            "total_tokens": 10}}), run_id=run_id)
+    [llm] = load_spans(tracer.path)
+    assert llm["name"] == "OpenAI"
+    assert (llm["input_tokens"], llm["output_tokens"]) == (7, 3)
+
+def test_retry_spans_cover_the_backoff(tracer):
+    tracer.record_retry(2, 4.0, RuntimeError("429 rate limited"))
+    [retry] = load_spans(tracer.path)
+    assert (retry["kind"], retry["name"], retry["attempt"]) == ("retry", "RuntimeError", 2)
+    assert retry["end"] - retry["start"] == retry["duration_s"] == 4.0
+
+def test_critical_path_keeps_the_longest_of_overlapping_spans():
+    spans = [
+        span("llm", "gpt", 0, 2),
+        span("tool", "fast", 2, 3), span("tool", "slow", 2, 7), span("tool", "mid", 2.5, 5),
+        span("retry", "RateLimit", 7, 9),
+        span("llm", "gpt", 9, 10),
+        span("run", "r", 0, 11),
+    ]
+    assert [s["name"] for s in critical_path(spans)] == ["gpt", "slow", "RateLimit", "gpt"]
+
+def test_summary_reports_wall_time_critical_path_and_sinks(tmp_path, clock, capsys):
+    tracer = RunTracer(str(tmp_path), run_name="run_summary")
+    for start, end in ((1000, 1002), (1008, 1009)):
+        run_id = uuid.uuid4()
+        clock.now = start
+        tracer.on_chat_model_start({}, [["m"]], run_id=run_id, invocation_params={"model": "gpt"})
+        clock.now = end
+        tracer.on_llm_end(chat_result(100, 10), run_id=run_id)
+    for name, start, end in (("nmap", 1002, 1008), ("whois", 1002, 1003)):
+        run_id = uuid.uuid4()
+        clock.now = start
+        tracer.on_tool_start({"name": name}, name, run_id=run_id)
+        clock.now = end
+        tracer.on_tool_end("x" * 10, run_id=run_id)
+    clock.now = 1010
+    tracer.close()
+
+    summarize(tracer.path, top=3)
+    out = capsys.readouterr().out
+    assert "wall time        : 10.0s" in out
+    assert "critical path    : 9.0s over 3 spans (untracked 1.0s)" in out
+    assert "LLM calls        : 2 (200 prompt / 20 completion tokens)" in out
+    sinks = out.split("Top 3 time sinks")[1].splitlines()[1:4]
+    assert [line.split()[1] for line in sinks] == ["nmap", "gpt", "whois"]
+    assert latest_trace(str(tmp_path)) == tracer.path
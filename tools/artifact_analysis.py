@@ -0,0 +1,318 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.tools import tool
+
+# Files saved by download_file_tool
+ARTIFACT_DIR = "retrieve_files/"
+# Analysis results keyed by the sha256 of the content, plus a path -> (size, mtime, sha256) index
+CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.join(".cache", "artifacts"))
+MIN_STRING_LENGTH = 6
+MAX_STORED_STRINGS = 20000
+MAX_STRING_LENGTH = 512
+# Characters kept on each side of a secret in its context
+CONTEXT_CHARS = 100
+MAX_FINDINGS = 500
+MAX_WORKERS = int(os.getenv("ARTIFACT_WORKERS", str(min(8, os.cpu_count() or 2))))
+
+# Leading bytes -> file type
+MAGIC_TYPES = [
+    (b"\x7fELF", "elf"),
+    (b"MZ", "pe"),
+    (b"%PDF-", "pdf"),
+    (b"PK\x03\x04", "zip"),
+    (b"PK\x05\x06", "zip"),
+    (b"\x1f\x8b\x08", "gzip"),
+    (b"BZh", "bzip2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"Rar!\x1a\x07", "rar"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF8", "gif"),
+    (b"SQLite format 3\x00", "sqlite"),
+    (b"\xca\xfe\xba\xbe", "java-class"),
+    (b"\xcf\xfa\xed\xfe", "macho"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole2"),
+    (b"-----BEGIN ", "pem"),
+]
+
+# Archives and binaries looked for anywhere in the file (binwalk-style): the literal prefix
+# is located with mmap.find (memmem), the rest of the header is checked at each hit.
+# type -> (prefix, full header, offset of the prefix from the start of the object)
+EMBEDDED_SIGNATURES = {
+    "zip": (b"PK\x03\x04", re.compile(rb"PK\x03\x04[\x0a-\x3f]\x00"), 0),
+    "gzip": (b"\x1f\x8b\x08", re.compile(rb"\x1f\x8b\x08[\x00-\x1f]"), 0),
+    "bzip2": (b"BZh", re.compile(rb"BZh[1-9]1AY&SY"), 0),
+    "xz": (b"\xfd7zXZ\x00", None, 0),
+    "7z": (b"7z\xbc\xaf\x27\x1c", None, 0),
+    "rar": (b"Rar!\x1a\x07", None, 0),
+    "tar": (b"ustar", re.compile(rb"ustar(?:\x00|  \x00)"), 257),
+    "elf": (b"\x7fELF", re.compile(rb"\x7fELF[\x01\x02][\x01\x02]\x01"), 0),
+    "sqlite": (b"SQLite format 3\x00", None, 0),
+    "pdf": (b"%PDF-", re.compile(rb"%PDF-\d\.\d"), 0),
+}
+STRINGS = re.compile(rb"[\x20-\x7e\t]{%d,}" % MIN_STRING_LENGTH)
+
+# One alternation, so every string is matched against all secret patterns at once
+SECRET_PATTERNS = {
+    "private_key": r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----",
+    "aws_access_key": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "github_token": r"\bgh[pousr]_[A-Za-z0-9]{36,}\b",
+    "slack_token": r"\bxox[abprs]-[A-Za-z0-9-]{10,}",
+    "google_api_key": r"\bAIza[0-9A-Za-z_-]{35}\b",
+    "jwt": r"\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}",
+    "connection_string": r"\b[a-z][a-z0-9+.-]{1,15}://[^\s:/@'\"]+:[^\s@/'\"]+@[^\s'\"<>]+",
+    "password_assignment": r"(?i:\b(?:pass(?:word|wd)?|pwd|secret|api[_-]?key|access[_-]?token|auth[_-]?token)"
+                           r"\b[\"']?\s*[:=]\s*[\"']?[^\s\"',;]{4,})",
+    "bcrypt_hash": r"\$2[abxy]?\$\d{2}\$[./A-Za-z0-9]{53}",
+    "crypt_hash": r"\$(?:1|5|6|y|apr1)\$[^\s:$]{0,32}\$[./A-Za-z0-9]{22,86}",
+    "ntlm_hash": r"\b[a-fA-F0-9]{32}:[a-fA-F0-9]{32}\b",
+    "sha1_hash": r"(?<![A-Za-z0-9])[a-f0-9]{40}(?![A-Za-z0-9])",
+    "md5_hash": r"(?<![A-Za-z0-9])[a-f0-9]{32}(?![A-Za-z0-9])",
+}
+SECRETS = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in SECRET_PATTERNS.items()))
+
+def sniff_type(head):
+    for magic, kind in MAGIC_TYPES:
+        if head.startswith(magic):
+            return kind
+    if len(head) >= 262 and head[257:262] == b"ustar":
+        return "tar"
+    if not head:
+        return "empty"
+    sample = head[:4096]
+    if b"\x00" not in sample and sum(32 <= b < 127 or b in (9, 10, 13) for b in sample) / len(sample) > 0.95:
+        stripped = sample.lstrip()
+        if stripped[:1] in (b"{", b"["):
+            return "json"
+        if stripped[:5].lower() in (b"<?xml", b"<html", b"<!doc"):
+            return "xml/html"
+        if sample.startswith(b"#!"):
+            return "script"
+        return "text"
+    return "data"
+
+def analyze_file(path):
+    """
+    Maps the file once and reads everything from that mapping: a hashing pass
+    (needed first, for the content cache), one pass extracting strings and
+    scanning them for secrets, then one memmem sweep (mmap.find) per embedded
+    signature prefix. A single regex alternation covering strings and
+    signatures measured several times slower than these sweeps, and misses
+    printable signatures (ustar, %PDF-, BZh) that sit inside a string run.
+    """
+    size = os.path.getsize(path)
+    result = {"path": path, "size": size, "strings": [], "string_count": 0, "secrets": [], "embedded": []}
+    if size == 0:
+        return {**result, "sha256": hashlib.sha256(b"").hexdigest(), "type": "empty", "cached": False}
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            digest = hashlib.sha256()
+            for offset in range(0, size, 1 << 22):
+                digest.update(view[offset:offset + (1 << 22)])
+        finally:
+            view.release()
+        result["sha256"] = digest.hexdigest()
+        # Same content already analyzed under another name
+        cached = _load_result(result["sha256"])
+        if cached is not None:
+            return {**cached, "path": path, "cached": True}
+        result["type"] = sniff_type(mm[:4096])
+
+        seen = set()
+        for match in STRINGS.finditer(mm):
+            result["string_count"] += 1
+            # The whole string is scanned: keys often sit deep inside minified JS or base64 blobs
+            text = match.group().decode("ascii")
+            if len(result["strings"]) < MAX_STORED_STRINGS:
+                result["strings"].append(text[:MAX_STRING_LENGTH])
+            for secret in SECRETS.finditer(text):
+                value = secret.group()
+                if (secret.lastgroup, value) in seen or len(result["secrets"]) >= MAX_FINDINGS:
+                    continue
+                seen.add((secret.lastgroup, value))
+                start = max(0, secret.start() - CONTEXT_CHARS)
+                result["secrets"].append({"kind": secret.lastgroup, "value": value,
+                                          "offset": match.start() + secret.start(),
+                                          "context": text[start:secret.end() + CONTEXT_CHARS][:MAX_STRING_LENGTH]})
+
+        for kind, (prefix, header, shift) in EMBEDDED_SIGNATURES.items():
+            position = mm.find(prefix, shift + 1)  # the file's own header is its type, not an embedded object
+            while position != -1 and len(result["embedded"]) < MAX_FINDINGS:
+                if header is None or header.match(mm, position):
+                    result["embedded"].append({"type": kind, "offset": position - shift})
+                position = mm.find(prefix, position + 1)
+        result["embedded"].sort(key=lambda e: e["offset"])
+    return {**result, "cached": False}
+
+############### CACHE ###############
+
+_index_lock = threading.Lock()
+
+def _index_path():
+    return os.path.join(CACHE_DIR, "index.json")
+
+def _load_index():
+    try:
+        with open(_index_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _index_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, _index_path())
+
+def _result_path(sha256):
+    return os.path.join(CACHE_DIR, f"{sha256}.json")
+
+def _load_result(sha256):
+    try:
+        with open(_result_path(sha256), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _store_result(result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _result_path(result["sha256"]) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp, _result_path(result["sha256"]))
+
+def list_files(path):
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return files
+
+def analyze_paths(paths, workers=MAX_WORKERS):
+    """
+    Results for every file, analyzing only the new or modified ones. Unchanged
+    files are found through the path index without reading them; identical
+    content under another name reuses the stored result.
+    """
+    with _index_lock:
+        index = _load_index()
+    results, pending = {}, []
+    for path in paths:
+        stat = os.stat(path)
+        entry = index.get(os.path.abspath(path))
+        cached = None
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            cached = _load_result(entry["sha256"])
+        if cached is not None:
+            results[path] = {**cached, "path": path, "cached": True}
+        else:
+            pending.append(path)
+
+    if len(pending) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            analyzed = list(pool.map(analyze_file, pending))
+    else:
+        analyzed = [analyze_file(path) for path in pending]
+
+    with _index_lock:
+        index = _load_index()
+        for path, result in zip(pending, analyzed):
+            if not result["cached"]:
+                _store_result({k: v for k, v in result.items() if k != "cached"})
+            stat = os.stat(path)
+            index[os.path.abspath(path)] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": result["sha256"]}
+            results[path] = result
+        if pending:
+            _save_index(index)
+    return [results[path] for path in paths]
+
+############### TOOL ###############
+
+def _summary_line(result):
+    kinds = {}
+    for secret in result["secrets"]:
+        kinds[secret["kind"]] = kinds.get(secret["kind"], 0) + 1
+    secrets = ", ".join(f"{k} x{v}" for k, v in sorted(kinds.items())) or "none"
+    embedded = ", ".join(f"{e['type']}@{e['offset']}" for e in result["embedded"][:10]) or "none"
+    if len(result["embedded"]) > 10:
+        embedded += f" (+{len(result['embedded']) - 10})"
+    return (f"{result['path']} [{result['type']}, {result['size']} bytes, sha256 {result['sha256'][:16]}] "
+            f"strings: {result['string_count']} | secrets: {secrets} | embedded: {embedded}")
+
+@tool
+def analyze_artifacts(path: str = ARTIFACT_DIR, section: str = "summary", query: str = None,
+                      max_results: int = 50) -> str:
+    """
+    Analyzes downloaded files (by default everything in 'retrieve_files/') from one memory mapping of each:
+    file type, printable strings, embedded archives/binaries (zip, gzip, tar, ELF... at an
+    offset), and secrets (private keys, AWS/GitHub/Slack/Google tokens, JWTs, connection
+    strings, password assignments, crypt/bcrypt/NTLM/MD5/SHA1 hashes). Results are cached by
+    content hash, so calling it again is cheap and only new files are analyzed.
+    Use it instead of running strings, binwalk, file or grep on downloaded files.
+
+    Args:
+        path: File or directory to analyze (default: 'retrieve_files/')
+        section: What to return:
+            - "summary": one line per file with type, size, string count, secret kinds and embedded objects
+            - "secrets": every secret found, with its kind, value, offset and surrounding string
+            - "embedded": embedded archives/binaries with their offsets (extract with dd/zip tools)
+            - "strings": extracted strings (filter them with 'query')
+        query: Optional regex filtering the secrets or strings returned (case-insensitive),
+            e.g. "admin|passw" or "https?://"
+        max_results: Maximum number of secrets or strings returned (default: 50)
+
+    Returns:
+        The requested section as text, one file per block.
+    """
+    if not os.path.exists(path):
+        return f"❌ Path not found: {path}"
+    if section not in ("summary", "secrets", "embedded", "strings"):
+        return "❌ Invalid section. Use 'summary', 'secrets', 'embedded' or 'strings'."
+    try:
+        pattern = re.compile(query, re.IGNORECASE) if query else None
+    except re.error as e:
+        return f"❌ Invalid query regex: {e}"
+
+    files = list_files(path)
+    if not files:
+        return f"No files in {path}"
+    try:
+        results = analyze_paths(files)
+    except Exception as e:
+        return f"Error while analyzing: {str(e)}"
+
+    if section == "summary":
+        analyzed = sum(1 for r in results if not r["cached"])
+        header = f"{len(results)} file(s), {analyzed} newly analyzed, {len(results) - analyzed} from cache"
+        return "\n".join([header] + [_summary_line(r) for r in results])
+
+    lines, total = [], 0
+    for result in results:
+        if section == "embedded":
+            items = [f"  {e['type']} at offset {e['offset']}" for e in result["embedded"]]
+        elif section == "secrets":
+            items = [f"  [{s['kind']}] {s['value']}  (offset {s['offset']}: {s['context'][:120]})"
+                     for s in result["secrets"]
+                     if not pattern or pattern.search(s["value"]) or pattern.search(s["context"])]
+        else:
+            items = [f"  {s}" for s in result["strings"] if not pattern or pattern.search(s)]
+        if not items:
+            continue
+        if total < max_results:
+            lines.append(f"{result['path']} ({len(items)})")
+            lines.extend(items[:max_results - total])
+        total += len(items)
+    if total > max_results:
+        lines.append(f"[⚠️ Output truncated: {max_results} of {total} results shown]")
+    return "\n".join(lines) or f"No {section} found" + (f" matching '{query}'" if query else "")
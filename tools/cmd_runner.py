@@ -1,12 +1,12 @@
-import requests
 from langchain_core.tools import tool
 
-#TODO privilege escalation module / answer handler
+from tools.executor_pool import decode_response, get_pool
 
-API_URL = "http://127.0.0.1:4444"  # TODO CONFIGURE API URL
+#TODO privilege escalation module / answer handler
 
 @tool
-def pentest_api_tool(action: str, command: str = None, pid: str = None) -> str:
+def pentest_api_tool(action: str, command: str = None, pid: str = None, expect: str = None,
+                     lines: int = None, cursor: str = None, timeout: int = 30) -> str:
     """
     Interact with the Pentest API. You have access to dictionaries at
     -  /usr/share/wordlists/rockyou.txt -- for password cracking
@@ -16,6 +16,10 @@ def pentest_api_tool(action: str, command: str = None, pid: str = None) -> str:
 
     You also have access to linpeas at /home/pentest/linpeas/linpeas.sh for privilege escalation enumeration on the target machine.
 
+    Long-running work has dedicated tools: bruteforce_tool, scan_tool, rescan_tool, crack_tool,
+    dns_tool and http_probe_tool start jobs followed with get_job_tool, and session_tool keeps
+    interactive sessions (ssh, nc...) open between commands.
+
     Args:
         action: What to do. Options:
             - "health": check API health
@@ -23,37 +27,55 @@ def pentest_api_tool(action: str, command: str = None, pid: str = None) -> str:
             - "execute": run a command (needs 'command')
             - "execute_background" : run a command in background (needs 'command')
             - "get_process": get info about a background process (needs 'pid')
-        command: The command to execute (only for action="execute")
-        pid: The pid of the process to get info from (only for action="get_process")
+            - "wait": block until a background process prints a line matching 'expect', prints
+              'lines' new lines, exits, or 'timeout' seconds pass (needs 'pid'). Returns only the
+              new output and a 'cursor'; pass it back on the next "wait" to continue from there.
+              Prefer this over polling "get_process" repeatedly.
+              Example: pid="0:1234", expect="open port|Nmap done", timeout=120
+        command: The command to execute (for action="execute" and "execute_background")
+        pid: The PID handle returned by "execute_background", e.g. "0:1234" (for action="get_process" and "wait")
+        expect: Optional regex to wait for on new output (only for action="wait")
+        lines: Return once this many new lines are available (only for action="wait")
+        cursor: The 'cursor' returned by the previous "wait" (only for action="wait")
+        timeout: Seconds to wait (only for action="wait", default 30)
     """
+    pool = get_pool()
     try:
         if action == "health":
-            r = requests.get(f"{API_URL}/health")
-            return r.json()
+            for node in pool.nodes:
+                pool.check_health(node)
+            return pool.status()
 
         elif action == "allowed":
-            r = requests.get(f"{API_URL}/commands/allowed")
-            return r.json()
+            _, r = pool.request("GET", "/commands/allowed")
+            return decode_response(r)
 
         elif action == "execute":
             if not command:
                 return "❌ You must provide a command for 'execute'."
-            payload = {"command": command}
-            r = requests.post(f"{API_URL}/execute", json=payload)
-            return r.json()
-        elif action == "execute_interactive":
+            return decode_response(pool.execute(command))
+        elif action in ("execute_background", "execute_interactive"):
             if not command:
                 return "❌ You must provide a command for 'execute_background'."
-            payload = {"command": command}
-            r = requests.post(f"{API_URL}/execute/background", json=payload)
-            return r.json()
+            return pool.execute_background(command)
         elif action == "get_process":
             if not pid:
                 return "❌ You must provide a pid for 'get_process'."
-            r = requests.get(f"{API_URL}/process/{pid}")
+            return decode_response(pool.get_background(pid))
+        elif action == "wait":
+            if not pid:
+                return "❌ You must provide a pid for 'wait'."
+            params = {"timeout": timeout}
+            if expect:
+                params["pattern"] = expect
+            if lines:
+                params["lines"] = lines
+            if cursor:
+                params["cursor"] = cursor
+            return decode_response(pool.get_background(pid, "/wait", params=params))
 
         else:
-            return "❌ Invalid action. Use 'health', 'allowed', or 'execute'."
+            return "❌ Invalid action. Use 'health', 'allowed', 'execute', 'execute_background', 'get_process' or 'wait'."
 
     except Exception as e:
         return f"⚠️ Error communicating with API: {str(e)}"
@@ -0,0 +1,211 @@
+from langchain_core.tools import tool
+
+from tools.executor_pool import decode_response, get_pool
+
+# Long-running executor jobs (sharded bruteforce, scans, cracking, bulk DNS/HTTP).
+# Each returns a 'job_id' handle to follow with get_job_tool.
+
+@tool
+def bruteforce_tool(command: str, wordlist: str, shards: int = None) -> str:
+    """
+    Split a wordlist into shards and run one worker per shard in parallel on the executor.
+    Much faster than a single gobuster/hydra/wfuzz/dirb process on large wordlists.
+    Follow it with get_job_tool for progress and merged results.
+
+    Wordlists on the executor:
+    - /usr/share/wordlists/rockyou.txt -- passwords
+    - /usr/share/wordlists/enumeration/directory_list_medium.txt -- directories
+    - /usr/share/wordlists/enumeration/subdomains-110000.txt -- subdomains
+    - /usr/share/wordlists/dirb -- directory brute-forcing
+
+    Args:
+        command: Command with a {wordlist} placeholder,
+            e.g. "gobuster dir -q -u http://target -w {wordlist}"
+        wordlist: Wordlist path on the executor
+        shards: Number of parallel shards (default: CPU count)
+    """
+    payload = {"command": command, "wordlist": wordlist}
+    if shards:
+        payload["shards"] = shards
+    try:
+        return get_pool().start_job("/jobs/bruteforce", payload)
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
+
+@tool
+def scan_tool(targets: str, ports: str = None, options: str = None, tool: str = "nmap") -> str:
+    """
+    Split a large nmap/masscan scan into parallel sub-scans (targets x port ranges), each with
+    its own timeout, and merge the results per host. Use it instead of running nmap directly
+    for subnets or full port ranges. Follow it with get_job_tool.
+    Example: targets="10.0.0.0/24", ports="1-65535", options="-sV -T4"
+
+    Args:
+        targets: Hosts, IPs or CIDR ranges separated by spaces or commas
+        ports: Port list/ranges such as "22,80,8000-8100" or "-" for all ports
+        options: Extra scanner options without -p/-o flags, e.g. "-sV -T4"
+        tool: "nmap" (default) or "masscan"
+    """
+    payload = {"tool": tool, "targets": targets, "options": options or ""}
+    if ports:
+        payload["ports"] = ports
+    try:
+        return get_pool().start_job("/jobs/scan", payload)
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
+
+@tool
+def rescan_tool(engagement: str, targets: str = None, ports: str = None, options: str = None,
+                url: str = None, command: str = None, wordlist: str = None, shards: int = None) -> str:
+    """
+    Re-test what was already enumerated for an engagement and return a delta report.
+    Follow it with get_job_tool.
+
+    - Network (give 'targets'): cheaply probes the known ports and discovers new hosts, runs the
+      full scan only on hosts that changed or are new, and reports new/removed/changed hosts and
+      ports. The first run of an engagement is a full scan that records the baseline.
+      Example: engagement="acme-2024", targets="10.0.0.0/24"
+    - Website (give 'url', 'wordlist' and 'command'): re-requests the known paths (status,
+      redirect, content hash) and re-runs the bruteforce only under the directories that changed.
+      Example: command="gobuster dir -q -u {url} -w {wordlist}", url="http://target"
+
+    Args:
+        engagement: Name of the engagement whose previous results are compared, e.g. "acme-2024"
+        targets: Hosts, IPs or CIDR ranges separated by spaces or commas (network rescan)
+        ports: Port list/ranges such as "22,80,8000-8100" or "-" for all ports (network rescan)
+        options: Extra nmap options without -p/-o flags, e.g. "-sV -T4" (network rescan)
+        url: Base URL of the website (website rescan)
+        command: Bruteforce command with {url} and {wordlist} placeholders (website rescan)
+        wordlist: Wordlist path on the executor (website rescan)
+        shards: Number of parallel shards (website rescan, default: CPU count)
+    """
+    pool = get_pool()
+    try:
+        if url:
+            if not command or not wordlist:
+                return "❌ A website rescan needs a wordlist and a command with {url} and {wordlist} placeholders."
+            payload = {"engagement": engagement, "url": url, "command": command, "wordlist": wordlist}
+            if shards:
+                payload["shards"] = shards
+            return pool.start_job("/jobs/rescan/web", payload)
+        if not targets:
+            return "❌ You must provide targets (network rescan) or a url (website rescan)."
+        payload = {"engagement": engagement, "targets": targets, "options": options or ""}
+        if ports:
+            payload["ports"] = ports
+        return pool.start_job("/jobs/rescan", payload)
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
+
+@tool
+def crack_tool(action: str = "start", hashes: str = None, wordlist: str = None, tool: str = "john",
+               hash_format: str = None, options: str = None, job_id: str = None) -> str:
+    """
+    Password cracking jobs with john or hashcat that survive executor restarts. Hashes already
+    cracked in earlier engagements are answered from the shared potfile without running the
+    tool. Follow a job with get_job_tool for rate, ETA and cracked passwords.
+    Example: hashes="5f4dcc3b5aa765d61d8327deb882cf99", hash_format="raw-md5",
+             wordlist="/usr/share/wordlists/rockyou.txt"
+
+    Args:
+        action: "start" (default, needs 'hashes' and 'wordlist'), "stop" to pause a job at its
+            last checkpoint, or "resume" a paused or interrupted job (both need 'job_id')
+        hashes: Hashes to crack, one per line, or the path of a hash file on the executor
+        wordlist: Wordlist path on the executor, e.g. /usr/share/wordlists/rockyou.txt
+        tool: "john" (default) or "hashcat"
+        hash_format: john --format name or hashcat -m mode number
+        options: Extra john/hashcat options such as "--rules=best64"
+        job_id: The job id returned by "start" (for "stop" and "resume")
+    """
+    pool = get_pool()
+    try:
+        if action in ("stop", "resume"):
+            if not job_id:
+                return f"❌ You must provide a job_id for '{action}'."
+            return decode_response(pool.request_pinned("POST", job_id, f"/jobs/crack/{{id}}/{action}"))
+        if action != "start":
+            return "❌ Invalid action. Use 'start', 'stop' or 'resume'."
+        if not hashes or not wordlist:
+            return "❌ You must provide hashes and a wordlist to start cracking."
+        payload = {"tool": tool if tool in ("john", "hashcat") else "john", "wordlist": wordlist,
+                   "options": options or ""}
+        if "\n" not in hashes and hashes.startswith("/"):
+            payload["hash_file"] = hashes
+        else:
+            payload["hashes"] = hashes
+        if hash_format:
+            payload["format"] = hash_format
+        return pool.start_job("/jobs/crack", payload)
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
+
+@tool
+def dns_tool(targets: str = None, domain: str = None, wordlist: str = None, record_type: str = "A",
+             resolvers: str = None) -> str:
+    """
+    Resolve many names at once with an async resolver instead of one dig/host per name.
+    Either list the names in 'targets' (answered directly), or enumerate subdomains with
+    'domain' and a 'wordlist' (started as a job, follow it with get_job_tool). Wildcard zones
+    are detected and their catch-all answers filtered out.
+    Example: domain="example.com", wordlist="/usr/share/wordlists/enumeration/subdomains-110000.txt"
+
+    Args:
+        targets: Host names to resolve, separated by spaces or commas
+        domain: Domain whose subdomains are enumerated with 'wordlist'
+        wordlist: Subdomain wordlist path on the executor
+        record_type: DNS record type to query (A, AAAA, CNAME, MX, TXT, NS...), default "A"
+        resolvers: DNS server IPs separated by commas, e.g. "1.1.1.1,8.8.8.8"; defaults to the
+            executor's resolvers
+    """
+    if not targets and not domain:
+        return "❌ You must provide names in 'targets', or a domain (with a wordlist to enumerate subdomains)."
+    payload = {"record_type": record_type or "A"}
+    if targets:
+        payload["names"] = targets
+    if domain:
+        payload["domain"] = domain
+    if wordlist:
+        payload["wordlist"] = wordlist
+    else:
+        payload["wait"] = True
+    if resolvers:
+        payload["resolvers"] = resolvers
+    try:
+        return get_pool().start_job("/jobs/dns", payload)
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
+
+@tool
+def http_probe_tool(targets: str) -> str:
+    """
+    Check many URLs or hosts at once with a pooled async HTTP client instead of one
+    curl/whatweb per URL. Returns per URL the status, title, server headers, redirect chain,
+    content length and body sha256. Hosts without a scheme try https then http.
+    Example: targets="http://10.0.0.5/admin, 10.0.0.6:8080, https://app.example.com"
+
+    Args:
+        targets: URLs or hosts separated by spaces or commas (answered directly up to 50, larger
+            lists start a job), or the path of a file on the executor with one per line (started
+            as a job, follow it with get_job_tool)
+    """
+    pool = get_pool()
+    try:
+        if "\n" not in targets and targets.startswith("/") and " " not in targets.strip():
+            return pool.start_job("/jobs/probe", {"url_file": targets.strip()})
+        return pool.start_job("/jobs/probe", {"urls": targets, "wait": True})
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
+
+@tool
+def get_job_tool(job_id: str) -> str:
+    """
+    Progress and merged results of a job started by bruteforce_tool, scan_tool, rescan_tool,
+    crack_tool, dns_tool or http_probe_tool.
+
+    Args:
+        job_id: The job id returned when the job was started, e.g. "0:3f9a1c2b4d5e"
+    """
+    try:
+        return decode_response(get_pool().get_job(job_id))
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
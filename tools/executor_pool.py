@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# Optional accelerators: without them responses are plain JSON, gzip-compressed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ormsgpack as msgpack
+except ImportError:
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_API_URL = "http://127.0.0.1:4444"
+# (connect, read) seconds: reads must outlast a synchronous /execute (120 s server-side timeout)
+CONNECT_TIMEOUT = float(os.getenv("EXECUTOR_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("EXECUTOR_READ_TIMEOUT", "180"))
+# Extra read time on top of the server-side wait of long-polls (/wait, session send)
+WAIT_MARGIN = 15.0
+MSGPACK_MIMETYPE = "application/msgpack"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def transport_headers():
+    """Advertises the serializations and compressions this client can decode"""
+    return {
+        "Accept": f"{MSGPACK_MIMETYPE}, application/json;q=0.9" if msgpack else "application/json",
+        "Accept-Encoding": "zstd, gzip" if zstandard else "gzip",
+    }
+
+def decode_response(response):
+    """Decodes an executor API response whatever serialization/compression was negotiated"""
+    body = response.content
+    # requests decodes gzip itself; zstd only with recent urllib3, so check the frame magic
+    if body.startswith(ZSTD_MAGIC) and zstandard is not None:
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    content_type = response.headers.get("Content-Type", "")
+    if content_type.startswith(MSGPACK_MIMETYPE):
+        return msgpack.unpackb(body)
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def not_sent(error):
+    """True when the connection itself failed (refused, unreachable, connect timeout): nothing was sent"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+class ExecutorNode:
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.healthy = True
+        self.last_check = 0.0
+        self.checking = False
+
+class ExecutorPool:
+    """
+    Routes executor API calls across several containers.
+
+    Stateless calls go to the healthy node with the fewest in-flight requests.
+    Background processes are sticky: the PID returned to the agent is a handle
+    '<node>:<pid>' so follow-up calls always reach the node that owns it.
+    """
+
+    def __init__(self, urls, health_interval=30.0, health_timeout=5.0,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        if not urls:
+            raise ValueError("ExecutorPool needs at least one executor URL")
+        self.nodes = [ExecutorNode(i, url) for i, url in enumerate(urls)]
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = requests.Session()
+        self._session.headers.update(transport_headers())
+        self._lock = threading.Lock()
+
+    # Health checking
+
+    def check_health(self, node):
+        try:
+            r = self._session.get(f"{node.url}/health", timeout=self.health_timeout)
+            node.healthy = r.ok
+        except requests.RequestException:
+            node.healthy = False
+        node.last_check = time.time()
+        return node.healthy
+
+    def _refresh_stale(self):
+        # Each stale node is claimed by a single caller; the others route on its last known state
+        now = time.time()
+        with self._lock:
+            stale = [n for n in self.nodes if not n.checking and now - n.last_check > self.health_interval]
+            for node in stale:
+                node.checking = True
+        for node in stale:
+            try:
+                self.check_health(node)
+            finally:
+                node.checking = False
+
+    # Routing
+
+    def _acquire(self, exclude=()):
+        self._refresh_stale()
+        with self._lock:
+            candidates = [n for n in self.nodes if n.healthy and n.index not in exclude]
+            if not candidates:
+                # Every node looks down: try the least loaded one anyway rather than failing outright
+                candidates = [n for n in self.nodes if n.index not in exclude]
+            if not candidates:
+                return None
+            node = min(candidates, key=lambda n: n.outstanding)
+            node.outstanding += 1
+            return node
+
+    def _acquire_node(self, node):
+        with self._lock:
+            node.outstanding += 1
+        return node
+
+    def _release(self, node):
+        with self._lock:
+            node.outstanding -= 1
+
+    def request(self, method, path, node=None, **kwargs):
+        """
+        Sends a request, failing over to another node for unpinned calls. A POST is only
+        retried elsewhere when it never reached the node: once the body may have been
+        received, the command could already be running there and must not run twice.
+        """
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        tried = set()
+        while True:
+            target = self._acquire_node(node) if node is not None else self._acquire(exclude=tried)
+            if target is None:
+                raise requests.ConnectionError("No executor node available")
+            try:
+                return target, self._session.request(method, f"{target.url}{path}", **kwargs)
+            except requests.ConnectionError as e:
+                target.healthy = False
+                target.last_check = time.time()
+                tried.add(target.index)
+                retryable = method.upper() in IDEMPOTENT_METHODS or not_sent(e)
+                if node is not None or not retryable or len(tried) == len(self.nodes):
+                    raise
+            finally:
+                self._release(target)
+
+    def wait_timeout(self, seconds):
+        """(connect, read) timeout for a call the server holds open for up to 'seconds'"""
+        return self.connect_timeout, max(self.read_timeout, float(seconds) + WAIT_MARGIN)
+
+    def resolve_handle(self, handle):
+        """Maps a '<node>:<id>' handle (or a bare id on a single-node pool) to its node and raw id"""
+        handle = str(handle).strip()
+        if ":" in handle:
+            index, raw = handle.split(":", 1)
+            return self.nodes[int(index)], raw
+        if len(self.nodes) > 1:
+            raise ValueError(f"Ambiguous id '{handle}': use the '<node>:<id>' handle returned at launch")
+        return self.nodes[0], handle
+
+    # API helpers
+
+    def execute(self, command, **kwargs):
+        _, r = self.request("POST", "/execute", json={"command": command}, **kwargs)
+        return r
+
+    def execute_background(self, command):
+        node, r = self.request("POST", "/execute/background", json={"command": command})
+        data = decode_response(r)
+        if isinstance(data, dict) and data.get("success") and data.get("PID", -1) > 0:
+            data["PID"] = f"{node.index}:{data['PID']}"
+        return data
+
+    def get_background(self, handle, path_suffix="", params=None):
+        node, pid = self.resolve_handle(handle)
+        kwargs = {"timeout": self.wait_timeout(params["timeout"])} if params and "timeout" in params else {}
+        _, r = self.request("GET", f"/background/{int(pid)}{path_suffix}", node=node, params=params, **kwargs)
+        return r
+
+    def create_pinned(self, path, payload, id_field, **kwargs):
+        """Creates a server-side object (job, session...) and pins its id to the node that owns it"""
+        node, r = self.request("POST", path, json=payload, **kwargs)
+        data = decode_response(r)
+        if isinstance(data, dict) and data.get(id_field):
+            data[id_field] = f"{node.index}:{data[id_field]}"
+        return data
+
+    def request_pinned(self, method, handle, path_template, **kwargs):
+        node, raw_id = self.resolve_handle(handle)
+        _, r = self.request(method, path_template.format(id=raw_id), node=node, **kwargs)
+        return r
+
+    def start_job(self, path, payload):
+        return self.create_pinned(path, payload, "job_id")
+
+    def get_job(self, handle):
+        return self.request_pinned("GET", handle, "/jobs/{id}")
+
+    def status(self):
+        return [
+            {"node": n.index, "url": n.url, "healthy": n.healthy, "outstanding": n.outstanding}
+            for n in self.nodes
+        ]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Shared pool built from EXECUTOR_URLS (comma-separated), read on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            urls = [u.strip() for u in os.getenv("EXECUTOR_URLS", DEFAULT_API_URL).split(",") if u.strip()]
+            _pool = ExecutorPool(urls, health_interval=float(os.getenv("EXECUTOR_HEALTH_INTERVAL", "30")))
+        return _pool
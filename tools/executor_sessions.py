@@ -0,0 +1,50 @@
+from langchain_core.tools import tool
+
+from tools.executor_pool import decode_response, get_pool
+
+@tool
+def session_tool(action: str, command: str = None, session_id: str = None, text: str = None,
+                 expect: str = None, timeout: int = 30) -> str:
+    """
+    Persistent interactive sessions on the executor: connect once, then keep typing into the
+    same session instead of reconnecting for every command.
+
+    Args:
+        action: What to do. Options:
+            - "open": open a session (ssh, telnet, nc, smbclient, rpcclient, or python3 running a
+              script; no local shell or REPL) and return its first output, e.g. the password
+              prompt (needs 'command')
+            - "send": send 'text' and wait for the next prompt or for the 'expect' regex (needs
+              'session_id' and 'text'). Use it to type passwords and to run follow-up commands
+              on a remote host without reconnecting.
+            - "close": close a session (needs 'session_id')
+        command: The command that starts the session, e.g. "ssh -p 22 kali@10.0.0.5"
+        session_id: The id returned by "open"
+        text: Input line to send (only for action="send")
+        expect: Optional regex to wait for instead of the prompt (only for action="send")
+        timeout: Seconds to wait for output (default 30)
+    """
+    pool = get_pool()
+    try:
+        if action == "open":
+            if not command:
+                return "❌ You must provide a command for 'open'."
+            return pool.create_pinned("/sessions", {"command": command, "timeout": timeout}, "session_id",
+                                      timeout=pool.wait_timeout(timeout))
+        elif action == "send":
+            if not session_id or text is None:
+                return "❌ You must provide a session_id and text for 'send'."
+            payload = {"input": text, "timeout": timeout}
+            if expect:
+                payload["expect"] = expect
+            return decode_response(pool.request_pinned("POST", session_id, "/sessions/{id}/send", json=payload,
+                                                       timeout=pool.wait_timeout(timeout)))
+        elif action == "close":
+            if not session_id:
+                return "❌ You must provide a session_id for 'close'."
+            return decode_response(pool.request_pinned("DELETE", session_id, "/sessions/{id}"))
+        else:
+            return "❌ Invalid action. Use 'open', 'send' or 'close'."
+
+    except Exception as e:
+        return f"⚠️ Error communicating with API: {str(e)}"
@@ -1,7 +1,6 @@
-import requests
 from langchain_core.tools import tool
 
-API_URL = "http://127.0.0.1:4444"  # TODO CONFIGURE API URL
+from tools.executor_pool import decode_response, get_pool
 
 @tool
 def exploitdb_search_tool(query: str) -> str:
@@ -15,10 +14,10 @@ def exploitdb_search_tool(query: str) -> str:
         str: The search results from Exploit-DB.
     """
     try:
-        payload = {"command":"searchsploit " + query.strip()}  # Prefix with searchsploit for API compatibility
-        response = requests.post(f"{API_URL}/execute", json=payload)
+        command = "searchsploit " + query.strip()  # Prefix with searchsploit for API compatibility
+        response = get_pool().execute(command)
         response.raise_for_status()
-        return response.json()  # Assuming the API returns JSON data
+        return decode_response(response)
     except Exception as e:
         return f"Error during Exploit-DB search: {str(e)}"
     
@@ -1,4 +1,3 @@
-import fitz  # PyMuPDF
 from langchain_core.tools import tool
 
 @tool
@@ -19,6 +18,8 @@ def read_pdf(input_str: str) -> str:
     except ValueError:
         return "Invalid format. Use '/path/file.pdf|start_page|end_page'."
 
+    import fitz  # PyMuPDF, deferred: slow to import and only needed for PDFs
+
     doc = fitz.open(file_path)
     text_output = ""
 
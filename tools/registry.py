@@ -0,0 +1,205 @@
+import ast
+import hashlib
+import importlib
+import json
+import os
+import threading
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+# name -> "module:attribute". The attribute is either a tool instance or a
+# zero-argument factory (tool class) returning one.
+TOOL_REGISTRY = {
+    "google_search": "tools.web_search:GoogleSearchTool",
+    "web_scraper": "tools.web_scraper:WebScraperTool",
+    "pentest_api_tool": "tools.cmd_runner:pentest_api_tool",
+    "bruteforce_tool": "tools.executor_jobs:bruteforce_tool",
+    "scan_tool": "tools.executor_jobs:scan_tool",
+    "rescan_tool": "tools.executor_jobs:rescan_tool",
+    "crack_tool": "tools.executor_jobs:crack_tool",
+    "dns_tool": "tools.executor_jobs:dns_tool",
+    "http_probe_tool": "tools.executor_jobs:http_probe_tool",
+    "get_job_tool": "tools.executor_jobs:get_job_tool",
+    "session_tool": "tools.executor_sessions:session_tool",
+    "report_generator_tool": "tools.report_generator:report_generator_tool",
+    "exploitdb_search_tool": "tools.exploit_db_search:exploitdb_search_tool",
+    "download_file_tool": "tools.retrieve_file:download_file_tool",
+    "read_pdf": "tools.file_reader:read_pdf",
+    "read_txt": "tools.file_reader:read_txt",
+    "zip_processor_tool": "tools.zip_process:zip_processor_tool",
+    "analyze_artifacts": "tools.artifact_analysis:analyze_artifacts",
+}
+
+# Name, description and JSON schema of each tool, keyed by a hash of its source file and
+# of the first-party modules it imports, so the agent can bind tools to the LLM without
+# importing their implementations
+MANIFEST_PATH = os.getenv("TOOL_MANIFEST", os.path.join(".cache", "tool_manifest.json"))
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCAL_PACKAGES = ("tools", "utils")
+
+def _module_path(module_name):
+    """Source file of a first-party module, found without importing it (None if there is none)"""
+    base = os.path.join(SOURCE_ROOT, *module_name.split("."))
+    for path in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _local_imports(path, module_name):
+    """First-party modules imported anywhere in a source file, relative imports resolved"""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    package = module_name if path.endswith("__init__.py") else module_name.rpartition(".")[0]
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parent = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{parent}.{base}" if base else parent
+            # "from utils import tool_cache" may name a submodule as well as an attribute
+            found += [base] + [f"{base}.{alias.name}" for alias in node.names]
+    return [name for name in found if name.split(".")[0] in LOCAL_PACKAGES]
+
+def _source_files(module_name):
+    """The module's file and those of every first-party module it imports, transitively"""
+    files, pending, seen = set(), [module_name], set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        path = _module_path(name)
+        if path is None:
+            continue
+        files.add(path)
+        pending += _local_imports(path, name)
+    return sorted(files)
+
+def _source_hash(target):
+    digest = hashlib.sha1(target.encode())
+    for path in _source_files(target.split(":", 1)[0]):
+        digest.update(os.path.relpath(path, SOURCE_ROOT).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def import_tool(target):
+    """Imports 'module:attribute' and returns the tool instance"""
+    module_name, attribute = target.split(":", 1)
+    obj = getattr(importlib.import_module(module_name), attribute)
+    return obj if isinstance(obj, BaseTool) else obj()
+
+def describe_tool(tool):
+    """The name/description/parameters triple the LLM sees for this tool"""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    return convert_to_openai_tool(tool)["function"]
+
+class LazyTool(BaseTool):
+    """
+    Stand-in bound to the LLM from the manifest; the implementation module is
+    imported on the first call and the call is delegated to the real tool.
+    """
+
+    _target: str = PrivateAttr()
+    _tool: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, target, spec, tool=None):
+        super().__init__(
+            name=spec["name"],
+            description=spec.get("description", ""),
+            args_schema=spec.get("parameters") or {"type": "object", "properties": {}},
+        )
+        self._target = target
+        self._tool = tool
+
+    @property
+    def loaded(self):
+        return self._tool is not None
+
+    def load(self):
+        with self._lock:
+            if self._tool is None:
+                self._tool = import_tool(self._target)
+            return self._tool
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        tool_input = args[0] if args else kwargs
+        # The stand-in is the traced tool run; the real call gets no callbacks to avoid duplicate spans
+        return self.load().invoke(tool_input, config={"callbacks": []})
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+def load_tools(names=None, manifest_path=MANIFEST_PATH):
+    """
+    Returns LazyTool stand-ins for the registered tools. Tools whose manifest
+    entry is missing or out of date are imported once to refresh it.
+    """
+    names = list(TOOL_REGISTRY) if names is None else names
+    manifest = _read_manifest(manifest_path)
+    changed = False
+    tools = []
+    for name in names:
+        target = TOOL_REGISTRY[name]
+        source_hash = _source_hash(target)
+        entry = manifest.get(name)
+        tool = None
+        if entry is None or entry.get("hash") != source_hash:
+            tool = import_tool(target)
+            entry = {"hash": source_hash, **describe_tool(tool)}
+            manifest[name] = entry
+            changed = True
+        tools.append(LazyTool(target, entry, tool=tool))
+    if changed:
+        try:
+            _write_manifest(manifest_path, manifest)
+        except OSError:
+            pass
+    return tools
+
+def check_manifest(manifest_path=MANIFEST_PATH):
+    """Imports every tool and lists the ones whose manifest entry differs from the implementation"""
+    manifest = _read_manifest(manifest_path)
+    stale = []
+    for name, target in TOOL_REGISTRY.items():
+        entry = manifest.get(name) or {}
+        current = describe_tool(import_tool(target))
+        if {k: entry.get(k) for k in current} != current:
+            stale.append(name)
+    return stale
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lazy tool registry")
+    parser.add_argument("command", choices=["build", "check"])
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if os.path.exists(MANIFEST_PATH):
+            os.remove(MANIFEST_PATH)
+        tools = load_tools()
+        print(f"Wrote {MANIFEST_PATH} ({len(tools)} tools)")
+    else:
+        stale = check_manifest()
+        if stale:
+            print(f"Stale manifest entries: {', '.join(stale)} (run: python -m tools.registry build)")
+            raise SystemExit(1)
+        print("Tool manifest is up to date")
@@ -2,11 +2,6 @@ import os
 from datetime import datetime
 from langchain_core.tools import tool
 
-# For PDF
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-
 
 @tool
 def report_generator_tool(findings: dict, format: str = "markdown") -> str:
@@ -53,6 +48,11 @@ def report_generator_tool(findings: dict, format: str = "markdown") -> str:
         return filepath
 
     elif format == "pdf":
+        # reportlab is slow to import: only load it when a PDF is requested
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet
+
         filepath = f"reports/{filename}.pdf" #### TODO Modify this path as needed
         doc = SimpleDocTemplate(filepath, pagesize=A4)
         styles = getSampleStyleSheet()
@@ -1,7 +1,6 @@
 from typing import ClassVar, Optional
 from langchain.tools import BaseTool
 import requests
-from bs4 import BeautifulSoup
 from pydantic import PrivateAttr
 
 class WebScraperTool(BaseTool):
@@ -27,6 +26,8 @@ class WebScraperTool(BaseTool):
             response = self._session.get(url, timeout=10)
             response.raise_for_status()
 
+            from bs4 import BeautifulSoup  # deferred: only needed once a page is fetched
+
             soup = BeautifulSoup(response.text, "html.parser")
 
             if selector:
@@ -3,6 +3,7 @@ import os
 from langchain.tools import BaseTool
 from dotenv import load_dotenv
 
+# Keys are read when the tool is built: importing the module alone must load them, whatever the entry point
 load_dotenv()
 
 from typing import ClassVar
@@ -14,9 +15,9 @@ class GoogleSearchTool(BaseTool):
     
     _web_search_tool: 'WebSearchTool' = PrivateAttr()
 
-    def __init__(self, web_search_tool):
+    def __init__(self, web_search_tool=None):
         super().__init__()
-        self._web_search_tool = web_search_tool
+        self._web_search_tool = web_search_tool or WebSearchTool()
 
     def _run(self, query: str):
         results = self._web_search_tool.google_search(query)
@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.run_agent import run_agent_openai
+from utils.tracing import RunTracer
+
+CAMPAIGN_DIR = os.getenv("CAMPAIGN_DIR", "campaigns")
+
+DEFAULT_PROMPT_TEMPLATE = (
+    "The target web application is '{target}' conduct a full pentest on it. "
+    "Use all the tools at your disposal to find and exploit vulnerabilities. "
+    "Document your findings and provide recommendations for remediation."
+)
+
+class BudgetExceeded(Exception):
+    pass
+
+class LLMBudget(BaseCallbackHandler):
+    """
+    Global LLM budget shared by every run of a campaign: a sliding-window cap
+    on LLM calls per minute and an overall token ceiling. Calls block until a
+    slot frees up; once the token budget is spent, new calls raise BudgetExceeded.
+    """
+
+    raise_error = True
+
+    def __init__(self, calls_per_minute=None, max_tokens=None):
+        self.calls_per_minute = calls_per_minute
+        self.max_tokens = max_tokens
+        self.tokens_used = 0
+        self.calls = 0
+        self._window = deque()
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        with self._cond:
+            if self.max_tokens and self.tokens_used >= self.max_tokens:
+                raise BudgetExceeded(f"Token budget of {self.max_tokens} exhausted")
+            while self.calls_per_minute:
+                now = time.time()
+                while self._window and now - self._window[0] >= 60:
+                    self._window.popleft()
+                if len(self._window) < self.calls_per_minute:
+                    break
+                self._cond.wait(60 - (now - self._window[0]))
+            self._window.append(time.time())
+            self.calls += 1
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._acquire()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._acquire()
+
+    def on_llm_end(self, response, **kwargs):
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                tokens += usage.get("total_tokens") or 0
+        if not tokens and response.llm_output:
+            tokens = (response.llm_output.get("token_usage") or {}).get("total_tokens") or 0
+        with self._cond:
+            self.tokens_used += tokens
+            self._cond.notify_all()
+
+def read_targets(source):
+    """Reads one target per line from a file, or from stdin when source is '-'"""
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        return [line.strip() for line in stream if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def _slug(target):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", target).strip("_")[:80]
+
+class Campaign:
+    """Runs one agent graph per target concurrently, with resumable per-target status"""
+
+    def __init__(self, name, graph_factory, system_message, targets, concurrency=4, prompt_template=DEFAULT_PROMPT_TEMPLATE,
+                 budget=None, recursion_limit=110, max_retries=5):
+        self.name = name
+        # Called once per target: each run gets its own graph, tool cache and compactor
+        self.graph_factory = graph_factory
+        self.system_message = system_message
+        self.concurrency = concurrency
+        self.prompt_template = prompt_template
+        self.budget = budget
+        self.recursion_limit = recursion_limit
+        self.max_retries = max_retries
+        self.state_path = os.path.join(CAMPAIGN_DIR, f"{name}.json")
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+        for target in targets:
+            self.state["targets"].setdefault(target, {"status": "pending"})
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"name": self.name, "created": time.time(), "targets": {}}
+
+    def _save_state(self):
+        os.makedirs(CAMPAIGN_DIR, exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _update(self, target, **fields):
+        with self._lock:
+            self.state["targets"][target].update(fields)
+            self._save_state()
+
+    def _run_target(self, target):
+        tracer = RunTracer(run_name=f"{self.name}_{_slug(target)}_{int(time.time())}")
+        self._update(target, status="running", started=time.time(), trace=tracer.path, error=None)
+        # Only '{target}' is substituted: templates may contain JSON payloads or other literal braces
+        prompt = self.prompt_template.replace("{target}", target)
+        inputs = {"messages": [self.system_message, ("user", prompt)]}
+        config = {"recursion_limit": self.recursion_limit}
+        if self.budget is not None:
+            config["callbacks"] = [self.budget]
+        start = time.time()
+        try:
+            run_agent_openai(self.graph_factory(target), inputs, config, max_retries=self.max_retries, tracer=tracer, verbose=False)
+            self._update(target, status="done", duration_s=time.time() - start)
+        except Exception as e:
+            self._update(target, status="failed", duration_s=time.time() - start, error=str(e)[:500])
+        finally:
+            tracer.close()
+        self.print_status()
+
+    def pending_targets(self):
+        # Targets left 'running' by an interrupted campaign are started again
+        return [t for t, info in self.state["targets"].items() if info["status"] != "done"]
+
+    def run(self):
+        targets = self.pending_targets()
+        print(f"🚀 Campaign '{self.name}': {len(targets)} target(s) to run, {self.concurrency} concurrent")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(self._run_target, targets))
+        self.print_status()
+
+    def print_status(self):
+        with self._lock:
+            rows = list(self.state["targets"].items())
+        width = max([len(t) for t, _ in rows] + [6])
+        lines = [f"\n{'TARGET':<{width}}  {'STATUS':<8}  {'TIME':>8}  DETAIL"]
+        for target, info in rows:
+            duration = f"{info['duration_s']:.0f}s" if info.get("duration_s") else "-"
+            detail = info.get("error") or info.get("trace") or ""
+            lines.append(f"{target:<{width}}  {info['status']:<8}  {duration:>8}  {detail}")
+        if self.budget is not None:
+            lines.append(f"LLM calls: {self.budget.calls} | tokens used: {self.budget.tokens_used}")
+        print("\n".join(lines))
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import tool
+
+from utils.tool_cache import is_error_result
+
+# Persistent across runs, so material collected in an earlier session stays searchable
+INDEX_PATH = os.getenv("COLLECTED_INDEX", os.path.join(".cache", "collected.sqlite"))
+# Tools whose outputs are worth recalling later
+INDEXED_TOOLS = ("web_scraper", "pentest_api_tool", "get_job_tool", "dns_tool", "http_probe_tool", "session_tool",
+                 "read_pdf", "read_txt")
+CHUNK_CHARS = 2000
+
+def chunk_text(text, size=CHUNK_CHARS):
+    """Splits on line boundaries so a hit's snippet stays local to where the term appears"""
+    chunks, current, length = [], [], 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > size:
+            if current:
+                chunks.append("".join(current))
+                current, length = [], 0
+            chunks.append(line[:size])
+            line = line[size:]
+        if length + len(line) > size and current:
+            chunks.append("".join(current))
+            current, length = [], 0
+        current.append(line)
+        length += len(line)
+    if current:
+        chunks.append("".join(current))
+    return [c for c in chunks if c.strip()]
+
+def to_fts_query(query, any_term=False):
+    """Free text -> FTS5 query: every term quoted (no syntax errors), all terms required unless any_term"""
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    return (" OR " if any_term else " ").join(f'"{t}"' for t in terms)
+
+def describe_source(name, tool_input):
+    """Short reference to where an output came from: URL, file path or executor command"""
+    args = tool_input if isinstance(tool_input, dict) else {"input": tool_input}
+    if name == "web_scraper":
+        return str(args.get("query") or args.get("input") or "").split("||")[0].strip()
+    if name == "read_pdf":
+        return str(args.get("input_str") or args.get("input") or "").split("|")[0].strip()
+    if name == "read_txt":
+        return str(args.get("file_path") or args.get("input") or "")
+    if name in ("pentest_api_tool", "session_tool"):
+        action = args.get("action", "")
+        detail = args.get("command") or args.get("pid") or args.get("session_id") or ""
+        return f"{action}: {detail}" if detail else str(action)
+    if name == "get_job_tool":
+        return f"job: {args.get('job_id') or args.get('input') or ''}"
+    if name in ("dns_tool", "http_probe_tool"):
+        return f"{name.rsplit('_', 1)[0]}: {args.get('targets') or args.get('domain') or args.get('input') or ''}"
+    return json.dumps(args, default=str)[:200]
+
+class CollectedIndex:
+    """SQLite FTS5 (BM25-ranked) index over tool outputs, deduplicated by content hash"""
+
+    def __init__(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, tool TEXT, source TEXT, "
+                             "digest TEXT UNIQUE, chars INTEGER, created REAL)")
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(text, doc_id UNINDEXED, "
+                             "part UNINDEXED, tokenize='porter unicode61')")
+
+    def add(self, tool_name, source, text):
+        """Indexes one output; returns its document id, or None if the same text is already indexed"""
+        digest = hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
+        with self._lock, self._db:
+            if self._db.execute("SELECT 1 FROM documents WHERE digest = ?", (digest,)).fetchone():
+                return None
+            doc_id = self._db.execute("INSERT INTO documents (tool, source, digest, chars, created) "
+                                      "VALUES (?, ?, ?, ?, ?)",
+                                      (tool_name, source, digest, len(text), time.time())).lastrowid
+            self._db.executemany("INSERT INTO chunks (text, doc_id, part) VALUES (?, ?, ?)",
+                                 [(chunk, doc_id, i) for i, chunk in enumerate(chunk_text(text))])
+        return doc_id
+
+    def search(self, query, limit=10, tool_name=None):
+        sql = ("SELECT d.id, d.tool, d.source, snippet(chunks, 0, '[', ']', ' … ', 32), bm25(chunks) AS score "
+               "FROM chunks JOIN documents d ON d.id = chunks.doc_id WHERE chunks MATCH ?"
+               + (" AND d.tool = ?" if tool_name else "") + " ORDER BY score LIMIT ?")
+        for any_term in (False, True):
+            match = to_fts_query(query, any_term)
+            if not match:
+                return []
+            params = [match] + ([tool_name] if tool_name else []) + [limit]
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+            if rows:
+                return [{"doc_id": r[0], "tool": r[1], "source": r[2], "snippet": r[3], "score": -r[4]}
+                        for r in rows]
+        return []
+
+    def document(self, doc_id):
+        with self._lock:
+            meta = self._db.execute("SELECT tool, source FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            parts = self._db.execute("SELECT text FROM chunks WHERE doc_id = ? ORDER BY part", (doc_id,)).fetchall()
+        if meta is None:
+            return None
+        return {"tool": meta[0], "source": meta[1], "text": "".join(p[0] for p in parts)}
+
+    def counts(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM documents").fetchone()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Shared index opened on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CollectedIndex()
+        return _index
+
+class CollectingCallback(BaseCallbackHandler):
+    """Feeds the outputs of INDEXED_TOOLS into the index as each call ends"""
+
+    def __init__(self, index=None, tools=INDEXED_TOOLS):
+        self.index = index
+        self.tools = set(tools)
+        self.stats = {"indexed": 0, "duplicates": 0}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        if name in self.tools:
+            with self._lock:
+                self._pending[run_id] = (name, kwargs.get("inputs") or input_str)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        content = getattr(output, "content", output)
+        # Outputs that only report a failure (error strings or unsuccessful API responses) are not indexed
+        if is_error_result(content):
+            return
+        text = content if isinstance(content, str) else json.dumps(content, default=str)
+        if not text.strip():
+            return
+        name, tool_input = pending
+        doc_id = (self.index or get_index()).add(name, describe_source(name, tool_input), text)
+        with self._lock:
+            self.stats["indexed" if doc_id else "duplicates"] += 1
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._pending.pop(run_id, None)
+
+    def report(self):
+        documents, chars = (self.index or get_index()).counts()
+        return (f"Collected index: {self.stats['indexed']} outputs indexed this run "
+                f"({self.stats['duplicates']} already known), {documents} documents / {chars} chars in total")
+
+def collect_outputs(tools, callback):
+    """Attaches the callback to the indexed tools, so every call fires it whatever the run config"""
+    for t in tools:
+        if t.name in callback.tools:
+            t.callbacks = [*(t.callbacks or []), callback]
+    return tools
+
+@tool
+def search_collected(query: str, tool_name: str = None, limit: int = 10, doc_id: int = None) -> str:
+    """
+    Full-text search over everything collected so far (scraped pages, executor command outputs,
+    PDF and text files read), including earlier runs. Returns ranked snippets with their source
+    (URL, file path or command), so earlier material can be found without re-fetching it.
+
+    Args:
+        query: Words to look for, e.g. "admin panel login". Results containing all words rank
+            first; if none do, results with any of the words are returned.
+        tool_name: Optional filter: "web_scraper", "pentest_api_tool", "get_job_tool", "dns_tool",
+            "http_probe_tool", "session_tool", "read_pdf" or "read_txt".
+        limit: Maximum number of snippets (default 10).
+        doc_id: Instead of searching, return the full text of this document (the 'doc' number of a result).
+
+    Returns:
+        Ranked snippets with matches in [brackets], or the full document text.
+    """
+    index = get_index()
+    if doc_id is not None:
+        document = index.document(doc_id)
+        if document is None:
+            return f"❌ Unknown document: {doc_id}"
+        text = document["text"]
+        if len(text) > 20000:
+            text = text[:20000] + f"\n\n[⚠️ Output truncated - {len(document['text']) - 20000} more characters]"
+        return f"[{document['tool']}] {document['source']}\n{text}"
+
+    results = index.search(query, limit=limit, tool_name=tool_name)
+    if not results:
+        return f"No collected material matches '{query}'."
+    lines = []
+    for rank, r in enumerate(results, 1):
+        snippet = " ".join(r["snippet"].split())
+        lines.append(f"{rank}. [{r['tool']}] {r['source']} (doc {r['doc_id']}, score {r['score']:.2f})\n   {snippet}")
+    return "\n".join(lines)
@@ -0,0 +1,170 @@
+import collections
+import hashlib
+import os
+import statistics
+import threading
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import tool
+
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", "60000"))
+# Characters of full outputs kept for recall_output across all runs of the process
+OUTPUT_STORE_MAX_CHARS = int(os.getenv("OUTPUT_STORE_MAX_CHARS", str(50_000_000)))
+
+def estimate_tokens(messages):
+    """Cheap token estimate (~4 characters per token) good enough for budgeting"""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += len(content) // 4 + 4
+        for call in getattr(message, "tool_calls", None) or []:
+            total += len(str(call.get("args", ""))) // 4
+    return total
+
+class OutputStore:
+    """
+    Keeps the full text of compacted tool outputs, addressed by a content handle.
+    Bounded to max_chars: the least recently stored or recalled outputs go first.
+    """
+
+    def __init__(self, max_chars=OUTPUT_STORE_MAX_CHARS):
+        self.max_chars = max_chars
+        self._outputs = collections.OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def put(self, content):
+        handle = "out_" + hashlib.sha256(content.encode("utf-8", "ignore")).hexdigest()[:12]
+        with self._lock:
+            if handle in self._outputs:
+                self._outputs.move_to_end(handle)
+                return handle
+            self._outputs[handle] = content
+            self._chars += len(content)
+            # The newest output is kept even if it alone exceeds the cap
+            while self._chars > self.max_chars and len(self._outputs) > 1:
+                _, evicted = self._outputs.popitem(last=False)
+                self._chars -= len(evicted)
+        return handle
+
+    def get(self, handle):
+        with self._lock:
+            content = self._outputs.get(handle)
+            if content is not None:
+                self._outputs.move_to_end(handle)
+            return content
+
+    def __len__(self):
+        with self._lock:
+            return len(self._outputs)
+
+output_store = OutputStore()
+
+@tool
+def recall_output(handle: str, start: int = 0, length: int = 20000) -> str:
+    """
+    Retrieves the full text of an earlier tool output that was compacted to save context.
+    Compacted outputs end with a line like '[... compacted, handle=out_xxxx ...]'.
+
+    Args:
+        handle: The handle shown in the compacted output (e.g. "out_1a2b3c4d5e6f").
+        start: Character offset to start reading from (default 0).
+        length: Number of characters to return (default 20000).
+
+    Returns:
+        The requested slice of the original output.
+    """
+    content = output_store.get(handle.strip())
+    if content is None:
+        return f"❌ Unknown or expired handle: {handle}"
+    chunk = content[start:start + length]
+    if start + length < len(content):
+        chunk += f"\n\n[⚠️ {len(content) - start - length} more characters - call again with start={start + length}]"
+    return chunk
+
+class ContextCompactor:
+    """
+    pre_model_hook for the ReAct graph. The graph state keeps every message
+    verbatim; only the copy sent to the LLM is compacted. The most recent
+    messages stay intact, older bulky tool outputs are replaced by a short
+    excerpt plus a recall handle, and if the prompt is still above the token
+    ceiling the recent tool outputs are compacted too, oldest first.
+    """
+
+    def __init__(self, max_prompt_tokens=MAX_PROMPT_TOKENS, keep_recent=6, min_chars=2000, excerpt_chars=600,
+                 store=output_store):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.keep_recent = keep_recent
+        self.min_chars = min_chars
+        self.excerpt_chars = excerpt_chars
+        self.store = store
+        self.stats = []
+        # Message id -> (handle, compacted copy): each output is hashed and stored once, not on every step
+        self._compacted = {}
+        self._lock = threading.Lock()
+
+    def _compact(self, message):
+        key = message.id or message.tool_call_id
+        with self._lock:
+            cached = self._compacted.get(key)
+        # Reused while the store still holds the full text (get also marks it recently used)
+        if cached is not None and self.store.get(cached[0]) is not None:
+            return cached[1]
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        handle = self.store.put(content)
+        excerpt = content[:self.excerpt_chars]
+        compacted = ToolMessage(
+            content=f"{excerpt}\n[... compacted, handle={handle}, {len(content)} chars total - "
+                    f"use recall_output to read the rest ...]",
+            tool_call_id=message.tool_call_id,
+            name=message.name,
+            id=message.id,
+        )
+        with self._lock:
+            self._compacted[key] = (handle, compacted)
+        return compacted
+
+    def _is_bulky(self, message):
+        return isinstance(message, ToolMessage) and len(str(message.content)) > self.min_chars
+
+    def compact(self, messages):
+        messages = list(messages)
+        cutoff = max(len(messages) - self.keep_recent, 0)
+        for i in range(cutoff):
+            if self._is_bulky(messages[i]):
+                messages[i] = self._compact(messages[i])
+
+        # Still above the ceiling: compact recent outputs too, oldest first, keeping the latest one
+        for i in range(cutoff, len(messages) - 1):
+            if estimate_tokens(messages) <= self.max_prompt_tokens:
+                break
+            if self._is_bulky(messages[i]):
+                messages[i] = self._compact(messages[i])
+        return messages
+
+    def __call__(self, state):
+        messages = state["messages"]
+        before = estimate_tokens(messages)
+        compacted = self.compact(messages)
+        after = estimate_tokens(compacted)
+        with self._lock:
+            self.stats.append((before, after))
+        return {"llm_input_messages": compacted}
+
+    def report(self, per_step=False):
+        with self._lock:
+            stats = list(self.stats)
+        if not stats:
+            return "Context compaction: no LLM step recorded."
+        befores = [b for b, _ in stats]
+        afters = [a for _, a in stats]
+        lines = [
+            f"Context compaction over {len(stats)} LLM steps (estimated prompt tokens):",
+            f"  mean   before {statistics.fmean(befores):>9.0f} | after {statistics.fmean(afters):>9.0f}",
+            f"  max    before {max(befores):>9} | after {max(afters):>9}",
+            f"  total  before {sum(befores):>9} | after {sum(afters):>9} "
+            f"({100 * (1 - sum(afters) / sum(befores)) if sum(befores) else 0:.0f}% saved)",
+        ]
+        if per_step:
+            lines += [f"  step {i:>3}: {b:>9} -> {a:>9}" for i, (b, a) in enumerate(stats, 1)]
+        return "\n".join(lines)
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+from utils.tool_cache import ToolCallCache, canonical_args
+
+# passthrough: no recording; record: LLM responses already in the cassette are reused, tools always
+# run live and overwrite their recordings; replay: recorded responses only, anything missing raises
+# ReplayMiss (fully offline)
+MODES = ("passthrough", "record", "replay")
+DEFAULT_CASSETTE = os.path.join("recordings", "default.sqlite")
+# Cached generations come back with usage_metadata marking a zero cost, live ones with real usage
+VOLATILE_MESSAGE_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+class ReplayMiss(RuntimeError):
+    """A replayed run asked for an LLM response or tool output that was never recorded"""
+
+class Cassette:
+    """SQLite file holding recorded LLM generations and tool outputs"""
+
+    def __init__(self, path=DEFAULT_CASSETTE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm (key TEXT PRIMARY KEY, llm_string TEXT, "
+                             "generations TEXT, created REAL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS tools (key TEXT, occurrence INTEGER, name TEXT, "
+                             "args TEXT, output TEXT, created REAL, PRIMARY KEY (key, occurrence))")
+
+    def get_llm(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT generations FROM llm WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_llm(self, key, llm_string, generations):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO llm VALUES (?, ?, ?, ?)",
+                             (key, llm_string, json.dumps(generations), time.time()))
+
+    def get_tool(self, key, occurrence):
+        """Returns (found, output): a recorded output may itself be None"""
+        with self._lock:
+            row = self._db.execute("SELECT output FROM tools WHERE key = ? AND occurrence = ?",
+                                   (key, occurrence)).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def put_tool(self, key, occurrence, name, args, output):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO tools VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, occurrence, name, json.dumps(args, default=str),
+                              json.dumps(output, default=str), time.time()))
+
+    def clear_llm(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM llm")
+
+    def counts(self):
+        with self._lock:
+            llm = self._db.execute("SELECT COUNT(*) FROM llm").fetchone()[0]
+            tools = self._db.execute("SELECT COUNT(*) FROM tools").fetchone()[0]
+        return {"llm": llm, "tools": tools}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class RecordingLLMCache(BaseCache):
+    """
+    LangChain LLM cache backed by a Cassette. Keys hash the llm_string (model,
+    temperature, bound tools...) with the message history, minus the fields
+    that change between runs without reaching the provider.
+    """
+
+    def __init__(self, cassette, mode="record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Invalid LLM cache mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_prompt(prompt):
+        """Drops message fields that are never sent to the provider and differ between live and cached runs"""
+        try:
+            messages = json.loads(prompt)
+        except ValueError:
+            return prompt
+        for message in messages if isinstance(messages, list) else []:
+            kwargs = message.get("kwargs") if isinstance(message, dict) else None
+            if isinstance(kwargs, dict):
+                for field in VOLATILE_MESSAGE_FIELDS:
+                    kwargs.pop(field, None)
+        return json.dumps(messages, sort_keys=True)
+
+    @classmethod
+    def key(cls, prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x00{cls.normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def _count(self, field):
+        with self._lock:
+            self.stats[field] += 1
+
+    def lookup(self, prompt, llm_string):
+        key = self.key(prompt, llm_string)
+        stored = self.cassette.get_llm(key)
+        if stored is not None:
+            self._count("hits")
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # loads() is flagged as beta
+                return [loads(generation, allowed_objects="core") for generation in stored]
+        self._count("misses")
+        if self.mode == "replay":
+            raise ReplayMiss(f"No recorded LLM response for this message history in {self.cassette.path} "
+                             f"(key {key[:12]})")
+        return None
+
+    def update(self, prompt, llm_string, return_val):
+        if self.mode != "record":
+            return
+        self.cassette.put_llm(self.key(prompt, llm_string), llm_string,
+                              [dumps(generation) for generation in return_val])
+        self._count("recorded")
+
+    def clear(self, **kwargs):
+        self.cassette.clear_llm()
+
+class RecordedTool(BaseTool):
+    """
+    Records what a tool returned to the agent and replays it without calling
+    the tool. Identical calls are numbered in order within a scope (one per
+    campaign target), so a process polled several times replays each answer
+    in sequence.
+    """
+
+    _inner: BaseTool = PrivateAttr()
+    _recorder: Any = PrivateAttr()
+    _scope: Any = PrivateAttr()
+
+    def __init__(self, inner: BaseTool, recorder, scope=None):
+        super().__init__(
+            name=inner.name,
+            description=inner.description,
+            args_schema=inner.args_schema or inner.tool_call_schema,
+            return_direct=inner.return_direct,
+            handle_tool_error=inner.handle_tool_error,
+        )
+        self._inner = inner
+        self._recorder = recorder
+        self._scope = scope
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        tool_input = args[0] if args else kwargs
+        return self._recorder.call(self.name, tool_input,
+                                   lambda: self._inner.invoke(tool_input, config={"callbacks": []}),
+                                   scope=self._scope)
+
+class ToolRecorder:
+    def __init__(self, cassette, mode="record"):
+        self.cassette = cassette
+        self.mode = mode
+        self.stats = {"replayed": 0, "recorded": 0}
+        self._occurrences = {}
+        self._lock = threading.Lock()
+
+    def call(self, name, tool_input, compute, scope=None):
+        """
+        Replays or records one call. Occurrences are counted per scope, so concurrent
+        campaign targets polling the same process do not shift each other's sequence.
+        """
+        args = canonical_args(tool_input)
+        key = ToolCallCache.key(name, args)
+        if scope is not None:
+            key = f"{scope}:{key}"
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+        if self.mode == "replay":
+            found, output = self.cassette.get_tool(key, occurrence)
+            if not found:
+                raise ReplayMiss(f"No recorded output for {name}({args}) call #{occurrence + 1}"
+                                 + (f" of {scope}" if scope is not None else "") + f" in {self.cassette.path}")
+            with self._lock:
+                self.stats["replayed"] += 1
+            return output
+        # Recording always runs the tool: a stale recording is overwritten, never served to a live run
+        output = compute()
+        self.cassette.put_tool(key, occurrence, name, args, output)
+        with self._lock:
+            self.stats["recorded"] += 1
+        return output
+
+def record_tools(tools, recorder, scope=None):
+    return [RecordedTool(t, recorder, scope) for t in tools]
+
+class Replay:
+    """Wires a cassette into LangChain's global LLM cache and around the agent tools"""
+
+    def __init__(self, mode="passthrough", path=DEFAULT_CASSETTE):
+        if mode not in MODES:
+            raise ValueError(f"Invalid replay mode '{mode}', expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.cassette = Cassette(path) if mode != "passthrough" else None
+        self.llm_cache = RecordingLLMCache(self.cassette, mode) if self.cassette else None
+        self.tool_recorder = ToolRecorder(self.cassette, mode) if self.cassette else None
+        if self.llm_cache is not None:
+            set_llm_cache(self.llm_cache)
+
+    def wrap_tools(self, tools, scope=None):
+        """Tools recording to (or replaying from) the cassette; `scope` keeps one sequence per campaign target"""
+        return record_tools(tools, self.tool_recorder, scope) if self.tool_recorder else tools
+
+    def report(self):
+        if self.cassette is None:
+            return "Replay: passthrough (no recording)."
+        llm, tools = self.llm_cache.stats, self.tool_recorder.stats
+        counts = self.cassette.counts()
+        return (f"Replay ({self.mode}, {self.cassette.path}): LLM {llm['hits']} hits / {llm['misses']} misses, "
+                f"{llm['recorded']} recorded | tools {tools['replayed']} replayed, {tools['recorded']} recorded | "
+                f"cassette holds {counts['llm']} LLM responses, {counts['tools']} tool outputs")
@@ -0,0 +1,134 @@
+"""
+Import-time profile of the agent entry point.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters, reports the
+modules that cost the most to import and the median startup time, and can
+fail when startup regresses against a stored baseline.
+
+    python -m utils.startup_profile
+    python -m utils.startup_profile --save-baseline startup_baseline.json
+    python -m utils.startup_profile --baseline startup_baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def _run(module, importtime=False):
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    args += ["-c", f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"]
+    # No API key is needed to import the entry point, but a dummy one avoids surprises in tool modules
+    env = {**os.environ, "LLM_API_KEY": os.getenv("LLM_API_KEY", "profile")}
+    proc = subprocess.run(args, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    return float(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+def parse_importtime(stderr):
+    """Returns [{module, self_ms, cumulative_ms, depth}] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({"module": name, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000, "depth": len(indent) // 2})
+    return modules
+
+def profile(module="app", runs=5, top=20):
+    timings = [_run(module)[0] for _ in range(runs)]
+    _, stderr = _run(module, importtime=True)
+    modules = parse_importtime(stderr)
+    first_party = [m for m in modules if m["module"].split(".")[0] in ("app", "tools", "utils")]
+    return {
+        "module": module,
+        "runs": runs,
+        "startup_ms": {"median": statistics.median(timings) * 1000, "min": min(timings) * 1000,
+                       "max": max(timings) * 1000},
+        "module_count": len(modules),
+        "top_cumulative": sorted(modules, key=lambda m: -m["cumulative_ms"])[:top],
+        "top_self": sorted(modules, key=lambda m: -m["self_ms"])[:top],
+        # Direct third-party imports of our own modules: where a deferred import pays off
+        "first_party": sorted(first_party, key=lambda m: -m["cumulative_ms"]),
+    }
+
+def print_report(report, top=20):
+    startup = report["startup_ms"]
+    print(f"Startup of 'import {report['module']}' over {report['runs']} runs: "
+          f"median {startup['median']:.0f} ms (min {startup['min']:.0f}, max {startup['max']:.0f}), "
+          f"{report['module_count']} modules")
+    print(f"\nOwn modules (cumulative import cost)")
+    for m in report["first_party"]:
+        print(f"  {m['module']:<40} {m['cumulative_ms']:9.1f} ms")
+    print(f"\nTop {top} modules by cumulative import time")
+    for m in report["top_cumulative"][:top]:
+        print(f"  {m['module']:<40} {m['cumulative_ms']:9.1f} ms  (self {m['self_ms']:.1f} ms)")
+    print(f"\nTop {top} modules by self import time")
+    for m in report["top_self"][:top]:
+        print(f"  {m['module']:<40} {m['self_ms']:9.1f} ms")
+
+def compare_to_baseline(report, baseline, tolerance, max_ms=None):
+    """Returns the list of regressions compared to a stored baseline"""
+    regressions = []
+    current = report["startup_ms"]["median"]
+    previous = baseline["startup_ms"]["median"]
+    if current > previous * (1 + tolerance):
+        regressions.append(f"startup {current:.0f} ms > baseline {previous:.0f} ms")
+    if max_ms is not None and current > max_ms:
+        regressions.append(f"startup {current:.0f} ms > budget {max_ms:.0f} ms")
+    if regressions:
+        # Point at the likely culprit: heavy modules that were not in the baseline's top list
+        baseline_modules = {m["module"] for m in baseline.get("top_cumulative", [])}
+        new_heavy = [m["module"] for m in report["top_cumulative"][:10] if m["module"] not in baseline_modules]
+        if new_heavy:
+            regressions.append(f"new heavy imports: {', '.join(new_heavy)}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the import cost of the agent entry point")
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed imports, the median is reported")
+    parser.add_argument("--top", type=int, default=20, help="Modules listed per table")
+    parser.add_argument("--json", help="Write the full report to this file")
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline")
+    parser.add_argument("--baseline", help="Compare the results against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--max-ms", type=float, help="Absolute startup budget in milliseconds")
+    args = parser.parse_args(argv)
+
+    report = profile(args.module, runs=args.runs, top=args.top)
+    print_report(report, top=args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance, args.max_ms)
+    elif args.max_ms is not None and report["startup_ms"]["median"] > args.max_ms:
+        regressions = [f"startup {report['startup_ms']['median']:.0f} ms > budget {args.max_ms:.0f} ms"]
+
+    if regressions:
+        print("\n❌ Startup regressions:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    if args.baseline or args.max_ms is not None:
+        print("\n✅ Startup within budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
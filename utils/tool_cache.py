@@ -0,0 +1,167 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Union
+
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+@dataclass(frozen=True)
+class CachePolicy:
+    cacheable: bool = True
+    ttl: Optional[float] = 600  # Seconds, None = valid for the whole run
+
+NEVER_CACHE = CachePolicy(cacheable=False)
+
+# Executor commands whose output only depends on stable data and that change nothing.
+# Anything else (scanners, HTTP clients, brute-forcers, cat/ls of files that may be
+# growing) can return something different on the next call or has side effects.
+READ_ONLY_COMMANDS = frozenset({"whois", "dig", "host", "nslookup", "hashid", "which", "whereis",
+                                "uname", "whoami", "id", "hostname"})
+
+def _pentest_api_policy(args):
+    action = args.get("action")
+    if action == "allowed":
+        return CachePolicy(ttl=600)
+    if action == "execute":
+        words = str(args.get("command") or "").split()
+        if words and words[0].rsplit("/", 1)[-1] in READ_ONLY_COMMANDS:
+            return CachePolicy(ttl=120)
+    # Background processes and their polling change state
+    return NEVER_CACHE
+
+DEFAULT_POLICIES: Dict[str, Union[CachePolicy, Callable[[dict], CachePolicy]]] = {
+    "google_search": CachePolicy(ttl=3600),
+    "web_scraper": CachePolicy(ttl=300),
+    "read_pdf": CachePolicy(ttl=3600),
+    "read_txt": CachePolicy(ttl=60),
+    "exploitdb_search_tool": CachePolicy(ttl=24 * 3600),
+    "pentest_api_tool": _pentest_api_policy,
+    # Executor jobs and sessions start work or report progress that moves on every call
+    "bruteforce_tool": NEVER_CACHE,
+    "scan_tool": NEVER_CACHE,
+    "rescan_tool": NEVER_CACHE,
+    "crack_tool": NEVER_CACHE,
+    "dns_tool": NEVER_CACHE,
+    "http_probe_tool": NEVER_CACHE,
+    "get_job_tool": NEVER_CACHE,
+    "session_tool": NEVER_CACHE,
+    "report_generator_tool": NEVER_CACHE,
+    "download_file_tool": NEVER_CACHE,
+    "zip_processor_tool": NEVER_CACHE,
+    # Keeps its own cache keyed by content hash and must notice newly downloaded files
+    "analyze_artifacts": NEVER_CACHE,
+    "recall_output": NEVER_CACHE,
+    "search_collected": NEVER_CACHE,
+}
+
+# Outputs that report a failure are never memoized so the agent can retry them
+ERROR_PREFIXES = ("⚠️", "❌", "Error")
+
+def is_error_result(result):
+    """Failure strings, and executor API responses flagged unsuccessful or carrying an error"""
+    if isinstance(result, str):
+        return result.lstrip().startswith(ERROR_PREFIXES)
+    if isinstance(result, dict):
+        return result.get("success") is False or "error" in result
+    return False
+
+def canonical_args(tool_input):
+    if isinstance(tool_input, str):
+        return {"input": tool_input.strip()}
+    return {k: v.strip() if isinstance(v, str) else v for k, v in tool_input.items() if v is not None}
+
+class ToolCallCache:
+    """Per-run memo of tool results keyed by tool name and canonicalized arguments"""
+
+    def __init__(self, policies=None):
+        self.policies = dict(DEFAULT_POLICIES)
+        if policies:
+            self.policies.update(policies)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def policy(self, name, args) -> CachePolicy:
+        policy = self.policies.get(name, NEVER_CACHE)
+        return policy(args) if callable(policy) else policy
+
+    @staticmethod
+    def key(name, args):
+        payload = json.dumps([name, args], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, name, field):
+        with self._lock:
+            counters = self.stats.setdefault(name, {"hits": 0, "misses": 0, "uncached": 0})
+            counters[field] += 1
+
+    def call(self, name, tool_input, compute):
+        args = canonical_args(tool_input)
+        policy = self.policy(name, args)
+        if not policy.cacheable:
+            self._count(name, "uncached")
+            return compute()
+
+        key = self.key(name, args)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and (entry[0] is None or entry[0] > now):
+            self._count(name, "hits")
+            return entry[1]
+
+        self._count(name, "misses")
+        result = compute()
+        if not is_error_result(result):
+            expires = now + policy.ttl if policy.ttl is not None else None
+            with self._lock:
+                self._entries[key] = (expires, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats.clear()
+
+    def report(self):
+        with self._lock:
+            stats = {name: dict(c) for name, c in self.stats.items()}
+        if not stats:
+            return "Tool cache: no tool call recorded."
+        hits = sum(c["hits"] for c in stats.values())
+        lookups = hits + sum(c["misses"] for c in stats.values())
+        lines = [f"Tool cache: {hits}/{lookups} cacheable calls served from cache "
+                 f"({100 * hits / lookups if lookups else 0:.0f}% hit rate)"]
+        for name, c in sorted(stats.items()):
+            lines.append(f"  {name:<24} hits {c['hits']:>4} | misses {c['misses']:>4} | uncached {c['uncached']:>4}")
+        return "\n".join(lines)
+
+class MemoizedTool(BaseTool):
+    """Wraps a tool so identical calls are answered from a ToolCallCache"""
+
+    _inner: BaseTool = PrivateAttr()
+    _cache: ToolCallCache = PrivateAttr()
+
+    def __init__(self, inner: BaseTool, cache: ToolCallCache):
+        super().__init__(
+            name=inner.name,
+            description=inner.description,
+            # Tools without an explicit schema (plain BaseTool subclasses) expose one inferred from _run
+            args_schema=inner.args_schema or inner.tool_call_schema,
+            return_direct=inner.return_direct,
+            handle_tool_error=inner.handle_tool_error,
+        )
+        self._inner = inner
+        self._cache = cache
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        tool_input = args[0] if args else kwargs
+        # The wrapper is the traced tool run; the inner call gets no callbacks to avoid duplicate spans
+        return self._cache.call(self.name, tool_input,
+                                lambda: self._inner.invoke(tool_input, config={"callbacks": []}))
+
+def memoize_tools(tools, cache):
+    return [MemoizedTool(t, cache) for t in tools]
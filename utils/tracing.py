@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+
+class RunTracer(BaseCallbackHandler):
+    """Writes one JSONL span per LLM call, tool call and retry of an agent run"""
+
+    def __init__(self, trace_dir=TRACE_DIR, run_name=None):
+        os.makedirs(trace_dir, exist_ok=True)
+        self.run_name = run_name or time.strftime("run_%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        self.path = os.path.join(trace_dir, f"{self.run_name}.jsonl")
+        self._open_spans = {}
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.started_at = time.time()
+
+    # Spans
+
+    def _start(self, run_id, kind, name, **attrs):
+        with self._lock:
+            self._open_spans[run_id] = {"kind": kind, "name": name, "start": time.time(), **attrs}
+
+    def _end(self, run_id, **attrs):
+        with self._lock:
+            span = self._open_spans.pop(run_id, None)
+        if span is None:
+            return
+        span["end"] = time.time()
+        span["duration_s"] = span["end"] - span["start"]
+        span.update(attrs)
+        self.write(span)
+
+    def write(self, span):
+        span.setdefault("run", self.run_name)
+        span.setdefault("span_id", uuid.uuid4().hex[:12])
+        with self._lock:
+            self._file.write(json.dumps(span, default=str) + "\n")
+            self._file.flush()
+
+    def record_retry(self, attempt, wait_time, error):
+        now = time.time()
+        self.write({
+            "kind": "retry", "name": type(error).__name__, "attempt": attempt,
+            "start": now, "end": now + wait_time, "duration_s": wait_time, "error": str(error)[:500],
+        })
+
+    def close(self):
+        now = time.time()
+        self.write({"kind": "run", "name": self.run_name, "start": self.started_at,
+                    "end": now, "duration_s": now - self.started_at})
+        with self._lock:
+            self._file.close()
+
+    # LLM callbacks
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name", "llm")
+        self._start(run_id, "llm", model, input_messages=sum(len(m) for m in messages))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name", "llm")
+        self._start(run_id, "llm", model, input_messages=len(prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    usage = metadata
+        if not usage and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or {}
+            usage = {
+                "input_tokens": token_usage.get("prompt_tokens"),
+                "output_tokens": token_usage.get("completion_tokens"),
+                "total_tokens": token_usage.get("total_tokens"),
+            }
+        self._end(run_id, input_tokens=usage.get("input_tokens"),
+                  output_tokens=usage.get("output_tokens"), total_tokens=usage.get("total_tokens"))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error)[:500])
+
+    # Tool callbacks
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        args_hash = hashlib.sha256(str(input_str).encode("utf-8", "ignore")).hexdigest()[:16]
+        self._start(run_id, "tool", name, args_hash=args_hash)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        self._end(run_id, output_chars=len(str(content)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error)[:500])
+
+############### SUMMARY ###############
+
+def load_spans(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def critical_path(spans):
+    """
+    Spans of a ReAct run are sequential except for tool calls issued in the same
+    step, which run in parallel. Overlapping spans are grouped and only the
+    longest one of each group lies on the critical path.
+    """
+    ordered = sorted((s for s in spans if s["kind"] != "run"), key=lambda s: s["start"])
+    path, group, group_end = [], [], None
+    for span in ordered:
+        if group and span["start"] >= group_end:
+            path.append(max(group, key=lambda s: s["duration_s"]))
+            group = []
+        group_end = span["end"] if not group else max(group_end, span["end"])
+        group.append(span)
+    if group:
+        path.append(max(group, key=lambda s: s["duration_s"]))
+    return path
+
+def summarize(path, top=10):
+    spans = load_spans(path)
+    run = next((s for s in spans if s["kind"] == "run"), None)
+    work = [s for s in spans if s["kind"] != "run"]
+    if not work:
+        print("No spans recorded.")
+        return
+    wall = run["duration_s"] if run else max(s["end"] for s in work) - min(s["start"] for s in work)
+    path_spans = critical_path(work)
+    on_path = sum(s["duration_s"] for s in path_spans)
+
+    by_kind = defaultdict(float)
+    for s in path_spans:
+        by_kind[s["kind"]] += s["duration_s"]
+
+    sinks = defaultdict(lambda: [0, 0.0])
+    for s in work:
+        sinks[(s["kind"], s["name"])][0] += 1
+        sinks[(s["kind"], s["name"])][1] += s["duration_s"]
+
+    llm_spans = [s for s in work if s["kind"] == "llm"]
+    input_tokens = sum(s.get("input_tokens") or 0 for s in llm_spans)
+    output_tokens = sum(s.get("output_tokens") or 0 for s in llm_spans)
+
+    print(f"Trace {path}")
+    print(f"  wall time        : {wall:.1f}s")
+    print(f"  critical path    : {on_path:.1f}s over {len(path_spans)} spans "
+          f"(untracked {max(wall - on_path, 0):.1f}s)")
+    for kind, seconds in sorted(by_kind.items(), key=lambda kv: -kv[1]):
+        print(f"    {kind:<6} {seconds:8.1f}s  {100 * seconds / wall if wall else 0:5.1f}%")
+    print(f"  LLM calls        : {len(llm_spans)} ({input_tokens} prompt / {output_tokens} completion tokens)")
+
+    print(f"\nTop {top} time sinks")
+    for (kind, name), (count, seconds) in sorted(sinks.items(), key=lambda kv: -kv[1][1])[:top]:
+        print(f"  {kind:<6} {name:<30} {count:>4} calls {seconds:8.1f}s  avg {seconds / count:6.2f}s")
+
+    print(f"\nLongest spans on the critical path")
+    for s in sorted(path_spans, key=lambda s: -s["duration_s"])[:top]:
+        detail = f"{s.get('output_chars')} chars" if s["kind"] == "tool" else f"{s.get('input_tokens')} tokens"
+        print(f"  {time.strftime('%H:%M:%S', time.localtime(s['start']))} {s['kind']:<6} "
+              f"{s['name']:<30} {s['duration_s']:8.1f}s  {detail}")
+
+def latest_trace(trace_dir=TRACE_DIR):
+    files = [os.path.join(trace_dir, f) for f in os.listdir(trace_dir) if f.endswith(".jsonl")]
+    return max(files, key=os.path.getmtime) if files else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize agent run traces")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("trace", nargs="?", help="Trace file (default: latest in TRACE_DIR)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    trace = args.trace or latest_trace()
+    if not trace:
+        parser.error(f"no trace found in {TRACE_DIR}")
+    summarize(trace, top=args.top)